@@ -592,11 +592,15 @@ export default function AdminDashboard() {
 
                           {/* Submitted Match */}
                           <div className="flex-1 text-center">
-                            <p className="text-sm font-semibold text-gray-500 mb-2">Submitted Evidence</p>
+                            <p className="text-sm font-semibold text-gray-500 mb-2">{match.matched_case_id ? 'Possible Duplicate Case' : 'Submitted Evidence'}</p>
                             <div className="relative w-40 h-40 mx-auto rounded-lg overflow-hidden border-2 border-amber-200">
-                              <img src={`/user-uploads/${match.submitted_image}`} className="w-full h-full object-cover" alt="Submitted" />
+                              <img src={match.matched_case_id ? `/uploads/${match.submitted_image}` : `/user-uploads/${match.submitted_image}`} className="w-full h-full object-cover" alt="Submitted" />
                             </div>
-                            <p className="mt-2 text-sm text-gray-600">Submitted just now</p>
+                            {match.matched_case_id ? (
+                              <p className="mt-2 text-sm text-gray-600">{match.matched_case_name || match.matched_case_id} · {Math.round((match.score || 0) * 100)}% similar</p>
+                            ) : (
+                              <p className="mt-2 text-sm text-gray-600">Submitted just now</p>
+                            )}
                           </div>
                         </div>
 
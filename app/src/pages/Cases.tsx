@@ -87,9 +87,11 @@ const Cases = () => {
             status: item.tracing_status,
             age,
             date_of_birth: dob,
-            photo: item.image_file
-              ? `${BASE_URL}/uploads/${item.image_file}`
-              : "/placeholder.jpg",
+            photo: item.thumbnail_url
+              ? `${BASE_URL}${item.thumbnail_url}`
+              : item.image_file
+                ? `${BASE_URL}/uploads/${item.image_file}`
+                : "/placeholder.jpg",
           };
         });
 
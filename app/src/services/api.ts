@@ -56,6 +56,7 @@ export interface Person {
   police_station: string;
   tracing_status: string;
   image_file: string;
+  thumbnail_url?: string | null;
 }
 
 export interface Case {
@@ -281,6 +282,9 @@ export interface MatchReview {
   case_name: string;
   case_image: string;
   location: string;
+  score?: number | null;
+  matched_case_id?: string | null;
+  matched_case_name?: string | null;
 }
 
 export const getPotentialMatches = async (): Promise<MatchReview[]> => {
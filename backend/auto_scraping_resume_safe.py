@@ -1,134 +1,270 @@
-from playwright.sync_api import sync_playwright
-import json
-import csv
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+import math
 import time
 import os
+import sys
 from tqdm import tqdm
 
+from scrape_store import RecordLog, export_json, export_csv
+
 # ======================
 # CONFIG
 # ======================
-URL = "https://zipnet.delhipolice.gov.in/Victims/MissingPersons"
-HEADLESS = False
+# ZIPNET_URL can point at mock_zipnet_server.py for local testing
+URL = os.getenv("ZIPNET_URL", "https://zipnet.delhipolice.gov.in/Victims/MissingPersons")
+HEADLESS = os.getenv("HEADLESS", "0") == "1"
 PAGE_SIZE = 50
 FORCE_START_PAGE = 1  # enter where to resume from
 #last  completed page: 4000 ( total records: 197039 )
-JSON_FILE = "zipnet_all_missing_persons_1.json"
-CSV_FILE = "zipnet_all_missing_persons_1.csv"
+DATA_BASE = os.getenv("ZIPNET_DATA_BASE", "zipnet_all_missing_persons_1")   # -> .jsonl log + .ids index
+JSON_FILE = f"{DATA_BASE}.json"               # export only (--export)
+CSV_FILE = f"{DATA_BASE}.csv"                 # export only (--export)
 
 MAX_EMPTY_PAGES = 3
-PAGE_WAIT = 2.5   # seconds
+
+# pages fetched in parallel by replaying the grid's own XHR (1 = drive the
+# DataTables UI page by page)
+CONCURRENCY = int(os.getenv("ZIPNET_CONCURRENCY", "4"))
+
+# adaptive per-page timeout: TIMEOUT_FACTOR x smoothed latency, clamped
+MIN_TIMEOUT = 2.0      # seconds
+MAX_TIMEOUT = 60.0     # seconds
+TIMEOUT_FACTOR = 4
+LATENCY_SMOOTHING = 0.2
+MAX_RETRIES = 3
+
+DATA_ENDPOINT = "GetMissingPersonsData"
 
 # ======================
-# LOAD DATA
+# EXPORT ONLY
 # ======================
-all_data = []
-seen_ids = set()
+# python auto_scraping_resume_safe.py --export
+if "--export" in sys.argv:
+    n = export_json(f"{DATA_BASE}.jsonl", JSON_FILE)
+    export_csv(f"{DATA_BASE}.jsonl", CSV_FILE)
+    print(f"📁 Exported {n} records to {JSON_FILE} & {CSV_FILE}")
+    sys.exit(0)
 
-if os.path.exists(JSON_FILE):
-    with open(JSON_FILE, "r", encoding="utf-8") as f:
-        all_data = json.load(f)
-        for r in all_data:
-            pid = r.get("MissingPersonId")
-            if pid:
-                seen_ids.add(pid)
+# ======================
+# LOAD INDEX
+# ======================
+store = RecordLog(DATA_BASE)
+
+# one-off migration from the old full-rewrite JSON file
+if store.count == 0 and os.path.exists(JSON_FILE):
+    store.import_json(JSON_FILE)
 
-print(f"📂 Loaded {len(all_data)} existing records")
+print(f"📂 Loaded {store.count} existing record ids")
 
-state = {"initialized": False, "new_records": 0}
+state = {
+    "new_records": 0,
+    "latency": None,        # smoothed seconds per page
+    "total_pages": None,
+    "page_new": {},         # page number -> new records it contributed
+}
 
 # ======================
-# SAVE FUNCTIONS
+# ADAPTIVE TIMEOUT
 # ======================
-def save_json():
-    with open(JSON_FILE, "w", encoding="utf-8") as f:
-        json.dump(all_data, f, ensure_ascii=False, indent=2)
+def observe_latency(seconds):
+    if state["latency"] is None:
+        state["latency"] = seconds
+    else:
+        state["latency"] += LATENCY_SMOOTHING * (seconds - state["latency"])
+
+def page_timeout(attempt=0):
+    base = MAX_TIMEOUT if state["latency"] is None else state["latency"] * TIMEOUT_FACTOR
+    # every retry doubles the budget
+    return min(MAX_TIMEOUT, max(MIN_TIMEOUT, base) * (2 ** attempt))
+
+def handle_page(data):
+    if state["total_pages"] is None:
+        total = data.get("recordsFiltered") or data.get("recordsTotal")
+        if total:
+            state["total_pages"] = math.ceil(int(total) / PAGE_SIZE)
+    new = store.append(data.get("data", []))
+    state["new_records"] += new
+    return new
 
-def save_csv():
-    if not all_data:
-        return
-    keys = set()
-    for r in all_data:
-        keys.update(r.keys())
-    with open(CSV_FILE, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=sorted(keys))
-        writer.writeheader()
-        writer.writerows(all_data)
+def is_data_response(response):
+    return DATA_ENDPOINT in response.url
+
+# ======================
+# PARALLEL PAGE FETCH (IN-PAGE)
+# ======================
+# Replays the captured grid request with a different `start` for each page,
+# so cookies / anti-forgery tokens of the real session are reused. Every
+# fetch resolves as soon as its JSON is parsed -- no fixed sleeps.
+FETCH_PAGES_JS = """
+async ({url, method, body, headers, starts, length, timeoutMs}) => {
+    const withPaging = (start) => {
+        if (method === "GET") {
+            const u = new URL(url, location.href);
+            u.searchParams.set("start", start);
+            u.searchParams.set("length", length);
+            return [u.toString(), undefined];
+        }
+        if (body && body.trim().startsWith("{")) {
+            const b = JSON.parse(body);
+            b.start = start;
+            b.length = length;
+            return [url, JSON.stringify(b)];
+        }
+        const b = new URLSearchParams(body || "");
+        b.set("start", start);
+        b.set("length", length);
+        return [url, b.toString()];
+    };
+
+    return Promise.all(starts.map(async (start) => {
+        const ctrl = new AbortController();
+        const timer = setTimeout(() => ctrl.abort(), timeoutMs);
+        const t0 = performance.now();
+        try {
+            const [u, b] = withPaging(start);
+            const r = await fetch(u, {
+                method, body: b, headers, signal: ctrl.signal,
+                credentials: "same-origin",
+            });
+            if (!r.ok) {
+                return {start, ok: false, error: "HTTP " + r.status, ms: performance.now() - t0};
+            }
+            const data = await r.json();
+            return {start, ok: true, data, ms: performance.now() - t0};
+        } catch (e) {
+            return {start, ok: false, error: String(e), ms: performance.now() - t0};
+        } finally {
+            clearTimeout(timer);
+        }
+    }));
+}
+"""
+
+REPLAY_HEADERS = ("content-type", "x-requested-with", "requestverificationtoken", "accept")
+
+def capture_template(request):
+    headers = {
+        k: v for k, v in request.headers.items()
+        if k.lower() in REPLAY_HEADERS
+    }
+    return {
+        "url": request.url,
+        "method": request.method,
+        "body": request.post_data,
+        "headers": headers,
+    }
+
+def fetch_pages_parallel(page, template, page_numbers, attempt=0):
+    """Returns the page numbers that failed."""
+    results = page.evaluate(FETCH_PAGES_JS, {
+        **template,
+        "starts": [n * PAGE_SIZE for n in page_numbers],
+        "length": PAGE_SIZE,
+        "timeoutMs": int(page_timeout(attempt) * 1000),
+    })
+    failed = []
+    for r in results:
+        n = r["start"] // PAGE_SIZE
+        if r["ok"]:
+            observe_latency(r["ms"] / 1000)
+            state["page_new"][n] = handle_page(r["data"])
+        else:
+            failed.append(n)
+    return failed
+
+# ======================
+# SEQUENTIAL PAGE FETCH (DATATABLES UI)
+# ======================
+def draw_page(page, n, attempt=0):
+    """Draw page n and block until its XHR is handled. Returns success."""
+    t0 = time.monotonic()
+    try:
+        with page.expect_response(is_data_response, timeout=page_timeout(attempt) * 1000) as info:
+            page.evaluate(f"""
+                $('#missingPersonGrid').DataTable().page({n}).draw(false);
+            """)
+        data = info.value.json()
+    except PlaywrightTimeout:
+        return False
+    except Exception:
+        return False
+    observe_latency(time.monotonic() - t0)
+    state["page_new"][n] = handle_page(data)
+    return True
 
 # ======================
 # SCRAPER
 # ======================
+failed_pages = []
+
 with sync_playwright() as p:
     browser = p.chromium.launch(headless=HEADLESS)
     page = browser.new_page()
 
-    def handle_response(response):
-        if "GetMissingPersonsData" in response.url:
-            try:
-                data = response.json()
-                state["initialized"] = True
-                for r in data.get("data", []):
-                    pid = r.get("MissingPersonId")
-                    if pid and pid not in seen_ids:
-                        seen_ids.add(pid)
-                        all_data.append(r)
-                        state["new_records"] += 1
-            except Exception:
-                pass
-
-    page.on("response", handle_response)
-
     print("🚀 Opening Zipnet…")
     page.goto(URL, wait_until="load", timeout=60000)
 
-    # set page size
-    page.select_option(
-        "select[name='missingPersonGrid_length']",
-        value=str(PAGE_SIZE)
-    )
-    time.sleep(2)
-
-    while not state["initialized"]:
-        time.sleep(0.3)
+    # set page size and wait for the grid's own reload (this is also the
+    # request we replay for parallel fetching)
+    with page.expect_response(is_data_response, timeout=MAX_TIMEOUT * 1000) as info:
+        page.select_option(
+            "select[name='missingPersonGrid_length']",
+            value=str(PAGE_SIZE)
+        )
+    first = info.value
+    handle_page(first.json())
+    template = capture_template(first.request) if CONCURRENCY > 1 else None
 
     print(f"⏩ Jumping to page {FORCE_START_PAGE}")
-
-    page.evaluate(f"""
-        $('#missingPersonGrid').DataTable().page({FORCE_START_PAGE}).draw(false);
-    """)
-    time.sleep(PAGE_WAIT)
+    if state["total_pages"]:
+        print(f"📊 Pages on server: {state['total_pages']}")
 
     pbar = tqdm(desc="Zipnet pages", unit="page", initial=FORCE_START_PAGE)
 
     empty_pages = 0
-    current_page = FORCE_START_PAGE
+    next_page = FORCE_START_PAGE
+    batch_size = max(1, CONCURRENCY)
 
     try:
         while True:
-            prev_len = len(all_data)
+            if state["total_pages"] is not None and next_page >= state["total_pages"]:
+                print("🏁 Reached last page on server.")
+                break
 
-            # 🔥 Advance page via DataTables API (NO CLICK)
-            current_page += 1
-            page.evaluate(f"""
-                $('#missingPersonGrid').DataTable().page({current_page}).draw(false);
-            """)
-            time.sleep(PAGE_WAIT)
+            batch = list(range(next_page, next_page + batch_size))
+            if state["total_pages"] is not None:
+                batch = [n for n in batch if n < state["total_pages"]]
+            next_page = batch[-1] + 1
 
-            pbar.update(1)
-            pbar.set_postfix(
-                page=current_page,
-                total=len(all_data),
-                new=state["new_records"]
-            )
+            pending = batch
+            for attempt in range(MAX_RETRIES + 1):
+                if not pending:
+                    break
+                if attempt:
+                    print(f"🔁 Retrying pages {pending} (timeout {page_timeout(attempt):.1f}s)")
+                if template:
+                    pending = fetch_pages_parallel(page, template, pending, attempt)
+                else:
+                    pending = [n for n in pending if not draw_page(page, n, attempt)]
+            failed_pages.extend(pending)
 
-            save_json()
-            save_csv()
+            # consecutive pages (in order) that added nothing new
+            for n in batch:
+                if n in pending:
+                    continue
+                if state["page_new"].pop(n) == 0:
+                    empty_pages += 1
+                    print(f"⚠️ Empty page {empty_pages}/{MAX_EMPTY_PAGES}")
+                else:
+                    empty_pages = 0
 
-            if len(all_data) == prev_len:
-                empty_pages += 1
-                print(f"⚠️ Empty page {empty_pages}/{MAX_EMPTY_PAGES}")
-            else:
-                empty_pages = 0
+            pbar.update(len(batch))
+            pbar.set_postfix(
+                page=next_page - 1,
+                total=store.count,
+                new=state["new_records"],
+                latency=f"{(state['latency'] or 0):.2f}s"
+            )
 
             if empty_pages >= MAX_EMPTY_PAGES:
                 print("🛑 No more new data. Stopping.")
@@ -140,12 +276,14 @@ with sync_playwright() as p:
     finally:
         pbar.close()
         browser.close()
-        save_json()
-        save_csv()
+        store.close()
 
 # ======================
 # FINAL STATUS
 # ======================
 print("\n🎉 DONE")
 print("🆕 New records added:", state["new_records"])
-print("📁 Total records stored:", len(all_data))
+print("📁 Total records stored:", store.count)
+if failed_pages:
+    print("⚠️ Pages that kept failing:", failed_pages)
+print("💡 Run with --export to write", JSON_FILE, "&", CSV_FILE)
@@ -0,0 +1,127 @@
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocess import load_for_detection
+from config import PREPROCESS_MAX_SIDE
+
+# ======================
+# DECODE LATENCY BENCHMARK
+# ======================
+# Per-image time from JPEG bytes to the array handed to the face detector:
+#
+#   before: np.array(Image.open(f).convert("RGB"))   (full-resolution decode)
+#   after:  preprocess.load_for_detection(f)          (draft + EXIF + resize)
+#
+#   python -m benchmarks.decode_latency                       # synthetic phone photos
+#   python -m benchmarks.decode_latency --images ../final_images --limit 200
+#   python -m benchmarks.decode_latency --detector            # + InsightFace detection
+#
+# Synthetic photos are smooth gradients + sensor-like noise at common phone
+# resolutions (12 MP 4032x3024, 8 MP portrait with EXIF rotation), encoded at
+# quality 90 so file sizes resemble real uploads.
+
+PHONE_SIZES = [(4032, 3024), (3024, 4032), (3264, 2448), (1600, 1200)]
+
+
+def synthetic_photos(count, seed=0):
+    rng = np.random.default_rng(seed)
+    photos = []
+    for i in range(count):
+        w, h = PHONE_SIZES[i % len(PHONE_SIZES)]
+        x = np.linspace(0, 255, w, dtype=np.float32)[None, :, None]
+        y = np.linspace(0, 255, h, dtype=np.float32)[:, None, None]
+        base = (x * 0.6 + y * 0.4) * np.array([1.0, 0.8, 0.6], dtype=np.float32)
+        pixels = np.clip(base + rng.normal(0, 4, (h, w, 3)), 0, 255).astype(np.uint8)
+
+        img = Image.fromarray(pixels)
+        exif = Image.Exif()
+        exif[0x0112] = 6 if h > w else 1     # orientation: portraits stored rotated
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=90, exif=exif.tobytes())
+        photos.append(buf.getvalue())
+    return photos
+
+
+def load_images(path, limit):
+    names = sorted(n for n in os.listdir(path) if n.lower().endswith((".jpg", ".jpeg", ".png", ".webp")))
+    photos = []
+    for name in names[:limit]:
+        with open(os.path.join(path, name), "rb") as f:
+            photos.append(f.read())
+    return photos
+
+
+def before(data):
+    return np.array(Image.open(io.BytesIO(data)).convert("RGB"))
+
+
+def after(data):
+    return load_for_detection(io.BytesIO(data))
+
+
+def measure(fn, photos, detector=None, repeat=1):
+    latencies = []
+    pixel_bytes = []
+    for _ in range(repeat):
+        for data in photos:
+            start = time.perf_counter()
+            arr = fn(data)
+            if detector is not None:
+                detector(arr)
+            latencies.append(time.perf_counter() - start)
+            pixel_bytes.append(arr.nbytes)
+    ms = np.array(latencies) * 1000
+    return {
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        # decoded pixels held per request (the detector input)
+        "pixels_mb": round(float(np.mean(pixel_bytes)) / 1024**2, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image decode latency before / after reduced-resolution preprocessing")
+    parser.add_argument("--images", help="directory of real photos (default: synthetic phone photos)")
+    parser.add_argument("--count", type=int, default=24, help="synthetic photos to generate")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--detector", action="store_true", help="include InsightFace detection + recognition")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    photos = load_images(args.images, args.limit) if args.images else synthetic_photos(args.count)
+    avg_kb = sum(len(p) for p in photos) / len(photos) / 1024
+    print(f"📦 {len(photos)} photos, avg {avg_kb:.0f} KB, max_side={PREPROCESS_MAX_SIDE}")
+
+    detector = None
+    if args.detector:
+        from face import get_faces as detector
+
+    results = {
+        "after": measure(after, photos, detector, args.repeat),
+        "before": measure(before, photos, detector, args.repeat),
+    }
+    results["speedup"] = round(results["before"]["mean_ms"] / max(results["after"]["mean_ms"], 1e-9), 2)
+
+    for name in ("before", "after"):
+        print(f"  {name:6s} " + "  ".join(f"{k}={v}" for k, v in results[name].items()))
+    print(f"  speedup x{results['speedup']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"photos": len(photos), "max_side": PREPROCESS_MAX_SIDE, **results}, f, indent=2)
+        print(f"📁 Saved to: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocess import load_for_detection
+from config import PREPROCESS_MAX_SIDE, DETECTION_LADDER
+
+# ======================
+# FACE PIPELINE MICRO-BENCHMARK
+# ======================
+# Per-stage throughput of the /search inference path on a local image folder,
+# without the API, Postgres or Qdrant:
+#
+#   decode          preprocess.load_for_detection (what main.load_image does)
+#   detect@N        detector at input size NxN, for each --det-sizes
+#   align           face_align.norm_crop to 112x112
+#   embed_b1        recognizer, one crop per call (face.get_embedding today)
+#   embed_bN        recognizer, N crops per call (embed_faces / batch paths)
+#   tolist          embedding.tolist() as done before every vector store call
+#   tolist_json     tolist() + json.dumps (what goes over the wire to Qdrant)
+#
+# Each stage runs with every --threads count (threads sharing one set of ORT
+# sessions, like the uvicorn threadpool) and every --processes count (one
+# set of sessions per process, ORT threads split between them, like
+# WEB_CONCURRENCY workers). Memory is the RSS high-water mark while the
+# stage ran (sampled) and, for processes, the largest worker's ru_maxrss.
+#
+#   python -m benchmarks.face_pipeline --images ../final_images --limit 200
+#   python -m benchmarks.face_pipeline --images ../final_images --det-sizes 160 320 640 \
+#       --threads 1 2 4 --processes 1 2 4 --batch 8 32 --json face_pipeline.json
+
+_models = None
+_worker_ctx = {}
+
+
+def models(intra_threads=None):
+    global _models
+    if _models is None:
+        from models import load_detector, load_recognizer
+
+        kwargs = {"intra_threads": intra_threads} if intra_threads else {}
+        _models = load_detector(**kwargs), load_recognizer(**kwargs)
+    return _models
+
+
+# ----------------------
+# MEMORY
+# ----------------------
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except OSError:
+        return maxrss_mb()
+
+
+def maxrss_mb():
+    # KB on Linux, bytes on macOS
+    scale = 1024 if sys.platform != "darwin" else 1024**2
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+class PeakRSS:
+    """Samples RSS every few ms while active; .peak is the high-water mark."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = rss_mb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+
+# ----------------------
+# STAGES
+# ----------------------
+def prepare(paths, det_size):
+    """Inputs for every stage: decoded images, detected faces, crops, embeddings."""
+    from insightface.utils import face_align
+
+    det, rec = models()
+    # copies: never depend on the decoder handing out independent arrays
+    images = [np.array(load_for_detection(p)) for p in paths]
+    faces = []
+    for img in images:
+        bboxes, kpss = det.detect(img, input_size=(det_size, det_size), max_num=0)
+        if kpss is not None and len(bboxes):
+            largest = int(np.argmax((bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])))
+            faces.append((img, kpss[largest]))
+    size = rec.input_size[0]
+    crops = [face_align.norm_crop(img, landmark=kps, image_size=size) for img, kps in faces]
+    embeddings = list(rec.get_feat(crops)) if crops else []
+    return {"paths": paths, "images": images, "faces": faces, "crops": crops, "embeddings": embeddings}
+
+
+def per_item(fn):
+    def run(item):
+        fn(item)
+        return 1
+    return run
+
+
+def stages(ctx, det_sizes, batches):
+    """name -> (items, fn(item) -> units processed)."""
+    from insightface.utils import face_align
+
+    det, rec = models()
+    size = rec.input_size[0]
+
+    def detect_at(s):
+        return per_item(lambda img: det.detect(img, input_size=(s, s), max_num=0))
+
+    def embed_batch(chunk):
+        rec.get_feat(chunk)
+        return len(chunk)
+
+    out = {"decode": (ctx["paths"], per_item(load_for_detection))}
+    for s in det_sizes:
+        out[f"detect@{s}"] = (ctx["images"], detect_at(s))
+    out["align"] = (ctx["faces"], per_item(lambda f: face_align.norm_crop(f[0], landmark=f[1], image_size=size)))
+    out["embed_b1"] = (ctx["crops"], per_item(lambda c: rec.get_feat([c])))
+    for b in batches:
+        out[f"embed_b{b}"] = ([ctx["crops"][i:i + b] for i in range(0, len(ctx["crops"]), b)], embed_batch)
+    out["tolist"] = (ctx["embeddings"], per_item(lambda e: e.tolist()))
+    out["tolist_json"] = (ctx["embeddings"], per_item(lambda e: json.dumps(e.tolist())))
+    return out
+
+
+def run_stage(items, fn, threads):
+    if not items:
+        return 0, 0.0
+    start = time.perf_counter()
+    if threads == 1:
+        units = sum(fn(item) for item in items)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            units = sum(pool.map(fn, items))
+    return units, time.perf_counter() - start
+
+
+# ----------------------
+# PROCESS WORKERS
+# ----------------------
+def _worker_init(intra_threads):
+    models(intra_threads)
+
+
+def _worker_run(shard, det_size, det_sizes, batches, name):
+    """Runs one stage over this worker's shard; inputs are prepared (untimed) once per shard."""
+    key = (tuple(shard), det_size)
+    if key not in _worker_ctx:
+        _worker_ctx[key] = prepare(shard, det_size)
+    items, fn = stages(_worker_ctx[key], det_sizes, batches)[name]
+    if items:
+        fn(items[0])    # warm-up
+    units, seconds = run_stage(items, fn, 1)
+    return units, seconds, maxrss_mb()
+
+
+def run_processes(pool, shards, det_size, det_sizes, batches, name):
+    futures = [pool.submit(_worker_run, shard, det_size, det_sizes, batches, name) for shard in shards]
+    results = [f.result() for f in futures]
+    units = sum(r[0] for r in results)
+    # workers run their shards concurrently; the slowest one bounds throughput
+    seconds = max(r[1] for r in results)
+    return units, seconds, max(r[2] for r in results)
+
+
+def row(name, mode, workers, units, seconds, peak_mb):
+    return {
+        "stage": name, "mode": mode, "workers": workers, "units": units,
+        "per_sec": round(units / seconds, 1) if seconds else None,
+        "ms_per_unit": round(seconds / units * 1000, 3) if units else None,
+        "peak_rss_mb": round(peak_mb, 1),
+    }
+
+
+def list_images(folder, limit):
+    exts = (".jpg", ".jpeg", ".png", ".webp")
+    names = sorted(f for f in os.listdir(folder) if f.lower().endswith(exts))
+    return [os.path.join(folder, f) for f in names[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage throughput / memory of the face pipeline")
+    parser.add_argument("--images", default="final_images", help="folder of photos (e.g. final_images)")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--det-sizes", type=int, nargs="+", default=[160, 320, 480, 640])
+    parser.add_argument("--batch", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--processes", type=int, nargs="*", default=[1, 2])
+    parser.add_argument("--stages", nargs="*", help="only these stages (default: all)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    paths = list_images(args.images, args.limit)
+    if not paths:
+        sys.exit(f"no images in {args.images}")
+
+    det_size = DETECTION_LADDER[-1]
+    baseline = rss_mb()
+    ctx = prepare(paths, det_size)
+    print(f"📦 {len(paths)} images, {len(ctx['crops'])} faces at det_size={det_size}, "
+          f"max_side={PREPROCESS_MAX_SIDE}, models loaded: {rss_mb() - baseline:.0f} MB RSS")
+
+    rows = []
+    for name, (items, fn) in stages(ctx, args.det_sizes, args.batch).items():
+        if args.stages and name not in args.stages:
+            continue
+        if items:
+            fn(items[0])    # warm-up
+        for threads in args.threads:
+            with PeakRSS() as mem:
+                units, seconds = run_stage(items, fn, threads)
+            rows.append(row(name, "threads", threads, units, seconds, mem.peak))
+            print("  " + "  ".join(f"{k}={v}" for k, v in rows[-1].items()))
+
+    stage_names = [n for n in stages(ctx, args.det_sizes, args.batch) if not args.stages or n in args.stages]
+    for processes in args.processes:
+        intra = max(1, (os.cpu_count() or 1) // processes)
+        shards = [paths[i::processes] for i in range(processes)]
+        # spawn, not fork: the parent's ORT sessions / thread pools must not be inherited
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_worker_init, initargs=(intra,)) as pool:
+            for name in stage_names:
+                units, seconds, peak = run_processes(pool, shards, det_size, args.det_sizes, args.batch, name)
+                rows.append(row(name, "processes", processes, units, seconds, peak))
+                print("  " + "  ".join(f"{k}={v}" for k, v in rows[-1].items()))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "images": len(paths), "faces": len(ctx["crops"]), "det_size": det_size,
+                "max_side": PREPROCESS_MAX_SIDE, "cpu_count": os.cpu_count(), "results": rows,
+            }, f, indent=2)
+        print(f"📁 Saved to: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_store import LocalVectorStore, VECTOR_SIZE
+from benchmarks.quantization_recall import synthetic_faces, recall
+
+# ======================
+# HNSW / EF SWEEP
+# ======================
+# Latency vs recall operating points for /search. For every index config the
+# same queries run once exact (ground truth) and once per ef value; the table
+# shows recall@k and p50/p95 latency so peak / off-peak SEARCH_HNSW_EF can be
+# picked from measurements.
+#
+#   python -m benchmarks.hnsw_sweep                                  # local IVF tier
+#   python -m benchmarks.hnsw_sweep --qdrant-url http://localhost:6333 --m 8 16 32
+#
+# The local index maps ef onto IVF lists probed (ef // IVF_EF_PER_PROBE).
+
+TOP_K = 5
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def run_queries(search, queries):
+    results = []
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        results.append(search(q))
+        latencies.append(time.perf_counter() - start)
+    return results, latencies
+
+
+def sweep(search, queries, k, efs, config):
+    exact, exact_lat = run_queries(lambda q: search(q, None, True), queries)
+    rows = [{
+        **config, "ef": "exact", "recall_at_k": 1.0,
+        "p50_ms": percentile_ms(exact_lat, 50), "p95_ms": percentile_ms(exact_lat, 95),
+    }]
+    for ef in efs:
+        results, lat = run_queries(lambda q: search(q, ef, False), queries)
+        rows.append({
+            **config, "ef": ef, "recall_at_k": round(recall(exact, results, k), 4),
+            "p50_ms": percentile_ms(lat, 50), "p95_ms": percentile_ms(lat, 95),
+        })
+    return rows
+
+
+# ======================
+# LOCAL INDEX
+# ======================
+def bench_local(corpus, queries, k, efs):
+    with tempfile.TemporaryDirectory() as root:
+        store = LocalVectorStore(root)
+        for start in range(0, len(corpus), 10_000):
+            store.upsert([
+                {"id": str(uuid.uuid4()), "vector": v, "payload": {}}
+                for v in corpus[start:start + 10_000]
+            ])
+        store.build_ivf()
+        rows = sweep(
+            lambda q, ef, exact: store.search(q, limit=k, ef=ef, exact=exact),
+            queries, k, efs, {"engine": "local", "nlist": len(store.centroids)},
+        )
+        store.close()
+    return rows
+
+
+# ======================
+# QDRANT
+# ======================
+def bench_qdrant(url, corpus, queries, k, efs, ms, ef_construct):
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import CollectionStatus, Distance, PointStruct, SearchParams, VectorParams
+    from create_qdrant_collection import hnsw_config
+
+    client = QdrantClient(url=url, timeout=300)
+    rows = []
+    for m in ms:
+        collection = f"hnsw_bench_m{m}"
+        client.recreate_collection(
+            collection_name=collection,
+            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
+            # threshold 0: always build / use the graph, even for small corpora
+            hnsw_config=hnsw_config(m=m, ef_construct=ef_construct, full_scan_threshold=0),
+        )
+        start = time.perf_counter()
+        for offset in range(0, len(corpus), 1000):
+            client.upsert(collection_name=collection, points=[
+                PointStruct(id=offset + i, vector=v.tolist())
+                for i, v in enumerate(corpus[offset:offset + 1000])
+            ])
+        while client.get_collection(collection).status != CollectionStatus.GREEN:
+            time.sleep(1)
+        build_s = round(time.perf_counter() - start, 1)
+
+        def search(q, ef, exact):
+            return client.search(
+                collection_name=collection,
+                query_vector=q.tolist(),
+                limit=k,
+                search_params=SearchParams(hnsw_ef=ef, exact=exact),
+            )
+
+        rows += sweep(search, queries, k, efs,
+                      {"engine": "qdrant", "m": m, "ef_construct": ef_construct, "build_s": build_s})
+        client.delete_collection(collection)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency / recall sweep over HNSW m and query ef")
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256, 512])
+    parser.add_argument("--m", type=int, nargs="+", default=[16])
+    parser.add_argument("--ef-construct", type=int, default=100)
+    parser.add_argument("--qdrant-url", help="sweep a Qdrant server instead of the local index")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    corpus, queries = synthetic_faces(args.points, args.queries)
+    print(f"📦 {len(corpus)} vectors, {len(queries)} queries, k={args.k}")
+
+    if args.qdrant_url:
+        rows = bench_qdrant(args.qdrant_url, corpus, queries, args.k, args.ef, args.m, args.ef_construct)
+    else:
+        rows = bench_local(corpus, queries, args.k, args.ef)
+
+    for row in rows:
+        print("  " + "  ".join(f"{k}={v}" for k, v in row.items()))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"points": len(corpus), "queries": len(queries), "k": args.k, "results": rows}, f, indent=2)
+        print(f"📁 Saved to: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
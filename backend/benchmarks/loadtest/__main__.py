@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from benchmarks.loadtest import dataset, seed
+
+# ======================
+# API LOAD TEST
+# ======================
+# Seeds a synthetic dataset (benchmarks/loadtest/dataset.py) and drives the
+# hot endpoints with N concurrent clients for a fixed time, then reports
+# p50/p95/p99 latency and throughput per endpoint.
+#
+#   # no Docker, no network: ASGI app in-process, SQLite-backed fake DB,
+#   # local vector index, FakeML (optionally with a simulated model delay)
+#   python -m benchmarks.loadtest --scale 10k --concurrency 16 --duration 30
+#   python -m benchmarks.loadtest --scale 100k --ml-delay-ms 40 --json lt_100k.json
+#
+#   # the Docker stack (docker-compose up): seeds Postgres + Qdrant directly,
+#   # then load-tests the running API over HTTP
+#   python -m benchmarks.loadtest --target http://localhost:8000 --scale 1m \
+#       --pg-dsn "host=localhost dbname=faces_db user=postgres password=postgres" \
+#       --qdrant-url http://localhost:6333
+#
+# --mix sets relative weights per endpoint. /report/missing creates real
+# cases (FP_* ids) and notifications, so point the HTTP mode at a throwaway
+# database. With VECTOR_STORE=local on the server, seed it with the
+# server stopped (the index is read at startup).
+
+ENDPOINTS = ("search", "cases", "report", "notifications", "stats")
+DEFAULT_MIX = "search=30,cases=30,report=5,notifications=20,stats=15"
+COLLECTION = "missing_person_faces"
+LOADTEST_USER = {
+    "first_name": "Load", "last_name": "Test", "email": "loadtest@example.com",
+    "phone": "0000000000", "password": "loadtest-password",
+}
+IMAGE_POOL = 64
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise SystemExit(f"unknown endpoint in --mix: {name} (choose from {', '.join(ENDPOINTS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+# ----------------------
+# TARGETS
+# ----------------------
+def inprocess_target(args, work_dir):
+    """ASGI transport over main.app with the fakes wired into db.py / main.py."""
+    import httpx
+    import db
+    from benchmarks.loadtest.fakes import FakeDatabase, FakeML
+    from image_variants import ImageVariants
+    from metrics import register_cache
+    from vector_store import LocalVectorStore, InstrumentedVectorStore
+
+    fake_db = FakeDatabase()
+    db.conn._factory = lambda: fake_db
+    db.vector_store._factory = lambda: InstrumentedVectorStore(
+        LocalVectorStore(os.path.join(work_dir, "local_index", COLLECTION)), "local")
+
+    import main
+
+    main.ml = FakeML(args.seed, args.ml_delay_ms)
+    images = os.path.join(work_dir, "final_images")
+    user_images = os.path.join(work_dir, "user_uploads")
+    os.makedirs(images, exist_ok=True)
+    os.makedirs(user_images, exist_ok=True)
+    main.IMAGES_DIR, main.USER_IMAGES_DIR = images, user_images
+    main.image_variants = ImageVariants({"uploads": images, "user-uploads": user_images},
+                                        os.path.join(work_dir, "image_variants"))
+    register_cache("image_variants", main.image_variants)
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest",
+                               timeout=args.timeout)
+    return client, db.conn, db.vector_store.get()
+
+
+def http_target(args):
+    import httpx
+
+    client = httpx.AsyncClient(
+        base_url=args.target, timeout=args.timeout,
+        limits=httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency),
+    )
+    if args.no_seed:
+        return client, None, None
+
+    import psycopg2
+    from qdrant_client import QdrantClient
+    from vector_store import make_vector_store
+
+    conn = psycopg2.connect(args.pg_dsn)
+    store = make_vector_store(COLLECTION, QdrantClient(url=args.qdrant_url))
+    return client, conn, store
+
+
+async def login(client):
+    """Bearer token for the load-test citizen (registered on first run)."""
+    response = await client.post("/auth/register", data=LOADTEST_USER)
+    if response.status_code != 200:
+        response = await client.post("/auth/login", data={
+            "username": LOADTEST_USER["email"], "password": LOADTEST_USER["password"],
+        })
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+# ----------------------
+# REQUESTS
+# ----------------------
+class Workload:
+    def __init__(self, n, token, seed_value):
+        self.n = n
+        self.auth = {"Authorization": f"Bearer {token}"}
+        rng = np.random.default_rng(seed_value)
+        # photos of people who are in the index, so /search and /report hit matches
+        people = rng.integers(0, max(1, n // dataset.PHOTOS_PER_PERSON), IMAGE_POOL)
+        self.images = [dataset.face_image(int(p), seed=seed_value) for p in people]
+
+    def request(self, name, rng):
+        """(method, url, kwargs) for one call to endpoint `name`."""
+        if name == "search":
+            return "POST", "/search", {"files": {"file": ("query.png", rng.choice(self.images), "image/png")}}
+        if name == "cases":
+            params = {"page": rng.randint(1, 20), "limit": 24}
+            roll = rng.random()
+            if roll < 0.2:
+                params["state"] = rng.choice(dataset.STATES)
+            elif roll < 0.3:
+                params["search"] = rng.choice(dataset.FIRST_NAMES).lower()
+            elif roll < 0.4:
+                params["status"] = "Untraced"
+            return "GET", "/cases", {"params": params}
+        if name == "report":
+            return "POST", "/report/missing", {
+                "headers": self.auth,
+                "data": {"name": "Load Test", "gender": "male", "birth_year": 2000, "state": "delhi",
+                         "district": "new delhi", "police_station": "ps 1"},
+                "files": {"photo": ("report.png", rng.choice(self.images), "image/png")},
+            }
+        if name == "notifications":
+            return "GET", "/notifications", {"headers": self.auth}
+        return "GET", "/dashboard/stats", {}
+
+
+async def drive(client, workload, mix, concurrency, duration, warmup, seed_value):
+    names, weights = list(mix), list(mix.values())
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop = measure_from + duration
+
+    async def worker(i):
+        rng = random.Random(seed_value * 1000 + i)
+        while True:
+            now = time.perf_counter()
+            if now >= stop:
+                return
+            name = rng.choices(names, weights)[0]
+            method, url, kwargs = workload.request(name, rng)
+            t0 = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            t1 = time.perf_counter()
+            if t0 >= measure_from:
+                samples[name].append(t1 - t0)
+                if not ok:
+                    errors[name] += 1
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return samples, errors
+
+
+def summarize(samples, errors, duration):
+    def stats(latencies, errs):
+        ms = np.asarray(latencies) * 1000
+        return {
+            "requests": len(ms),
+            "errors": errs,
+            "rps": round(len(ms) / duration, 1),
+            "mean_ms": round(float(ms.mean()), 2) if len(ms) else None,
+            "p50_ms": round(float(np.percentile(ms, 50)), 2) if len(ms) else None,
+            "p95_ms": round(float(np.percentile(ms, 95)), 2) if len(ms) else None,
+            "p99_ms": round(float(np.percentile(ms, 99)), 2) if len(ms) else None,
+        }
+
+    endpoints = {name: stats(samples[name], errors[name]) for name in ENDPOINTS if name in samples}
+    total = stats([v for name in samples for v in samples[name]], sum(errors.values()))
+    return endpoints, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a synthetic dataset and load-test the API")
+    parser.add_argument("--target", default="inprocess", help="'inprocess' or the API base URL")
+    parser.add_argument("--scale", default="10k", help="10k | 100k | 1m | a number of cases")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds run before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"endpoint weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--ml-delay-ms", type=float, default=0, help="inprocess: simulated inference time")
+    parser.add_argument("--pg-dsn", default="host=localhost port=5432 dbname=faces_db user=postgres password=postgres")
+    parser.add_argument("--qdrant-url", default="http://localhost:6333")
+    parser.add_argument("--no-seed", action="store_true", help="HTTP mode: data is already loaded")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    n = dataset.scale_size(args.scale)
+    mix = parse_mix(args.mix)
+
+    with tempfile.TemporaryDirectory(prefix="loadtest_") as work_dir:
+        if args.target == "inprocess":
+            client, conn, store = inprocess_target(args, work_dir)
+        else:
+            client, conn, store = http_target(args)
+
+        if conn is not None:
+            t0 = time.perf_counter()
+            seed.seed_persons(conn, n, args.seed)
+            seed.seed_vectors(store, n, args.seed)
+            print(f"📦 Seeded {n} cases in {time.perf_counter() - t0:.1f}s")
+
+        async def run():
+            async with client:
+                token = await login(client)
+                if conn is not None:
+                    cur = conn.cursor()
+                    cur.execute("SELECT id FROM users WHERE email = %s", (LOADTEST_USER["email"],))
+                    seed.seed_notifications(conn, cur.fetchone()[0])
+                workload = Workload(n, token, args.seed)
+                print(f"🚀 {args.concurrency} clients, {args.duration:.0f}s against {args.target}, mix {args.mix}")
+                return await drive(client, workload, mix, args.concurrency, args.duration, args.warmup, args.seed)
+
+        samples, errors = asyncio.run(run())
+
+    endpoints, total = summarize(samples, errors, args.duration)
+    print(f"\n{'endpoint':<14}{'reqs':>7}{'err':>5}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, s in list(endpoints.items()) + [("TOTAL", total)]:
+        print(f"{name:<14}{s['requests']:>7}{s['errors']:>5}{s['rps']:>8}"
+              f"{s['p50_ms'] or 0:>9}{s['p95_ms'] or 0:>9}{s['p99_ms'] or 0:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "target": args.target, "scale": args.scale, "cases": n,
+                "concurrency": args.concurrency, "duration": args.duration, "mix": mix,
+                "ml_delay_ms": args.ml_delay_ms if args.target == "inprocess" else None,
+                "endpoints": endpoints, "total": total,
+            }, f, indent=2)
+        print(f"📁 Saved to: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import argparse
+import csv
+import io
+import os
+import sys
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from vector_store import VECTOR_SIZE
+
+# ======================
+# SYNTHETIC DATASET
+# ======================
+# Deterministic cases for the load test: person metadata, 512-d embeddings
+# and small synthetic face photos, generated in chunks so 1M points never
+# sit in memory at once.
+#
+# Embeddings follow benchmarks/quantization_recall.py: a random unit
+# "identity" per person plus per-photo noise, so photos of the same person
+# score ~0.7 and a query for person p finds p's cases above the /search
+# threshold. Identities are regenerated per block of PEOPLE_BLOCK people
+# from (seed, block), which lets FakeML derive the query vector for any
+# person without keeping the whole identity matrix around.
+#
+#   python -m benchmarks.loadtest.dataset --scale 10k --out /tmp/lb10k           # CSV + embeddings.npy
+#   python -m benchmarks.loadtest.dataset --scale 10k --out /tmp/lb10k --images  # + final_images/
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+PHOTOS_PER_PERSON = 4
+NOISE = 0.65
+PEOPLE_BLOCK = 1024
+CHUNK = 10_000
+
+STATES = ["MAHARASHTRA", "DELHI", "KARNATAKA", "UTTAR PRADESH", "BIHAR", "TAMIL NADU", "WEST BENGAL", "GUJARAT"]
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Isha", "Kabir", "Meera", "Rohan", "Saanvi", "Arjun", "Priya"]
+LAST_NAMES = ["Sharma", "Verma", "Patel", "Singh", "Kumar", "Reddy", "Das", "Iyer", "Khan", "Gupta"]
+STATUSES = ["Untraced"] * 6 + ["Traced"] * 2 + ["matched", "closed"]
+
+
+def scale_size(scale):
+    return SCALES[scale.lower()] if scale.lower() in SCALES else int(scale)
+
+
+@lru_cache(maxsize=64)
+def _identity_block(seed, block):
+    rng = np.random.default_rng((seed, block))
+    people = rng.standard_normal((PEOPLE_BLOCK, VECTOR_SIZE)).astype(np.float32)
+    return people / np.linalg.norm(people, axis=1, keepdims=True)
+
+
+def identities(people, seed=0):
+    people = np.asarray(people)
+    out = np.empty((len(people), VECTOR_SIZE), dtype=np.float32)
+    for block in np.unique(people // PEOPLE_BLOCK):
+        mask = people // PEOPLE_BLOCK == block
+        out[mask] = _identity_block(seed, int(block))[people[mask] % PEOPLE_BLOCK]
+    return out
+
+
+def photo_vectors(people, rng, seed=0, noise=NOISE):
+    """One noisy photo embedding per entry of `people` (unit length)."""
+    jitter = rng.standard_normal((len(people), VECTOR_SIZE)).astype(np.float32) / np.sqrt(VECTOR_SIZE)
+    x = identities(people, seed) + noise * jitter
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def person_of(index):
+    return index // PHOTOS_PER_PERSON
+
+
+def case_id(index):
+    return f"FP_LT{index:09d}"
+
+
+def embeddings(n, seed=0, chunk=CHUNK):
+    """Yields (start, float32 [m, 512]) chunks covering cases 0..n-1."""
+    for start in range(0, n, chunk):
+        idx = np.arange(start, min(n, start + chunk))
+        rng = np.random.default_rng((seed, 1, start))
+        yield start, photo_vectors(person_of(idx), rng, seed)
+
+
+def persons(n, seed=0, chunk=CHUNK, now=None):
+    """Yields lists of persons rows (final_person_id, name, sex, birth_year, state,
+    district, police_station, tracing_status, image_file, created_at)."""
+    now = now or datetime.now().replace(microsecond=0)
+    for start in range(0, n, chunk):
+        rng = np.random.default_rng((seed, 2, start))
+        m = min(n, start + chunk) - start
+        first = rng.integers(0, len(FIRST_NAMES), m)
+        last = rng.integers(0, len(LAST_NAMES), m)
+        state = rng.integers(0, len(STATES), m)
+        status = rng.integers(0, len(STATUSES), m)
+        born = rng.integers(1950, 2020, m)
+        age_days = rng.integers(0, 365, m)
+        rows = []
+        for j in range(m):
+            i = start + j
+            p = person_of(i)
+            rows.append((
+                case_id(i),
+                f"{FIRST_NAMES[first[j]]} {LAST_NAMES[last[j]]}",
+                "MALE" if p % 2 else "FEMALE",
+                int(born[j]),
+                STATES[state[j]],
+                f"DISTRICT {int(state[j]) * 10 + p % 10}",
+                f"PS {p % 50}",
+                STATUSES[status[j]],
+                f"{case_id(i)}.png",
+                now - timedelta(days=int(age_days[j])),
+            ))
+        yield rows
+
+
+def face_image(person, size=256, seed=0):
+    """Synthetic frontal "face" PNG for `person`: skin oval, eyes, brows, mouth on a
+    plain background. Only used as an upload payload -- the real detector does not
+    reliably find these, FakeML maps them back to `person` via the pixels."""
+    rng = np.random.default_rng((seed, 3, person))
+    bg = tuple(int(v) for v in rng.integers(150, 240, 3))
+    skin = tuple(int(v) for v in (rng.integers(140, 230), rng.integers(100, 180), rng.integers(80, 150)))
+    img = Image.new("RGB", (size, size), bg)
+    d = ImageDraw.Draw(img)
+    s = size / 256
+    cx, cy = size / 2 + rng.integers(-10, 11) * s, size / 2 + rng.integers(-6, 7) * s
+    w, h = (70 + rng.integers(0, 15)) * s, (92 + rng.integers(0, 15)) * s
+    d.ellipse([cx - w, cy - h, cx + w, cy + h], fill=skin)
+    for side in (-1, 1):
+        ex, ey = cx + side * 30 * s, cy - 18 * s
+        d.ellipse([ex - 11 * s, ey - 6 * s, ex + 11 * s, ey + 6 * s], fill=(250, 250, 250))
+        d.ellipse([ex - 5 * s, ey - 5 * s, ex + 5 * s, ey + 5 * s], fill=(40, 30, 25))
+        d.line([ex - 14 * s, ey - 16 * s, ex + 14 * s, ey - 18 * s], fill=(50, 35, 30), width=max(1, int(4 * s)))
+    d.line([cx, cy - 8 * s, cx - 6 * s, cy + 20 * s, cx + 4 * s, cy + 22 * s], fill=(120, 80, 70), width=max(1, int(3 * s)))
+    d.arc([cx - 24 * s, cy + 22 * s, cx + 24 * s, cy + 50 * s], 20, 160, fill=(150, 50, 60), width=max(1, int(4 * s)))
+    # person id in the corner pixels (FakeML reads it back after decode)
+    marker = np.frombuffer(int(person).to_bytes(4, "big"), dtype=np.uint8)
+    img = img.filter(ImageFilter.GaussianBlur(0.8 * s))
+    px = img.load()
+    for k, byte in enumerate(marker):
+        for dx in range(4):
+            for dy in range(4):
+                px[4 * k + dx, dy] = (int(byte), int(byte), int(byte))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")     # lossless, so the marker survives
+    return buf.getvalue()
+
+
+def read_marker(pixels):
+    """Inverse of face_image's marker for an HxWx3 array (or None)."""
+    arr = np.asarray(pixels)
+    if arr.ndim != 3 or arr.shape[0] < 4 or arr.shape[1] < 16:
+        return None
+    return int.from_bytes(bytes(int(arr[1, 4 * k + 1, 0]) for k in range(4)), "big")
+
+
+def write(out_dir, n, seed=0, images=False):
+    os.makedirs(out_dir, exist_ok=True)
+    vectors = np.lib.format.open_memmap(os.path.join(out_dir, "embeddings.npy"), mode="w+",
+                                        dtype=np.float32, shape=(n, VECTOR_SIZE))
+    for start, chunk in embeddings(n, seed):
+        vectors[start:start + len(chunk)] = chunk
+    vectors.flush()
+
+    image_dir = os.path.join(out_dir, "final_images")
+    if images:
+        os.makedirs(image_dir, exist_ok=True)
+    # same columns ingest_embeddings.py reads
+    with open(os.path.join(out_dir, "faces_found.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["FinalPersonId", "Name", "Sex", "BirthYear", "State", "District",
+                         "PoliceStation", "TracingStatus", "ImageFile"])
+        i = 0
+        for rows in persons(n, seed):
+            for row in rows:
+                writer.writerow(row[:9])
+                if images:
+                    with open(os.path.join(image_dir, row[8]), "wb") as img:
+                        img.write(face_image(person_of(i), seed=seed))
+                i += 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic load-test dataset to disk")
+    parser.add_argument("--scale", default="10k", help="10k | 100k | 1m | a number of cases")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--images", action="store_true", help="also write one synthetic photo per case")
+    args = parser.parse_args()
+
+    n = scale_size(args.scale)
+    write(args.out, n, args.seed, args.images)
+    print(f"📁 Saved {n} cases to: {args.out}")
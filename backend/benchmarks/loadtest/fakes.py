@@ -0,0 +1,193 @@
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.loadtest import dataset
+
+# ======================
+# IN-PROCESS FAKES
+# ======================
+# Stand-ins for the services main.py talks to, so the load test can run
+# with no Docker and no network (`--target inprocess`):
+#
+#   FakeDatabase  psycopg2-shaped connection over in-memory SQLite; the
+#                 handful of Postgres-isms main.py uses are rewritten
+#   FakeML        ml_client-shaped; returns the synthetic person's embedding
+#                 (read back from the upload's pixel marker) after an
+#                 optional simulated inference delay
+#
+# The vector store needs no fake: VECTOR_STORE=local is already in-process.
+# Numbers from this mode measure the API's own overhead (routing, auth,
+# decode, vector search, SQL shape), not Postgres or model latency.
+
+SCHEMA = [
+    """CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        first_name TEXT, last_name TEXT, phone TEXT,
+        role TEXT DEFAULT 'citizen',
+        profile_image TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        is_verified BOOLEAN DEFAULT FALSE
+    )""",
+    """CREATE TABLE persons (
+        final_person_id TEXT PRIMARY KEY,
+        name TEXT, sex TEXT, birth_year INT, state TEXT, district TEXT,
+        police_station TEXT, tracing_status TEXT, image_file TEXT,
+        reporter_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    "CREATE INDEX persons_created_at ON persons (created_at)",
+    """CREATE TABLE notifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER, title TEXT, message TEXT, type TEXT,
+        is_read BOOLEAN DEFAULT FALSE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE case_timeline (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        case_id TEXT, title TEXT, description TEXT, status TEXT,
+        event_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE potential_matches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        case_id TEXT, submitted_image TEXT, score FLOAT,
+        status TEXT DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        matched_case_id TEXT
+    )""",
+]
+
+_INTERVAL = re.compile(r"NOW\(\)\s*-\s*INTERVAL\s*'(\d+)\s+(\w+)'", re.I)
+_EXTRACT = re.compile(r"EXTRACT\(\s*(\w+)\s+FROM\s+(\w+)\s*\)", re.I)
+_EXTRACT_FIELDS = {"month": "%m", "year": "%Y", "day": "%d"}
+_TO_CHAR = {"Mon": "%b", "YYYY-MM-DD HH24:MI": "%Y-%m-%d %H:%M"}
+
+
+def _to_char(value, fmt):
+    if value is None:
+        return None
+    return datetime.fromisoformat(str(value)).strftime(_TO_CHAR.get(fmt, "%Y-%m-%d %H:%M:%S"))
+
+
+def translate(sql):
+    """Postgres dialect as used in main.py -> SQLite."""
+    sql = sql.replace("%s", "?")
+    sql = _INTERVAL.sub(lambda m: f"datetime('now', '-{m.group(1)} {m.group(2)}')", sql)
+    sql = _EXTRACT.sub(
+        lambda m: f"CAST(strftime('{_EXTRACT_FIELDS[m.group(1).lower()]}', {m.group(2)}) AS INTEGER)", sql)
+    return sql
+
+
+class FakeCursor:
+    """One cursor shared by every request, like db.cursor; results are kept
+    per thread so concurrent handlers do not read each other's rows."""
+
+    def __init__(self, db):
+        self._db = db
+        self._local = threading.local()
+
+    def execute(self, sql, params=None):
+        if isinstance(sql, bytes):
+            sql = sql.decode()
+        with self._db.lock:
+            cur = self._db.sqlite.execute(translate(sql), tuple(params or ()))
+            self._local.rows = cur.fetchall() if cur.description else []
+            self._local.rowcount = cur.rowcount
+            self._local.pos = 0
+
+    def executemany(self, sql, seq):
+        with self._db.lock:
+            self._db.sqlite.executemany(translate(sql), [tuple(p) for p in seq])
+
+    def fetchone(self):
+        rows, pos = getattr(self._local, "rows", []), getattr(self._local, "pos", 0)
+        if pos >= len(rows):
+            return None
+        self._local.pos = pos + 1
+        return rows[pos]
+
+    def fetchall(self):
+        rows, pos = getattr(self._local, "rows", []), getattr(self._local, "pos", 0)
+        self._local.pos = len(rows)
+        return rows[pos:]
+
+    @property
+    def rowcount(self):
+        return getattr(self._local, "rowcount", -1)
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.sqlite = sqlite3.connect(":memory:", check_same_thread=False)
+        self.sqlite.create_function("to_char", 2, _to_char)
+        self.lock = threading.RLock()
+        for statement in SCHEMA:
+            self.sqlite.execute(statement)
+        self.sqlite.commit()
+        self._cursor = FakeCursor(self)
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        with self.lock:
+            self.sqlite.commit()
+
+    def rollback(self):
+        with self.lock:
+            self.sqlite.rollback()
+
+    def close(self):
+        self.sqlite.close()
+
+
+class FakeML:
+    """ml_client interface. Synthetic uploads carry their person id in the
+    pixels (dataset.face_image); anything else gets a random embedding."""
+
+    def __init__(self, seed=0, delay_ms=0.0):
+        self.seed = seed
+        self.delay = delay_ms / 1000.0
+        self._rng = np.random.default_rng(seed + 1)
+        self._lock = threading.Lock()
+
+    def _vector(self, image):
+        person = dataset.read_marker(image)
+        with self._lock:
+            if person is None:
+                x = self._rng.standard_normal(dataset.VECTOR_SIZE).astype(np.float32)
+                return x / np.linalg.norm(x)
+            return dataset.photo_vectors(np.array([person]), self._rng, self.seed)[0]
+
+    def embed(self, image):
+        if self.delay:
+            time.sleep(self.delay)      # blocks like the real model call does
+        return self._vector(image)
+
+    def embed_faces(self, image):
+        from ml_client import DetectedFace
+
+        emb = self.embed(image)
+        h, w = np.asarray(image).shape[:2]
+        return [DetectedFace(np.array([w * 0.25, h * 0.2, w * 0.75, h * 0.8]), 0.9, emb)]
+
+    def embed_aligned(self, crops):
+        return [self.embed(c) for c in crops]
+
+    def warm_up(self):
+        pass
+
+    def status(self):
+        return {"state": "ready", "fake": True}
+
+    def close(self):
+        pass
@@ -0,0 +1,89 @@
+import time
+
+from benchmarks.loadtest import dataset
+
+# ======================
+# SEEDING
+# ======================
+# Loads a synthetic dataset into PostgreSQL (or FakeDatabase) and the vector
+# store the API reads from. Rows use FP_LT* case ids and vector ids 0..n-1,
+# so re-running is idempotent and never touches real cases.
+
+PERSON_COLUMNS = ("final_person_id", "name", "sex", "birth_year", "state", "district",
+                  "police_station", "tracing_status", "image_file", "created_at")
+NOTIFICATIONS_PER_USER = 25
+BATCH = 1000
+
+
+def insert_rows(conn, table, columns, rows):
+    cur = conn.cursor()
+    if hasattr(conn, "sqlite"):
+        # FakeDatabase
+        marks = ",".join(["%s"] * len(columns))
+        cur.executemany(f"INSERT INTO {table} ({','.join(columns)}) VALUES ({marks}) ON CONFLICT DO NOTHING", rows)
+    else:
+        from psycopg2.extras import execute_values
+
+        execute_values(cur, f"INSERT INTO {table} ({','.join(columns)}) VALUES %s ON CONFLICT DO NOTHING",
+                       rows, page_size=BATCH)
+    conn.commit()
+
+
+def ensure_persons_table(conn):
+    # same schema ingest_embeddings.py creates + the columns init_db adds
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS persons (
+            final_person_id VARCHAR PRIMARY KEY,
+            name TEXT, sex TEXT, birth_year INT, state TEXT, district TEXT,
+            police_station TEXT, tracing_status TEXT, image_file TEXT
+        )
+    """)
+    cur.execute("ALTER TABLE persons ADD COLUMN IF NOT EXISTS reporter_id INTEGER")
+    cur.execute("ALTER TABLE persons ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
+    conn.commit()
+
+
+def seeded_count(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM persons WHERE final_person_id LIKE %s", ("FP_LT%",))
+    return cur.fetchone()[0]
+
+
+def seed_persons(conn, n, seed=0):
+    if not hasattr(conn, "sqlite"):
+        ensure_persons_table(conn)
+    if seeded_count(conn) >= n:
+        return 0
+    for rows in dataset.persons(n, seed):
+        insert_rows(conn, "persons", PERSON_COLUMNS,
+                    [row[:-1] + (row[-1].isoformat(sep=" "),) for row in rows])
+    return n
+
+
+def seed_vectors(store, n, seed=0, batch=BATCH):
+    if store.count() >= n:
+        return 0
+    now = time.time()
+    for start, vectors in dataset.embeddings(n, seed):
+        for i in range(0, len(vectors), batch):
+            store.upsert([
+                {
+                    "id": start + i + j,
+                    "vector": v.tolist(),
+                    "payload": {"FinalPersonId": dataset.case_id(start + i + j), "ingested_at": now},
+                }
+                for j, v in enumerate(vectors[i:i + batch])
+            ])
+    return n
+
+
+def seed_notifications(conn, user_id, count=NOTIFICATIONS_PER_USER):
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM notifications WHERE user_id = %s", (user_id,))
+    if cur.fetchone()[0] >= count:
+        return 0
+    insert_rows(conn, "notifications", ("user_id", "title", "message", "type"), [
+        (user_id, "Case Update", f"Load-test notification {i}", "info") for i in range(count)
+    ])
+    return count
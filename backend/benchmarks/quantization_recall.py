@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_store import LocalVectorStore, VECTOR_SIZE
+
+# ======================
+# QUANTIZATION RECALL BENCHMARK
+# ======================
+# Compares exact float32 search with int8 scalar quantization + rescoring on
+# the same corpus and reports recall@k, recall of true hits above the /search
+# thresholds (0.60 / 0.75) and index memory.
+#
+#   python -m benchmarks.quantization_recall                     # synthetic
+#   python -m benchmarks.quantization_recall --points 200000 --oversampling 1 2 4
+#   python -m benchmarks.quantization_recall --store /app/visual_embed/local_index/missing_person_faces
+#   python -m benchmarks.quantization_recall --qdrant-url http://localhost:6333
+#
+# Synthetic faces: one random unit "identity" vector plus per-photo noise,
+# tuned so photos of the same person score ~0.6-0.8 (like buffalo_s pairs).
+
+THRESHOLDS = (0.60, 0.75)
+TOP_K = 5
+
+
+def synthetic_faces(n_points, n_queries, photos_per_person=4, noise=0.65, seed=0):
+    rng = np.random.default_rng(seed)
+    n_people = max(1, n_points // photos_per_person)
+    people = rng.standard_normal((n_people, VECTOR_SIZE)).astype(np.float32)
+    people /= np.linalg.norm(people, axis=1, keepdims=True)
+
+    def photos(owner):
+        # two photos of one person: cos ~ 1 / (1 + noise^2)
+        jitter = rng.standard_normal((len(owner), VECTOR_SIZE)).astype(np.float32) / np.sqrt(VECTOR_SIZE)
+        x = people[owner] + noise * jitter
+        return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+    corpus = photos(np.arange(n_points) % n_people)
+    queries = photos(rng.integers(0, n_people, n_queries))
+    return corpus, queries
+
+
+def load_store_vectors(path, n_queries, seed=0):
+    store = LocalVectorStore(path)
+    n = store.count()
+    corpus = np.asarray(store._vectors[:n])
+    store.close()
+    rng = np.random.default_rng(seed)
+    queries = corpus[rng.choice(n, size=min(n, n_queries), replace=False)]
+    return corpus, queries
+
+
+# ======================
+# METRICS
+# ======================
+def recall(exact, approx, k):
+    found = [len({h.id for h in e[:k]} & {h.id for h in a[:k]}) for e, a in zip(exact, approx)]
+    expected = [min(k, len(e)) for e in exact]
+    return sum(found) / max(1, sum(expected))
+
+
+def threshold_recall(exact, approx, threshold):
+    """Share of true hits >= threshold that quantized search also returns >= threshold."""
+    total = 0
+    kept = 0
+    for e, a in zip(exact, approx):
+        want = {h.id for h in e if h.score >= threshold}
+        got = {h.id for h in a if h.score >= threshold}
+        total += len(want)
+        kept += len(want & got)
+    return kept / total if total else None
+
+
+def timed_search(store, queries, k):
+    start = time.perf_counter()
+    results = [store.search(q, limit=k) for q in queries]
+    return results, (time.perf_counter() - start) / len(queries) * 1000
+
+
+# ======================
+# LOCAL INDEX
+# ======================
+def bench_local(corpus, queries, k, oversamplings):
+    rows = []
+    with tempfile.TemporaryDirectory() as root:
+        store = LocalVectorStore(root)
+        for start in range(0, len(corpus), 10_000):
+            chunk = corpus[start:start + 10_000]
+            store.upsert([
+                {"id": str(uuid.uuid4()), "vector": v, "payload": {}}
+                for v in chunk
+            ])
+
+        exact, exact_ms = timed_search(store, queries, k)
+        rows.append({
+            "engine": "local", "mode": "float32", "oversampling": None,
+            "recall_at_k": 1.0, "ms_per_query": round(exact_ms, 3),
+            "index_bytes": len(corpus) * VECTOR_SIZE * 4,
+        })
+
+        store.train_quantizer()
+        for oversampling in oversamplings:
+            store.oversampling = oversampling
+            approx, ms = timed_search(store, queries, k)
+            row = {
+                "engine": "local", "mode": "int8+rescore", "oversampling": oversampling,
+                "recall_at_k": round(recall(exact, approx, k), 4),
+                "ms_per_query": round(ms, 3),
+                # codes are what has to stay hot; originals are only read for the shortlist
+                "index_bytes": len(corpus) * VECTOR_SIZE,
+            }
+            for t in THRESHOLDS:
+                r = threshold_recall(exact, approx, t)
+                row[f"recall_at_{t:.2f}"] = None if r is None else round(r, 4)
+            rows.append(row)
+        store.close()
+    return rows
+
+
+# ======================
+# QDRANT
+# ======================
+def bench_qdrant(url, corpus, queries, k, oversamplings):
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import (
+        Distance, PointStruct, QuantizationSearchParams, SearchParams, VectorParams,
+    )
+    from create_qdrant_collection import quantization_config
+
+    client = QdrantClient(url=url)
+    rows = []
+    exact = None
+    for mode in ("none", "scalar", "product"):
+        collection = f"quantization_bench_{mode}"
+        client.recreate_collection(
+            collection_name=collection,
+            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE, on_disk=mode != "none"),
+            quantization_config=quantization_config(mode),
+        )
+        for start in range(0, len(corpus), 1000):
+            client.upsert(collection_name=collection, points=[
+                PointStruct(id=start + i, vector=v.tolist())
+                for i, v in enumerate(corpus[start:start + 1000])
+            ])
+
+        for oversampling in ([None] if mode == "none" else oversamplings):
+            params = SearchParams(exact=True) if mode == "none" else SearchParams(
+                quantization=QuantizationSearchParams(rescore=True, oversampling=oversampling)
+            )
+            start = time.perf_counter()
+            results = [
+                client.search(collection_name=collection, query_vector=q.tolist(), limit=k, search_params=params)
+                for q in queries
+            ]
+            ms = (time.perf_counter() - start) / len(queries) * 1000
+            if exact is None:
+                exact = results
+            row = {
+                "engine": "qdrant", "mode": mode, "oversampling": oversampling,
+                "recall_at_k": round(recall(exact, results, k), 4),
+                "ms_per_query": round(ms, 3),
+            }
+            for t in THRESHOLDS:
+                r = threshold_recall(exact, results, t)
+                row[f"recall_at_{t:.2f}"] = None if r is None else round(r, 4)
+            rows.append(row)
+        client.delete_collection(collection)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall / memory of quantized vs float32 face search")
+    parser.add_argument("--points", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[1.0, 2.0, 4.0])
+    parser.add_argument("--store", help="use the vectors of an existing local index instead of synthetic ones")
+    parser.add_argument("--qdrant-url", help="also benchmark Qdrant scalar / product quantization")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    if args.store:
+        corpus, queries = load_store_vectors(args.store, args.queries)
+    else:
+        corpus, queries = synthetic_faces(args.points, args.queries)
+    print(f"📦 {len(corpus)} vectors, {len(queries)} queries, k={args.k}")
+
+    rows = bench_local(corpus, queries, args.k, args.oversampling)
+    if args.qdrant_url:
+        rows += bench_qdrant(args.qdrant_url, corpus, queries, args.k, args.oversampling)
+
+    for row in rows:
+        print("  " + "  ".join(f"{k}={v}" for k, v in row.items()))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"points": len(corpus), "queries": len(queries), "k": args.k, "results": rows}, f, indent=2)
+        print(f"📁 Saved to: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
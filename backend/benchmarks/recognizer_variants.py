@@ -0,0 +1,128 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import load_recognizer
+
+# ======================
+# RECOGNIZER VARIANT COMPARISON
+# ======================
+# fp32 vs int8 recognizer on our own face crops:
+#   - latency per crop (batch 1 and batched) per variant / thread count
+#   - agreement: cosine(fp32, int8) of the same crop, nearest-neighbour
+#     agreement, and how many crop pairs flip across the 0.60 / 0.75 bars
+#
+#   python -m benchmarks.recognizer_variants --crops aligned_crops/
+#   python -m benchmarks.recognizer_variants --faces-csv faces_found.csv --images final_images
+#
+# --crops: aligned 112x112 images; --faces-csv: rows with FaceKps written by
+# download_image_new.py, aligned here with norm_crop.
+
+THRESHOLDS = (0.60, 0.75)
+
+
+def load_crops(args):
+    if args.crops:
+        names = sorted(os.listdir(args.crops))[:args.limit]
+        return [np.array(Image.open(os.path.join(args.crops, n)).convert("RGB").resize((112, 112))) for n in names]
+
+    from insightface.utils import face_align
+
+    crops = []
+    with open(args.faces_csv, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if len(crops) >= args.limit:
+                break
+            path = os.path.join(args.images, row["ImageFile"])
+            if not row.get("FaceKps") or not os.path.exists(path):
+                continue
+            img = np.array(Image.open(path).convert("RGB"))
+            kps = np.asarray(json.loads(row["FaceKps"]), dtype=np.float32)
+            crops.append(face_align.norm_crop(img, landmark=kps, image_size=112))
+    return crops
+
+
+def normalize(x):
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def embed(rec, crops, batch):
+    out = []
+    start = time.perf_counter()
+    for i in range(0, len(crops), batch):
+        out.append(rec.get_feat(crops[i:i + batch]))
+    per_crop_ms = (time.perf_counter() - start) / len(crops) * 1000
+    return normalize(np.concatenate(out)), per_crop_ms
+
+
+def agreement(ref, other):
+    same_crop = np.sum(ref * other, axis=1)
+    ref_sims = ref @ ref.T
+    other_sims = other @ other.T
+    np.fill_diagonal(ref_sims, -1)
+    np.fill_diagonal(other_sims, -1)
+    upper = np.triu_indices(len(ref), k=1)
+
+    row = {
+        "cos_mean": round(float(same_crop.mean()), 5),
+        "cos_min": round(float(same_crop.min()), 5),
+        "nn_agreement": round(float(np.mean(ref_sims.argmax(1) == other_sims.argmax(1))), 4),
+    }
+    for t in THRESHOLDS:
+        flips = (ref_sims[upper] >= t) != (other_sims[upper] >= t)
+        row[f"flips_at_{t:.2f}"] = int(flips.sum())
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fp32 vs int8 recognizer: accuracy and latency on face crops")
+    parser.add_argument("--crops", help="directory of aligned 112x112 face crops")
+    parser.add_argument("--faces-csv", default="faces_found.csv")
+    parser.add_argument("--images", default="final_images")
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    crops = load_crops(args)
+    if len(crops) < 2:
+        sys.exit("need at least two face crops")
+    print(f"📦 {len(crops)} face crops")
+
+    rows = []
+    reference = None
+    for threads in args.threads:
+        for variant in ("fp32", "int8"):
+            rec = load_recognizer(variant=variant, intra_threads=threads)
+            embed(rec, crops[:args.batch], args.batch)        # warm-up
+            emb, single_ms = embed(rec, crops, 1)
+            _, batched_ms = embed(rec, crops, args.batch)
+
+            if reference is None:
+                reference = emb
+            row = {
+                "variant": variant, "threads": threads,
+                "ms_per_crop_b1": round(single_ms, 3),
+                f"ms_per_crop_b{args.batch}": round(batched_ms, 3),
+                **agreement(reference, emb),
+            }
+            rows.append(row)
+            print("  " + "  ".join(f"{k}={v}" for k, v in row.items()))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"crops": len(crops), "results": rows}, f, indent=2)
+        print(f"📁 Saved to: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,102 @@
+import os
+
 BASE_DIR = "/app"
 
 FINAL_IMAGES_DIR = f"{BASE_DIR}/final_images"
 PEHCHAAN_DIR = f"{BASE_DIR}/pehchaan"
-VISUAL_EMBED_DIR = f"{BASE_DIR}/visual_embed"
\ No newline at end of file
+VISUAL_EMBED_DIR = os.getenv("VISUAL_EMBED_DIR", f"{BASE_DIR}/visual_embed")
+
+# Shared on-disk image cache used by the download / dedup pipeline scripts
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", f"{BASE_DIR}/image_cache")
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(20 * 1024**3)))  # 20 GB
+
+# "qdrant" (Docker service) or "local" (in-process index under VISUAL_EMBED_DIR)
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE", "qdrant")
+
+# none | scalar (int8) | product -- compressed vectors in RAM, originals rescored
+VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none")
+QUANTIZATION_OVERSAMPLING = float(os.getenv("QUANTIZATION_OVERSAMPLING", "2.0"))
+# keep original float32 vectors on disk (Qdrant on_disk) when quantized
+VECTORS_ON_DISK = os.getenv("VECTORS_ON_DISK", "0") == "1"
+
+# HNSW graph (applied by create_qdrant_collection.py)
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCT = int(os.getenv("HNSW_EF_CONSTRUCT", "100"))
+HNSW_FULL_SCAN_THRESHOLD = int(os.getenv("HNSW_FULL_SCAN_THRESHOLD", "10000"))  # KB of vectors
+# per-query candidate list for /search; callers may override within bounds.
+# Local IVF index: ef=128 probes 32 lists. On 60k synthetic faces that is
+# ~0.97 recall of the hits above 0.5 at ~1.8 ms (exact scan 15 ms); recall@5
+# including weak neighbours is lower (~0.83), raise ef where it matters
+SEARCH_HNSW_EF = int(os.getenv("SEARCH_HNSW_EF", "128"))
+SEARCH_HNSW_EF_MAX = int(os.getenv("SEARCH_HNSW_EF_MAX", "1024"))
+
+# /search score filtering (pushed into the vector store) and paging bounds
+SEARCH_MIN_SCORE = float(os.getenv("SEARCH_MIN_SCORE", "0.60"))
+SEARCH_MIN_SCORE_FLOOR = float(os.getenv("SEARCH_MIN_SCORE_FLOOR", "0.40"))  # lowest a client may ask for
+SEARCH_MAX_TOP = int(os.getenv("SEARCH_MAX_TOP", "50"))
+SEARCH_MAX_OFFSET = int(os.getenv("SEARCH_MAX_OFFSET", "200"))
+
+# Resized variants (thumbnails) of case photos served by /images
+IMAGE_VARIANT_FORMAT = os.getenv("IMAGE_VARIANT_FORMAT", "webp")     # webp | jpeg
+IMAGE_VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", "80"))
+IMAGE_VARIANT_MAX_AGE = int(os.getenv("IMAGE_VARIANT_MAX_AGE", str(30 * 24 * 3600)))
+
+# Photo uploads: streamed to disk in chunks, capped, decoded once (see preprocess.py)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(15 * 1024**2)))   # 15 MB
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Longest side images are decoded / resized to before face detection
+PREPROCESS_MAX_SIDE = int(os.getenv("PREPROCESS_MAX_SIDE", "640"))
+# /search?multi=true (group photos, CCTV frames): faces are small, so decode
+# larger or they fall under MIN_FACE_SIZE after the resize
+MULTI_FACE_MAX_SIDE = int(os.getenv("MULTI_FACE_MAX_SIDE", "1920"))
+
+# Face detection policy (face.py): detector input sizes tried in order,
+# minimum face box side in px, and which face answers single-face calls
+DETECTION_LADDER = tuple(int(s) for s in os.getenv("DETECTION_LADDER", "320,640").split(","))
+MIN_FACE_SIZE = int(os.getenv("MIN_FACE_SIZE", "40"))
+FACE_SELECTION = os.getenv("FACE_SELECTION", "largest")     # largest | score
+
+# ONNX Runtime (models.py): threads are split across uvicorn workers
+FACE_MODEL_NAME = os.getenv("FACE_MODEL_NAME", "buffalo_s")
+_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+ORT_INTRA_OP_THREADS = int(os.getenv("ORT_INTRA_OP_THREADS", str(max(1, (os.cpu_count() or 1) // _WORKERS))))
+ORT_INTER_OP_THREADS = int(os.getenv("ORT_INTER_OP_THREADS", "1"))
+ORT_MEM_ARENA = os.getenv("ORT_MEM_ARENA", "1") == "1"
+ORT_CACHE_DIR = os.getenv("ORT_CACHE_DIR", f"{BASE_DIR}/ort_cache")   # "" disables graph caching
+RECOGNIZER_VARIANT = os.getenv("RECOGNIZER_VARIANT", "fp32")         # fp32 | int8
+
+# Load the face models and run one dummy inference at startup (in the
+# background); 0 = load on the first /search instead (CRUD-only workers)
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+
+# Face models in-process ("") or in ml_service.py: http://host:port or unix:///path.sock
+ML_SERVICE_URL = os.getenv("ML_SERVICE_URL", "")
+ML_TIMEOUT = float(os.getenv("ML_TIMEOUT", "10"))
+ML_CONNECT_TIMEOUT = float(os.getenv("ML_CONNECT_TIMEOUT", "1"))
+ML_MAX_CONNECTIONS = int(os.getenv("ML_MAX_CONNECTIONS", "16"))
+
+# get_current_user cache: seconds a resolved token stays valid without a DB hit
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "30"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+# Password hashing (passwords.py): bcrypt cost, pool size and backpressure,
+# and the limits on failed login / register attempts
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "2"))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "16"))
+BCRYPT_QUEUE_TIMEOUT = float(os.getenv("BCRYPT_QUEUE_TIMEOUT", "2"))
+AUTH_RATE_LIMIT = int(os.getenv("AUTH_RATE_LIMIT", "10"))          # failures per account
+AUTH_IP_RATE_LIMIT = int(os.getenv("AUTH_IP_RATE_LIMIT", "50"))    # failures per client IP
+AUTH_RATE_WINDOW = float(os.getenv("AUTH_RATE_WINDOW", "60"))
+# reverse proxies whose X-Forwarded-For is believed (comma-separated IPs)
+TRUSTED_PROXIES = {ip.strip() for ip in os.getenv("TRUSTED_PROXIES", "").split(",") if ip.strip()}
+
+# Request tracing (tracing.py): OTLP/JSON lines file ("" disables export) and
+# the share of requests written; slower requests than SLOW_REQUEST_MS are
+# always written and get a sampled stack profile in PROFILE_DIR (0 disables)
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", f"{BASE_DIR}/profiles")
+PROFILE_INTERVAL_MS = int(os.getenv("PROFILE_INTERVAL_MS", "10"))
@@ -1,19 +1,77 @@
+import os
+
 from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance
+from qdrant_client.models import (
+    VectorParams,
+    Distance,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    ProductQuantization,
+    ProductQuantizationConfig,
+    CompressionRatio,
+    Disabled,
+    HnswConfigDiff,
+    VectorParamsDiff,
+)
+
+from config import (
+    VECTOR_QUANTIZATION,
+    VECTORS_ON_DISK,
+    HNSW_M,
+    HNSW_EF_CONSTRUCT,
+    HNSW_FULL_SCAN_THRESHOLD,
+)
 
 QDRANT_COLLECTION = "missing_person_faces"
 
-qdrant = QdrantClient(url="http://qdrant:6333")
+qdrant = QdrantClient(url=os.getenv("QDRANT_URL", "http://qdrant:6333"))
+
+
+def quantization_config(mode=VECTOR_QUANTIZATION):
+    """Compressed copy kept in RAM; originals are used for rescoring."""
+    if mode == "scalar":
+        # int8: 4x smaller, 0.99 quantile clips outliers before bucketing
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if mode == "product":
+        # 16x smaller, lower recall -> rely on oversampling + rescore
+        return ProductQuantization(
+            product=ProductQuantizationConfig(compression=CompressionRatio.X16, always_ram=True)
+        )
+    return None
+
+
+def hnsw_config(m=HNSW_M, ef_construct=HNSW_EF_CONSTRUCT, full_scan_threshold=HNSW_FULL_SCAN_THRESHOLD):
+    """Higher m / ef_construct: better recall, more memory and slower indexing."""
+    return HnswConfigDiff(m=m, ef_construct=ef_construct, full_scan_threshold=full_scan_threshold)
 
-# ✅ Ensure collection exists
-if QDRANT_COLLECTION not in [c.name for c in qdrant.get_collections().collections]:
-    qdrant.create_collection(
-        collection_name=QDRANT_COLLECTION,
-        vectors_config=VectorParams(
-            size=512,              # 🔥 MUST MATCH EMBEDDING SIZE
-            distance=Distance.COSINE
+
+if __name__ == "__main__":
+    # ✅ Ensure collection exists
+    if QDRANT_COLLECTION not in [c.name for c in qdrant.get_collections().collections]:
+        qdrant.create_collection(
+            collection_name=QDRANT_COLLECTION,
+            vectors_config=VectorParams(
+                size=512,              # 🔥 MUST MATCH EMBEDDING SIZE
+                distance=Distance.COSINE,
+                on_disk=VECTORS_ON_DISK,
+            ),
+            hnsw_config=hnsw_config(),
+            quantization_config=quantization_config(),
+        )
+        print(f"✅ Qdrant collection '{QDRANT_COLLECTION}' created")
+    else:
+        # existing collections are updated in place; Qdrant rebuilds in the background.
+        # None would leave the current quantization alone, so "none" disables it explicitly
+        qdrant.update_collection(
+            collection_name=QDRANT_COLLECTION,
+            vectors_config={"": VectorParamsDiff(on_disk=VECTORS_ON_DISK)},
+            hnsw_config=hnsw_config(),
+            quantization_config=quantization_config() or Disabled.DISABLED,
         )
-    )
-    print(f"✅ Qdrant collection '{QDRANT_COLLECTION}' created")
-else:
-    print(f"ℹ️ Qdrant collection '{QDRANT_COLLECTION}' already exists")
+        print(f"ℹ️ Qdrant collection '{QDRANT_COLLECTION}' already exists, config updated")
+    print(f"   hnsw m={HNSW_M} ef_construct={HNSW_EF_CONSTRUCT} "
+          f"full_scan_threshold={HNSW_FULL_SCAN_THRESHOLD} quantization={VECTOR_QUANTIZATION} "
+          f"on_disk={VECTORS_ON_DISK}")
@@ -1,3 +1,4 @@
+import argparse
 import pandas as pd
 import uuid
 
@@ -5,7 +6,10 @@ import uuid
 # CONFIG
 # ======================
 INPUT_CSV = "zipnet_all_missing_persons_1.csv"
-OUTPUT_CSV = "zipnet_final_clean_data.csv"
+OUTPUT_CSV = "zipnet_final_clean_data.csv"   # use a .parquet path for parquet output
+
+# rows per chunk in streaming mode (0 = load the whole file at once)
+CHUNK_SIZE = 0
 
 REQUIRED_COLUMNS = [
     "FinalPersonId",
@@ -20,87 +24,171 @@ REQUIRED_COLUMNS = [
     "ImageUrls"
 ]
 
-# ======================
-# LOAD CSV
-# ======================
-df = pd.read_csv(INPUT_CSV)
-
-print("📥 Original rows:", len(df))
-
 # ======================
 # CLEAN ImageUrls
 # ======================
-df["ImageUrls"] = df["ImageUrls"].astype(str).str.strip()
-
-def extract_urls(val):
+def explode_urls(image_urls):
     """
-    Convert:
-    []  -> []
-    ['a.jpg','b.jpg'] -> ['a.jpg','b.jpg']
-    a.jpg;b.jpg -> ['a.jpg','b.jpg']
+    One row per (source row, url), source index preserved:
+    []  -> (dropped)
+    ['a.jpg','b.jpg'] -> a.jpg, b.jpg
+    a.jpg;b.jpg -> a.jpg, b.jpg
     """
-    val = val.replace("[", "").replace("]", "").replace("'", "")
-    if not val.strip():
-        return []
-    return [u.strip() for u in val.replace(";", ",").split(",") if u.strip()]
-
-df["ImageList"] = df["ImageUrls"].apply(extract_urls)
-
-# ======================
-# REMOVE ROWS WITH NO IMAGES
-# ======================
-df = df[df["ImageList"].apply(len) > 0]
-
-print("🧹 Rows after removing empty images:", len(df))
+    urls = (
+        image_urls.fillna("").astype(str)
+        .str.replace(r"[\[\]']", "", regex=True)
+        .str.replace(";", ",", regex=False)
+        .str.split(",")
+        .explode()
+        .str.strip()
+    )
+    return urls[urls.notna() & (urls != "")]
 
 # ======================
 # GLOBAL IMAGE-LEVEL DEDUP
 # ======================
-seen_images = set()
-rows_to_keep = []
-
-for _, row in df.iterrows():
-    unique_images = []
-
-    for img in row["ImageList"]:
-        if img not in seen_images:
-            seen_images.add(img)
-            unique_images.append(img)
-
-    if unique_images:
-        row["ImageUrls"] = ";".join(unique_images)
-        rows_to_keep.append(row)
-
-df = pd.DataFrame(rows_to_keep)
-
-print("🖼️ Unique images kept:", len(seen_images))
-print("👤 Rows after image dedup:", len(df))
-
-# ======================
-# ASSIGN UNIQUE FinalPersonId
+def dedup_images(df, seen_images):
+    """
+    Keep the first occurrence of every image URL across the whole dataset
+    (seen_images carries URLs from earlier chunks) and drop rows left with
+    no images. Returns the filtered frame and the number of rows that had
+    at least one image before dedup.
+    """
+    urls = explode_urls(df["ImageUrls"])
+    rows_with_images = urls.index.nunique()
+
+    keep = ~urls.duplicated(keep="first")
+    if seen_images:
+        keep &= ~urls.isin(seen_images)
+    urls = urls[keep]
+    seen_images.update(urls.tolist())
+
+    # regroup in original row order
+    joined = urls.groupby(level=0, sort=False).agg(";".join)
+    df = df.loc[joined.index].copy()
+    df["ImageUrls"] = joined
+    return df, rows_with_images
+
+# ======================
+# FINAL SHAPE
 # ======================
-df["FinalPersonId"] = [
-    f"FP_{uuid.uuid4().hex[:12]}"
-    for _ in range(len(df))
-]
+def finalize(df):
+    # ASSIGN UNIQUE FinalPersonId
+    df["FinalPersonId"] = [
+        f"FP_{uuid.uuid4().hex[:12]}"
+        for _ in range(len(df))
+    ]
+
+    # OPTIONAL CLEANUPS
+    if "Sex" in df.columns:
+        df["Sex"] = df["Sex"].astype(str).str.title()
+    if "BirthYear" in df.columns:
+        df["BirthYear"] = pd.to_numeric(df["BirthYear"], errors="coerce").astype("float64")
 
-# ======================
-# OPTIONAL CLEANUPS
-# ======================
-df["Sex"] = df["Sex"].astype(str).str.title()
-df["BirthYear"] = pd.to_numeric(df["BirthYear"], errors="coerce")
+    # KEEP ONLY REQUIRED COLUMNS (fixed dtypes so parquet chunks share a schema)
+    df = df[[c for c in REQUIRED_COLUMNS if c in df.columns]]
+    return df.astype({c: "string" for c in df.columns if c != "BirthYear"})
+
+# ======================
+# READERS / WRITERS
+# ======================
+def require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise SystemExit("❌ .parquet input/output needs pyarrow: pip install pyarrow (or use a .csv path)")
+
+
+def read_input(path, chunk_size):
+    if path.endswith(".parquet"):
+        require_pyarrow()
+        # parquet is already columnar; chunking would not save much here
+        yield pd.read_parquet(path)
+        return
+    if path.endswith(".jsonl"):
+        # the scraper's append-only log can be filtered without an export
+        reader = pd.read_json(path, lines=True, chunksize=chunk_size or None, dtype=False)
+    else:
+        reader = pd.read_csv(path, chunksize=chunk_size or None)
+
+    if chunk_size:
+        yield from reader
+    else:
+        yield reader
+
+
+class OutputWriter:
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        if self.parquet:
+            require_pyarrow()   # fail before any filtering work, not at the first write
+        self._writer = None
+        self._first = True
+
+    def write(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, index=False, mode="w" if self._first else "a", header=self._first)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+# ======================
+# RUN
+# ======================
+def main(input_path, output_path, chunk_size):
+    seen_images = set()
+    writer = OutputWriter(output_path)
+
+    total_rows = 0
+    rows_with_images = 0
+    final_rows = 0
+    final_ids = set()
+
+    for chunk in read_input(input_path, chunk_size):
+        # source row positions must be unique for the explode/regroup
+        chunk.index = pd.RangeIndex(total_rows, total_rows + len(chunk))
+        total_rows += len(chunk)
+
+        chunk, with_images = dedup_images(chunk, seen_images)
+        rows_with_images += with_images
+
+        chunk = finalize(chunk)
+        final_rows += len(chunk)
+        final_ids.update(chunk["FinalPersonId"])
 
-# ======================
-# KEEP ONLY REQUIRED COLUMNS
-# ======================
-df = df[[c for c in REQUIRED_COLUMNS if c in df.columns]]
+        writer.write(chunk)
+
+    writer.close()
+
+    print("📥 Original rows:", total_rows)
+    print("🧹 Rows after removing empty images:", rows_with_images)
+    print("🖼️ Unique images kept:", len(seen_images))
+    print("👤 Rows after image dedup:", final_rows)
+
+    print("\n🎉 DONE")
+    print("👤 Final unique persons:", final_rows)
+    print("🆔 Unique FinalPersonId:", len(final_ids))
+    print("📁 Saved to:", output_path)
 
-# ======================
-# SAVE FINAL CSV
-# ======================
-df.to_csv(OUTPUT_CSV, index=False)
 
-print("\n🎉 DONE")
-print("👤 Final unique persons:", len(df))
-print("🆔 Unique FinalPersonId:", df["FinalPersonId"].nunique())
-print("📁 Saved to:", OUTPUT_CSV)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean + image-level dedup of the Zipnet export")
+    parser.add_argument("--input", default=INPUT_CSV, help=".csv, .jsonl (scraper log) or .parquet")
+    parser.add_argument("--output", default=OUTPUT_CSV, help=".csv or .parquet")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE,
+                        help="stream the input in chunks of this many rows")
+    args = parser.parse_args()
+
+    main(args.input, args.output, args.chunksize)
@@ -1,16 +1,69 @@
+import os
+import re
+
 from qdrant_client import QdrantClient
 import psycopg2
 
+from lazy import LazyResource
+from metrics import SQL_SECONDS, DB_IN_FLIGHT, DB_POOL_SIZE
+from tracing import span, SPAN_KIND_CLIENT
+from vector_store import make_vector_store
+
+# All clients connect on first use (see lazy.py); importing db is free.
+
 # Qdrant (Docker service name)
-qdrant = QdrantClient(url="http://qdrant:6333")
+qdrant = LazyResource("qdrant", lambda: QdrantClient(url=os.getenv("QDRANT_URL", "http://qdrant:6333")))
 QDRANT_COLLECTION = "missing_person_faces"
 
+# Qdrant or the in-process local index, depending on VECTOR_STORE
+vector_store = LazyResource("vector_store", lambda: make_vector_store(QDRANT_COLLECTION, qdrant.get()))
+
 # PostgreSQL (Docker service name)
-conn = psycopg2.connect(
+conn = LazyResource("database", lambda: psycopg2.connect(
     dbname="faces_db",
     user="postgres",
     password="postgres",
     host="postgres",
     port=5432
-)
-cursor = conn.cursor()
\ No newline at end of file
+))
+
+
+# ----------------------
+# QUERY TIMING
+# ----------------------
+_QUERY_VERB = re.compile(r"^\s*(\w+)")
+_QUERY_TABLE = re.compile(r"\b(?:from|into|update|table(?:\s+if\s+not\s+exists)?)\s+([a-z_][\w.]*)", re.I)
+
+
+def query_name(sql):
+    """Stable low-cardinality label: verb + first table, e.g. select_users."""
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    verb = _QUERY_VERB.match(sql)
+    table = _QUERY_TABLE.search(sql)
+    name = verb.group(1).lower() if verb else "query"
+    return f"{name}_{table.group(1).lower()}" if table else name
+
+
+class InstrumentedCursor:
+    """psycopg2 cursor that records per-query latency and a span; everything else is forwarded."""
+
+    def __init__(self, cur):
+        self._cur = cur
+
+    def execute(self, sql, params=None):
+        name = query_name(sql)
+        with span(f"sql {name}", SPAN_KIND_CLIENT, **{"db.system": "postgresql", "db.operation": name}), \
+                DB_IN_FLIGHT.track_inprogress(), SQL_SECONDS.time(query=name):
+            return self._cur.execute(sql, params)
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+# one shared connection per worker
+DB_POOL_SIZE.set(1)
+cursor = LazyResource("cursor", lambda: InstrumentedCursor(conn.get().cursor()))
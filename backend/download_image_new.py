@@ -1,8 +1,6 @@
 import csv
-import requests
+import json
 import numpy as np
-from io import BytesIO
-from PIL import Image
 from insightface.app import FaceAnalysis
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from collections import defaultdict
@@ -10,6 +8,8 @@ import hashlib
 import os
 from tqdm import tqdm
 
+from image_cache import ImageCache
+
 # ======================
 # CONFIG
 # ======================
@@ -36,10 +36,14 @@ STOP_PERSON_INDEX = 12_000  # exclusive
 
 os.makedirs(IMAGE_DIR, exist_ok=True)
 
+# downloads are shared with the dedup scripts -> re-runs hit disk, not Zipnet
+image_cache = ImageCache(timeout=IMAGE_TIMEOUT)
+
 # ======================
 # INIT INSIGHTFACE
 # ======================
-app = FaceAnalysis(name=MODEL_NAME)
+# detection only: embeddings are computed at ingest from the persisted landmarks
+app = FaceAnalysis(name=MODEL_NAME, allowed_modules=["detection"])
 app.prepare(ctx_id=-1, det_size=(640, 640))
 
 # ======================
@@ -52,18 +56,27 @@ def new_identity_id(seed):
     return "FP_" + hashlib.md5(seed.encode()).hexdigest()[:12]
 
 def download_image(url):
-    r = requests.get(url, timeout=IMAGE_TIMEOUT)
-    r.raise_for_status()
-    return Image.open(BytesIO(r.content)).convert("RGB")
+    return image_cache.open_image(url)
 
-def face_is_valid(img):
+def detect_valid_face(img):
+    """Largest face if it is big enough, else None."""
     faces = app.get(np.array(img))
     if not faces:
-        return False
-    f = faces[0]
+        return None
+    f = max(faces, key=lambda f: (f.bbox[2] - f.bbox[0]) * (f.bbox[3] - f.bbox[1]))
     w = f.bbox[2] - f.bbox[0]
     h = f.bbox[3] - f.bbox[1]
-    return w >= MIN_FACE_SIZE and h >= MIN_FACE_SIZE
+    if w >= MIN_FACE_SIZE and h >= MIN_FACE_SIZE:
+        return f
+    return None
+
+def detection_columns(face):
+    # pixel coordinates in the saved image -> ingest can skip detection
+    return {
+        "FaceBBox": json.dumps([round(float(v), 2) for v in face.bbox]),
+        "FaceKps": json.dumps([[round(float(x), 2), round(float(y), 2)] for x, y in face.kps]),
+        "DetScore": round(float(face.det_score), 4),
+    }
 
 def load_checkpoint():
     done = set()
@@ -93,14 +106,21 @@ def write_checkpoint(row):
 # ======================
 # LOAD INPUT CSV
 # ======================
+def read_input_rows(path):
+    # data_filter.py can write parquet -> no CSV re-parse here
+    if path.endswith(".parquet"):
+        import pandas as pd
+        df = pd.read_parquet(path)
+        return df.astype(object).where(df.notna(), "").to_dict("records")
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
 rows = []
-with open(INPUT_CSV, newline="", encoding="utf-8") as f:
-    reader = csv.DictReader(f)
-    for r in reader:
-        r["ImageUrls"] = [
-            u.strip() for u in r["ImageUrls"].split(";") if u.strip()
-        ]
-        rows.append(r)
+for r in read_input_rows(INPUT_CSV):
+    r["ImageUrls"] = [
+        u.strip() for u in str(r["ImageUrls"]).split(";") if u.strip()
+    ]
+    rows.append(r)
 
 print(f"📥 Rows loaded: {len(rows)}")
 
@@ -168,7 +188,8 @@ for idx in tqdm(
             try:
                 img = future.result()
 
-                if face_is_valid(img):
+                face = detect_valid_face(img)
+                if face is not None:
                     img.save(
                         os.path.join(IMAGE_DIR, f"{final_person_id}.jpg")
                     )
@@ -182,7 +203,8 @@ for idx in tqdm(
                         "District": record.get("District", ""),
                         "PoliceStation": record.get("PoliceStation", ""),
                         "TracingStatus": record.get("TracingStatus", ""),
-                        "ImageFile": f"{final_person_id}.jpg"
+                        "ImageFile": f"{final_person_id}.jpg",
+                        **detection_columns(face)
                     })
 
                     write_checkpoint({
@@ -229,10 +251,11 @@ for idx in tqdm(
 FOUND_FIELDS = [
     "FinalPersonId", "Name", "Sex", "BirthYear",
     "State", "District", "PoliceStation",
-    "TracingStatus", "ImageFile"
+    "TracingStatus", "ImageFile",
+    "FaceBBox", "FaceKps", "DetScore"
 ]
 
-NOT_FOUND_FIELDS = FOUND_FIELDS[:-1] + ["Reason"]
+NOT_FOUND_FIELDS = FOUND_FIELDS[:-4] + ["Reason"]
 
 with open(FACE_FOUND_CSV, "w", newline="", encoding="utf-8") as f:
     writer = csv.DictWriter(f, fieldnames=FOUND_FIELDS)
@@ -252,3 +275,4 @@ print("🧮 Images downloaded:", face_count)
 print("🖼️ Images folder:", IMAGE_DIR)
 print("📄 CSVs:", FACE_FOUND_CSV, "&", FACE_NOT_FOUND_CSV)
 print("🔁 Resume file:", PROGRESS_CSV)
+print(f"💾 Image cache: {image_cache.hits} hits / {image_cache.misses} downloads")
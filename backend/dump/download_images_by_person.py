@@ -1,14 +1,13 @@
 import csv
-import requests
+import sys
 import numpy as np
-from io import BytesIO
-from PIL import Image
 from insightface.app import FaceAnalysis
-from sklearn.metrics.pairwise import cosine_similarity
 from collections import defaultdict
-import hashlib
 import os
-from tqdm import tqdm
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from image_cache import ImageCache
+from identity_resolver import resolve_groups, OUTPUT_FIELDS
 
 # ======================
 # CONFIG
@@ -18,9 +17,14 @@ OUTPUT_CSV = "zipnet_filter_data.csv"
 
 SIMILARITY_THRESHOLD = 0.92
 IMAGE_TIMEOUT = 10
-IMAGE_DIR = "downloaded_images"
 
-os.makedirs(IMAGE_DIR, exist_ok=True)
+# also merge the same face filed under different Zipnet records
+CROSS_GROUP = False
+ANN_BACKEND = "local"     # cross-group index: "local" (exact, in-memory) or "qdrant"
+QDRANT_URL = "http://localhost:6333"
+
+# reuse anything the old md5-of-URL cache already downloaded
+image_cache = ImageCache(timeout=IMAGE_TIMEOUT, legacy_dir="downloaded_images")
 
 # ======================
 # INIT FACE MODEL
@@ -31,22 +35,8 @@ app.prepare(ctx_id=-1, det_size=(640, 640))
 # ======================
 # HELPERS (IMAGE CACHE)
 # ======================
-def image_filename_from_url(url):
-    return hashlib.md5(url.encode()).hexdigest() + ".jpg"
-
 def download_image_local(url):
-    filename = image_filename_from_url(url)
-    filepath = os.path.join(IMAGE_DIR, filename)
-
-    if os.path.exists(filepath):
-        return Image.open(filepath).convert("RGB")
-
-    r = requests.get(url, timeout=IMAGE_TIMEOUT)
-    r.raise_for_status()
-
-    img = Image.open(BytesIO(r.content)).convert("RGB")
-    img.save(filepath)
-    return img
+    return image_cache.open_image(url)
 
 def get_embedding(img):
     faces = app.get(np.array(img))
@@ -54,9 +44,6 @@ def get_embedding(img):
         return None
     return faces[0].embedding
 
-def new_identity_id(seed):
-    return hashlib.md5(seed.encode()).hexdigest()
-
 # ======================
 # LOAD CSV
 # ======================
@@ -82,95 +69,25 @@ for r in rows:
 
 print(f"👥 Metadata groups found: {len(groups)}")
 
-final_rows = []
-
 # ======================
 # FACE-LEVEL DEDUP
 # ======================
-for person_key in tqdm(groups, desc="🔍 Resolving identities", unit="group"):
-    records = groups[person_key]
-    identities = []
-
-    for record in records:
-        for img_url in record["ImageUrls"]:
-            try:
-                img = download_image_local(img_url)
-                emb = get_embedding(img)
-
-                if emb is None:
-                    continue
-
-                matched = False
-
-                for identity in identities:
-                    sim = cosine_similarity(
-                        [emb], [identity["embedding"]]
-                    )[0][0]
-
-                    if sim >= SIMILARITY_THRESHOLD:
-                        identity["records"].append(record)
-                        identity["images"].add(img_url)
-                        matched = True
-                        break
-
-                if not matched:
-                    identities.append({
-                        "embedding": emb,
-                        "records": [record],
-                        "images": {img_url}
-                    })
-
-            except Exception:
-                continue
-
-    # ======================
-    # FLATTEN IDENTITIES
-    # ======================
-    for idx, identity in enumerate(identities):
-        sample = identity["records"][0]
-
-        final_rows.append({
-            "FinalPersonId": new_identity_id(person_key + str(idx)),
-            "Name": sample["Name"],
-            "Sex": sample["Sex"],
-            "BirthYear": sample["BirthYear"],
-            "State": sample["State"],
-            "District": sample["District"],
-            "PoliceStation": sample["PoliceStation"],
-            "TracingStatus": sample["TracingStatus"],
-            "SourceMissingPersonIds": ";".join(
-                sorted(set(
-                    pid
-                    for r in identity["records"]
-                    for pid in r["SourceMissingPersonIds"].split(";")
-                ))
-            ),
-            "ImageUrls": ";".join(sorted(identity["images"]))
-        })
+def embed_url(url):
+    return get_embedding(download_image_local(url))
+
+# CROSS_GROUP shares one identity index across all metadata groups
+final_rows = resolve_groups(groups, embed_url, SIMILARITY_THRESHOLD, cross_group=CROSS_GROUP,
+                            backend=ANN_BACKEND, qdrant_url=QDRANT_URL)
 
 # ======================
 # SAVE FINAL CSV
 # ======================
 with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(
-        f,
-        fieldnames=[
-            "FinalPersonId",
-            "Name",
-            "Sex",
-            "BirthYear",
-            "State",
-            "District",
-            "PoliceStation",
-            "TracingStatus",
-            "SourceMissingPersonIds",
-            "ImageUrls"
-        ]
-    )
+    writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
     writer.writeheader()
     writer.writerows(final_rows)
 
 print("\n🎉 DONE")
 print("👤 Unique persons (face-verified):", len(final_rows))
 print("📁 Saved to:", OUTPUT_CSV)
-print("🖼️ Images cached in:", IMAGE_DIR)
+print("🖼️ Images cached in:", image_cache.root)
@@ -1,13 +1,134 @@
 import numpy as np
 from PIL import Image
-from insightface.app import FaceAnalysis
+from insightface.app.common import Face
+from insightface.utils import face_align
 
-app = FaceAnalysis(name="buffalo_s")
-app.prepare(ctx_id=-1, det_size=(640, 640))
+from config import DETECTION_LADDER, MIN_FACE_SIZE, FACE_SELECTION
+from lazy import LazyResource
+from metrics import FACE_STAGE_SECONDS
+from tracing import span
+from models import load_face_models
+from preprocess import to_array
 
-def get_embedding(image: Image.Image):
-    faces = app.get(np.array(image))
+# only detection + recognition are used (tuned ORT sessions, see models.py);
+# loaded on first use or by warm_up() at startup
+face_models = LazyResource("face_model", load_face_models)
+
+
+def warm_up():
+    """Load the models and run one dummy inference so the first request is not slow."""
+    det_model, rec_model = face_models.get()
+    det_model.detect(np.zeros((DETECTION_LADDER[-1], DETECTION_LADDER[-1], 3), dtype=np.uint8), max_num=0)
+    rec_model.get_feat([np.zeros((112, 112, 3), dtype=np.uint8)])
+
+# ======================
+# DETECTION POLICY
+# ======================
+# Size ladder: detect at the smallest input first (passport-style crops are
+# found at 320) and escalate only when nothing usable is found. Faces
+# smaller than MIN_FACE_SIZE px are dropped, then one face is picked by
+# FACE_SELECTION ("largest" box or highest detector "score") instead of
+# whatever the detector listed first.
+
+def _face_size(face):
+    x1, y1, x2, y2 = face.bbox
+    return min(x2 - x1, y2 - y1)
+
+
+def detect_faces(image, ladder=DETECTION_LADDER, min_face_size=MIN_FACE_SIZE):
+    """All faces >= min_face_size, from the first ladder size that finds any. Largest first."""
+    det_model, _ = face_models.get()
+    img = to_array(image)
+    for size in ladder:
+        with span("face.detect", det_size=size), FACE_STAGE_SECONDS.time(stage="detect"):
+            bboxes, kpss = det_model.detect(img, input_size=(size, size), max_num=0)
+        faces = [
+            Face(bbox=b[:4], kps=k, det_score=b[4])
+            for b, k in zip(bboxes, kpss if kpss is not None else [None] * len(bboxes))
+        ]
+        faces = [f for f in faces if _face_size(f) >= min_face_size]
+        if faces:
+            return sorted(faces, key=_face_size, reverse=True)
+    return []
+
+
+def select_face(faces, policy=FACE_SELECTION):
     if not faces:
         return None
-    return faces[0].embedding
+    if policy == "score":
+        return max(faces, key=lambda f: f.det_score)
+    return max(faces, key=_face_size)
+
+
+def embed_faces(img, faces):
+    """One batched recognizer run for all faces; sets face.embedding."""
+    if not faces:
+        return faces
+    _, rec_model = face_models.get()
+    size = rec_model.input_size[0]
+    crops = [face_align.norm_crop(img, landmark=f.kps, image_size=size) for f in faces]
+    with span("face.embed", faces=len(crops)), FACE_STAGE_SECONDS.time(stage="embed"):
+        embeddings = rec_model.get_feat(crops)
+    for face, emb in zip(faces, embeddings):
+        face.embedding = emb
+    return faces
+
+
+# ======================
+# RECOGNITION ONLY
+# ======================
+# For faces that were already detected (downloader / ingest pipeline): no
+# detector run, just alignment + the recognition model.
+
+def embed_aligned(crops):
+    """Embeddings for aligned 112x112 RGB crops (as face_align.norm_crop produces)."""
+    _, rec_model = face_models.get()
+    with span("face.embed", faces=len(crops)), FACE_STAGE_SECONDS.time(stage="embed"):
+        return list(rec_model.get_feat([np.asarray(c) for c in crops]))
+
+
+def embed_detected(image, kps=None, bbox=None):
+    """
+    Embedding of a known face. kps: 5 landmarks in image pixels (preferred).
+    With only a bbox, landmarks come from one small detector pass over the
+    padded box instead of the whole image.
+    """
+    img = to_array(image)
+    if kps is None:
+        if bbox is None:
+            raise ValueError("embed_detected needs kps or bbox")
+        x1, y1, x2, y2 = [float(v) for v in bbox]
+        pad = 0.25 * max(x2 - x1, y2 - y1)
+        cx1, cy1 = max(0, int(x1 - pad)), max(0, int(y1 - pad))
+        cx2, cy2 = min(img.shape[1], int(x2 + pad)), min(img.shape[0], int(y2 + pad))
+        region = np.ascontiguousarray(img[cy1:cy2, cx1:cx2])
+        face = select_face(detect_faces(region, ladder=DETECTION_LADDER[:1], min_face_size=0))
+        if face is None:
+            return None
+        kps = face.kps + np.array([cx1, cy1], dtype=np.float32)
+
+    _, rec_model = face_models.get()
+    crop = face_align.norm_crop(img, landmark=np.asarray(kps, dtype=np.float32),
+                                image_size=rec_model.input_size[0])
+    with span("face.embed", faces=1), FACE_STAGE_SECONDS.time(stage="embed"):
+        return rec_model.get_feat([crop])[0]
+
+
+def get_faces(image: Image.Image):
+    """Every usable face with its embedding (largest first)."""
+    img = to_array(image)
+    return embed_faces(img, detect_faces(img))
+
 
+def get_embedding(image: Image.Image, policy=FACE_SELECTION):
+    # image comes from preprocess.decode (already at detection resolution)
+    with span("face.get_embedding") as s:
+        img = to_array(image)
+        face = select_face(detect_faces(img), policy)
+        if s is not None:
+            s.set("face.found", face is not None)
+        if face is None:
+            return None
+        _, rec_model = face_models.get()
+        with span("face.embed", faces=1), FACE_STAGE_SECONDS.time(stage="embed"):
+            return rec_model.get(img, face)
@@ -0,0 +1,291 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from psycopg2.extras import execute_values
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    IsEmptyCondition,
+    PayloadField,
+    PayloadSchemaType,
+    Range,
+    SearchRequest,
+)
+from tqdm import tqdm
+
+from config import VISUAL_EMBED_DIR, VECTOR_STORE_BACKEND
+from db import qdrant, conn, cursor, QDRANT_COLLECTION
+
+# ======================
+# CONFIG
+# ======================
+# Collection-wide duplicate-case detection. Every point added since the last
+# run is matched against the whole collection (approximate kNN); pairs of
+# different cases scoring above the threshold land in potential_matches for
+# admin review.
+#
+#   python find_duplicate_cases.py                  # incremental, Qdrant search_batch
+#   python find_duplicate_cases.py --engine local   # memory-mapped matmul engine
+#   python find_duplicate_cases.py --full           # rescan everything
+#
+# New points are read from the Qdrant collection (scroll + payload index on
+# ingested_at) whichever --engine is used, so this job refuses to run with
+# VECTOR_STORE=local.
+
+DUPLICATE_THRESHOLD = 0.75    # same bar as the high-confidence /search alert
+TOP_K = 10
+BATCH_SIZE = 256              # query points per search_batch / matmul
+BLOCK_ROWS = 65536            # corpus rows per matmul block (local engine)
+VECTOR_SIZE = 512
+
+STATE_DIR = os.path.join(VISUAL_EMBED_DIR, "duplicate_scan")
+STATE_FILE = os.path.join(STATE_DIR, "state.json")
+LOCAL_VECTORS = os.path.join(STATE_DIR, "vectors.f32")
+LOCAL_IDS = os.path.join(STATE_DIR, "ids.jsonl")
+
+INGESTED_AT = "ingested_at"   # payload field written on every upsert
+
+# ======================
+# STATE
+# ======================
+def load_state():
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"watermark": None, "engine": None}
+
+def save_state(state):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, STATE_FILE)
+
+def ensure_schema():
+    cursor.execute("ALTER TABLE potential_matches ADD COLUMN IF NOT EXISTS matched_case_id VARCHAR(255)")
+    conn.commit()
+    # range filter on ingested_at must not scan the whole collection
+    qdrant.create_payload_index(
+        collection_name=QDRANT_COLLECTION,
+        field_name=INGESTED_AT,
+        field_schema=PayloadSchemaType.FLOAT,
+    )
+
+# ======================
+# NEW POINTS
+# ======================
+def new_points_filter(watermark, upto):
+    window = FieldCondition(key=INGESTED_AT, range=Range(gt=watermark, lte=upto))
+    if watermark is None:
+        window = FieldCondition(key=INGESTED_AT, range=Range(lte=upto))
+    # points written before ingested_at existed are picked up once
+    legacy = IsEmptyCondition(is_empty=PayloadField(key=INGESTED_AT))
+    return Filter(should=[window, legacy])
+
+def iter_new_points(watermark, upto):
+    offset = None
+    flt = new_points_filter(watermark, upto)
+    while True:
+        points, offset = qdrant.scroll(
+            collection_name=QDRANT_COLLECTION,
+            scroll_filter=flt,
+            limit=BATCH_SIZE,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        if points:
+            yield points
+        if offset is None:
+            break
+
+def stamp_legacy(points):
+    legacy = [p.id for p in points if INGESTED_AT not in (p.payload or {})]
+    if legacy:
+        qdrant.set_payload(
+            collection_name=QDRANT_COLLECTION,
+            payload={INGESTED_AT: 0.0},
+            points=legacy,
+        )
+
+# ======================
+# ENGINE: QDRANT
+# ======================
+def qdrant_neighbours(points):
+    results = qdrant.search_batch(
+        collection_name=QDRANT_COLLECTION,
+        requests=[
+            SearchRequest(
+                vector=p.vector,
+                limit=TOP_K + 1,     # +1: the point finds itself
+                score_threshold=DUPLICATE_THRESHOLD,
+                with_payload=True,
+            )
+            for p in points
+        ],
+    )
+    return [
+        [(h.payload.get("FinalPersonId"), h.score) for h in hits if h.id != p.id]
+        for p, hits in zip(points, results)
+    ]
+
+# ======================
+# ENGINE: LOCAL (MEMMAP + MATMUL)
+# ======================
+class LocalCorpus:
+    """Normalized float32 vectors appended to a flat file, searched in blocks."""
+
+    def __init__(self, reset=False):
+        os.makedirs(STATE_DIR, exist_ok=True)
+        if reset:
+            for path in (LOCAL_VECTORS, LOCAL_IDS):
+                if os.path.exists(path):
+                    os.remove(path)
+        self.ids = []
+        if os.path.exists(LOCAL_IDS):
+            with open(LOCAL_IDS, "r", encoding="utf-8") as f:
+                self.ids = [json.loads(line) for line in f if line.strip()]
+
+    def append(self, points):
+        vectors = np.asarray([p.vector for p in points], dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        with open(LOCAL_VECTORS, "ab") as f:
+            f.write(vectors.tobytes())
+        with open(LOCAL_IDS, "a", encoding="utf-8") as f:
+            for p in points:
+                row = [str(p.id), p.payload.get("FinalPersonId")]
+                f.write(json.dumps(row) + "\n")
+                self.ids.append(row)
+        return vectors
+
+    def topk(self, queries, k):
+        corpus = np.memmap(LOCAL_VECTORS, dtype=np.float32, mode="r").reshape(-1, VECTOR_SIZE)
+        best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        best_rows = np.full((len(queries), k), -1, dtype=np.int64)
+
+        for start in range(0, len(corpus), BLOCK_ROWS):
+            scores = queries @ np.asarray(corpus[start:start + BLOCK_ROWS]).T
+            kk = min(k, scores.shape[1])
+            part = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+
+            merged_scores = np.concatenate([best_scores, np.take_along_axis(scores, part, axis=1)], axis=1)
+            merged_rows = np.concatenate([best_rows, part + start], axis=1)
+            top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(merged_scores, top, axis=1)
+            best_rows = np.take_along_axis(merged_rows, top, axis=1)
+
+        return best_scores, best_rows
+
+    def neighbours(self, points, vectors):
+        scores, rows = self.topk(vectors, TOP_K + 1)
+        out = []
+        for p, p_scores, p_rows in zip(points, scores, rows):
+            hits = []
+            for score, row in zip(p_scores, p_rows):
+                if row < 0 or score < DUPLICATE_THRESHOLD:
+                    continue
+                point_id, final_person_id = self.ids[row]
+                if point_id != str(p.id):
+                    hits.append((final_person_id, float(score)))
+            out.append(hits)
+        return out
+
+# ======================
+# POTENTIAL MATCHES
+# ======================
+def load_existing_pairs():
+    cursor.execute("""
+        SELECT case_id, matched_case_id FROM potential_matches
+        WHERE matched_case_id IS NOT NULL
+    """)
+    return {frozenset(r) for r in cursor.fetchall()}
+
+def write_pairs(pairs, existing):
+    """pairs: {frozenset(case_a, case_b): (case_a, case_b, score)}"""
+    fresh = [v for k, v in pairs.items() if k not in existing]
+    if not fresh:
+        return 0
+
+    cursor.execute(
+        "SELECT final_person_id, image_file FROM persons WHERE final_person_id = ANY(%s)",
+        (list({b for _, b, _ in fresh}),)
+    )
+    images = dict(cursor.fetchall())
+
+    execute_values(
+        cursor,
+        """
+        INSERT INTO potential_matches (case_id, matched_case_id, submitted_image, score, status)
+        VALUES %s
+        """,
+        [(a, b, images.get(b), float(score), "pending") for a, b, score in fresh],
+    )
+    conn.commit()
+    existing.update(frozenset((a, b)) for a, b, _ in fresh)
+    return len(fresh)
+
+# ======================
+# RUN
+# ======================
+def run(engine, full=False):
+    if VECTOR_STORE_BACKEND != "qdrant":
+        raise SystemExit(
+            f"find_duplicate_cases.py needs the Qdrant collection (VECTOR_STORE={VECTOR_STORE_BACKEND!r}); "
+            "run it against a deployment with VECTOR_STORE=qdrant"
+        )
+    ensure_schema()
+    state = load_state()
+
+    if full or (engine == "local" and state.get("engine") != "local"):
+        # the local corpus must hold every point, so switching engines rescans
+        state = {"watermark": None, "engine": engine}
+
+    local = LocalCorpus(reset=state["watermark"] is None) if engine == "local" else None
+    existing = load_existing_pairs()
+    upto = time.time()
+
+    scanned = 0
+    written = 0
+    for points in tqdm(iter_new_points(state["watermark"], upto), desc="🔍 Scanning new points", unit="batch"):
+        points = [p for p in points if p.vector is not None]
+        if not points:
+            continue
+
+        if local:
+            vectors = local.append(points)
+            neighbours = local.neighbours(points, vectors)
+        else:
+            neighbours = qdrant_neighbours(points)
+
+        pairs = {}
+        for p, hits in zip(points, neighbours):
+            case_a = p.payload.get("FinalPersonId")
+            for case_b, score in hits:
+                if not case_a or not case_b or case_a == case_b:
+                    continue
+                key = frozenset((case_a, case_b))
+                if key not in pairs or pairs[key][2] < score:
+                    pairs[key] = (case_a, case_b, score)
+
+        written += write_pairs(pairs, existing)
+        stamp_legacy(points)
+        scanned += len(points)
+
+    state["watermark"] = upto
+    state["engine"] = engine
+    save_state(state)
+
+    print(f"\n🎉 Scanned {scanned} new points")
+    print(f"🔗 New potential duplicate pairs: {written}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find duplicate cases across the whole face collection")
+    parser.add_argument("--engine", choices=["qdrant", "local"], default="qdrant")
+    parser.add_argument("--full", action="store_true", help="ignore the watermark and rescan all points")
+    args = parser.parse_args()
+
+    run(args.engine, args.full)
@@ -0,0 +1,276 @@
+import hashlib
+import uuid
+from collections import defaultdict
+
+import numpy as np
+from tqdm import tqdm
+
+# ======================
+# IDENTITY RESOLUTION
+# ======================
+# Groups face embeddings into identities: an embedding joins the first
+# (oldest) identity whose similarity is >= threshold, otherwise it starts a
+# new one. Each identity is represented by its first embedding. This is the
+# rule the dump dedup scripts always used; the ANN index can only apply it
+# among its top ANN_CANDIDATES hits.
+#
+# Embeddings are L2-normalized once and kept in a contiguous float32 matrix,
+# so a whole batch is scored with a single matrix product instead of one
+# sklearn cosine_similarity call per pair.
+
+SIMILARITY_THRESHOLD = 0.92
+VECTOR_SIZE = 512
+ANN_CANDIDATES = 16
+
+
+def normalize(embeddings):
+    x = np.asarray(embeddings, dtype=np.float32)
+    if x.ndim == 1:
+        x = x[None, :]
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def _assign_batch(batch, best_ids, best_scores, threshold, first_new_id):
+    """
+    Shared second half of assign(). best_ids / best_scores: the oldest
+    existing identity over threshold per row (score < threshold if none).
+    Rows without one join the first identity created earlier in this batch
+    that is over threshold, or start a new one.
+    Returns (identity ids, rows of batch that became new identities).
+    """
+    # in-batch similarities: one more (batch x batch) product
+    in_batch = batch @ batch.T
+
+    ids = []
+    new_rows = []
+    for i in range(len(batch)):
+        if best_scores[i] >= threshold:
+            ids.append(int(best_ids[i]))
+            continue
+
+        if new_rows:
+            over = np.flatnonzero(in_batch[i, new_rows] >= threshold)
+            if len(over):
+                ids.append(first_new_id + int(over[0]))
+                continue
+
+        ids.append(first_new_id + len(new_rows))
+        new_rows.append(i)
+
+    return ids, new_rows
+
+
+class IdentityIndex:
+    """Exact (brute-force BLAS) identity index held in memory."""
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, dim=VECTOR_SIZE, capacity=1024):
+        self.threshold = threshold
+        self._matrix = np.empty((capacity, dim), dtype=np.float32)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, needed):
+        if needed <= len(self._matrix):
+            return
+        capacity = max(needed, 2 * len(self._matrix))
+        matrix = np.empty((capacity, self._matrix.shape[1]), dtype=np.float32)
+        matrix[:self.size] = self._matrix[:self.size]
+        self._matrix = matrix
+
+    def assign(self, embeddings):
+        """Identity id (creation order, 0-based) for every embedding."""
+        batch = normalize(embeddings)
+        if not len(batch):
+            return []
+
+        if self.size:
+            scores = batch @ self._matrix[:self.size].T
+            # first identity over threshold (argmax of a bool row = first True)
+            best_ids = (scores >= self.threshold).argmax(axis=1)
+            best_scores = scores[np.arange(len(batch)), best_ids]
+        else:
+            best_ids = np.zeros(len(batch), dtype=np.int64)
+            best_scores = np.full(len(batch), -np.inf, dtype=np.float32)
+
+        ids, new_rows = _assign_batch(batch, best_ids, best_scores, self.threshold, self.size)
+
+        if new_rows:
+            self._grow(self.size + len(new_rows))
+            self._matrix[self.size:self.size + len(new_rows)] = batch[new_rows]
+            self.size += len(new_rows)
+
+        return ids
+
+
+class QdrantIdentityIndex:
+    """
+    ANN identity index backed by a Qdrant collection. Used for resolving
+    identities across metadata groups, where the number of identities is too
+    large for pairwise checks. Defaults to an in-process Qdrant; pass a client
+    for a real server to get HNSW search.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, dim=VECTOR_SIZE,
+                 client=None, collection=None):
+        from qdrant_client import QdrantClient
+        from qdrant_client.models import VectorParams, Distance
+
+        self.threshold = threshold
+        self.client = client or QdrantClient(location=":memory:")
+        self.collection = collection or f"identity_resolution_{uuid.uuid4().hex[:8]}"
+        self.size = 0
+
+        self.client.recreate_collection(
+            collection_name=self.collection,
+            vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
+        )
+
+    def __len__(self):
+        return self.size
+
+    def assign(self, embeddings):
+        from qdrant_client.models import PointStruct, SearchRequest
+
+        batch = normalize(embeddings)
+        if not len(batch):
+            return []
+
+        best_ids = np.zeros(len(batch), dtype=np.int64)
+        best_scores = np.full(len(batch), -np.inf, dtype=np.float32)
+        if self.size:
+            results = self.client.search_batch(
+                collection_name=self.collection,
+                requests=[
+                    SearchRequest(vector=v.tolist(), limit=ANN_CANDIDATES, score_threshold=self.threshold)
+                    for v in batch
+                ],
+            )
+            for i, hits in enumerate(results):
+                if hits:
+                    # ids are creation order: the oldest candidate over threshold
+                    first = min(hits, key=lambda h: h.id)
+                    best_ids[i] = first.id
+                    best_scores[i] = first.score
+
+        ids, new_rows = _assign_batch(batch, best_ids, best_scores, self.threshold, self.size)
+
+        if new_rows:
+            self.client.upsert(
+                collection_name=self.collection,
+                points=[
+                    PointStruct(id=self.size + k, vector=batch[i].tolist())
+                    for k, i in enumerate(new_rows)
+                ],
+            )
+            self.size += len(new_rows)
+
+        return ids
+
+    def drop(self):
+        self.client.delete_collection(self.collection)
+
+
+# ======================
+# GROUP RESOLUTION (dump dedup scripts)
+# ======================
+OUTPUT_FIELDS = [
+    "FinalPersonId", "Name", "Sex", "BirthYear", "State", "District",
+    "PoliceStation", "TracingStatus", "SourceMissingPersonIds", "ImageUrls",
+]
+
+
+def new_identity_id(seed):
+    return hashlib.md5(seed.encode()).hexdigest()
+
+
+def flatten_identity(identity):
+    sample = identity["records"][0]
+
+    return {
+        "FinalPersonId": new_identity_id(identity["seed"]),
+        "Name": sample.get("Name", ""),
+        "Sex": sample.get("Sex", ""),
+        "BirthYear": sample.get("BirthYear", ""),
+        "State": sample.get("State", ""),
+        "District": sample.get("District", ""),
+        "PoliceStation": sample.get("PoliceStation", ""),
+        "TracingStatus": sample.get("TracingStatus", ""),
+        "SourceMissingPersonIds": ";".join(
+            sorted(set(
+                pid
+                for r in identity["records"]
+                for pid in r.get("SourceMissingPersonIds", "").split(";")
+                if pid
+            ))
+        ),
+        "ImageUrls": ";".join(sorted(identity["images"]))
+    }
+
+
+def make_index(backend="local", threshold=SIMILARITY_THRESHOLD, qdrant_url=None):
+    if backend == "qdrant":
+        from qdrant_client import QdrantClient
+        return QdrantIdentityIndex(threshold, client=QdrantClient(url=qdrant_url) if qdrant_url else None)
+    return IdentityIndex(threshold)
+
+
+def resolve_groups(groups, embed_url, threshold=SIMILARITY_THRESHOLD, cross_group=False,
+                   backend="local", qdrant_url=None):
+    """
+    groups: {person_key: [record, ...]}, each record with an "ImageUrls" list.
+    embed_url(url) -> embedding or None (exceptions skip the image).
+    Returns one output row (OUTPUT_FIELDS) per identity. cross_group=True
+    shares one index across groups, so the same face filed under different
+    records merges; the temporary Qdrant collection is always dropped.
+    """
+    final_rows = []
+    global_index = make_index(backend, threshold, qdrant_url) if cross_group else None
+    global_identities = {}
+    seed_counts = defaultdict(int)
+
+    try:
+        for person_key in tqdm(groups, desc="🔍 Resolving identities", unit="group"):
+            # embed every image of the group, then resolve them in one batch
+            faces = []
+            for record in groups[person_key]:
+                for img_url in record["ImageUrls"]:
+                    try:
+                        emb = embed_url(img_url)
+                    except Exception:
+                        continue
+                    if emb is not None:
+                        faces.append((record, img_url, emb))
+
+            if not faces:
+                continue
+
+            index = global_index if cross_group else IdentityIndex(threshold)
+            identities = global_identities if cross_group else {}
+
+            identity_ids = index.assign([emb for _, _, emb in faces])
+
+            for (record, img_url, _), identity_id in zip(faces, identity_ids):
+                if identity_id not in identities:
+                    identities[identity_id] = {
+                        "seed": person_key + str(seed_counts[person_key]),
+                        "records": [],
+                        "images": set()
+                    }
+                    seed_counts[person_key] += 1
+
+                identities[identity_id]["records"].append(record)
+                identities[identity_id]["images"].add(img_url)
+
+            if not cross_group:
+                final_rows.extend(flatten_identity(i) for i in identities.values())
+    finally:
+        if isinstance(global_index, QdrantIdentityIndex):
+            global_index.drop()
+
+    if cross_group:
+        final_rows.extend(flatten_identity(i) for i in global_identities.values())
+    return final_rows
@@ -0,0 +1,233 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from io import BytesIO
+
+import requests
+from PIL import Image
+
+from config import IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES
+
+# ======================
+# CONTENT-ADDRESSED IMAGE CACHE
+# ======================
+# Layout:
+#   <root>/index.sqlite            url -> sha256, object sizes, last access
+#   <root>/objects/ab/cd/abcd...   raw downloaded bytes (never re-encoded)
+#
+# Two levels of 256-way sharding keep every directory small even with
+# hundreds of thousands of images. Identical images served under different
+# URLs are stored once.
+
+DEFAULT_TIMEOUT = 10
+EVICT_TARGET_RATIO = 0.9   # evict down to 90% of the limit, not just under it
+
+
+def _decode(data):
+    return Image.open(BytesIO(data)).convert("RGB")
+
+
+class ImageCache:
+    def __init__(self, root=IMAGE_CACHE_DIR, max_bytes=IMAGE_CACHE_MAX_BYTES,
+                 timeout=DEFAULT_TIMEOUT, legacy_dir=None):
+        self.root = root
+        self.legacy_dir = legacy_dir   # old flat md5(url).jpg cache, imported on demand
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.objects_dir = os.path.join(root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        self._db = sqlite3.connect(
+            os.path.join(root, "index.sqlite"),
+            check_same_thread=False,
+            isolation_level=None,   # autocommit; writes are tiny
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS objects (
+                hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                hash TEXT NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS urls_hash ON urls(hash)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS objects_lru ON objects(last_access)")
+        self.total_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM objects"
+        ).fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+
+    # ----------------------
+    # PATHS
+    # ----------------------
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:4], digest)
+
+    # ----------------------
+    # INDEX
+    # ----------------------
+    def lookup(self, url):
+        """Return the cached file path for url, or None on a miss."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT hash FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+            if not row:
+                return None
+            path = self.object_path(row[0])
+            if not os.path.exists(path):
+                # object removed behind our back -> forget it
+                self._forget(row[0])
+                return None
+            self._db.execute(
+                "UPDATE objects SET last_access = ? WHERE hash = ?",
+                (time.time(), row[0])
+            )
+            return path
+
+    def put(self, url, data):
+        """Store raw image bytes for url and return their sha256."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+
+        with self._lock:
+            exists = self._db.execute(
+                "SELECT 1 FROM objects WHERE hash = ?", (digest,)
+            ).fetchone()
+
+            if not exists:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self._db.execute(
+                    "INSERT INTO objects (hash, size, last_access) VALUES (?, ?, ?)",
+                    (digest, len(data), time.time())
+                )
+                self.total_bytes += len(data)
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO urls (url, hash) VALUES (?, ?)",
+                (url, digest)
+            )
+
+            if self.total_bytes > self.max_bytes:
+                self._evict(keep=digest)
+
+        return digest
+
+    def _forget(self, digest):
+        row = self._db.execute(
+            "SELECT size FROM objects WHERE hash = ?", (digest,)
+        ).fetchone()
+        if row:
+            self.total_bytes -= row[0]
+        self._db.execute("DELETE FROM objects WHERE hash = ?", (digest,))
+        self._db.execute("DELETE FROM urls WHERE hash = ?", (digest,))
+
+    def _evict(self, keep=None):
+        # least recently used objects first
+        target = int(self.max_bytes * EVICT_TARGET_RATIO)
+        rows = self._db.execute(
+            "SELECT hash, size FROM objects ORDER BY last_access ASC"
+        ).fetchall()
+        victims = []
+        freed = 0
+        excess = self.total_bytes - target
+        for digest, size in rows:
+            if freed >= excess:
+                break
+            if digest == keep:
+                continue
+            victims.append(digest)
+            freed += size
+
+        for digest in victims:
+            try:
+                os.remove(self.object_path(digest))
+            except FileNotFoundError:
+                pass
+            self._forget(digest)
+
+    # ----------------------
+    # FETCH
+    # ----------------------
+    def _count(self, hit):
+        # shared by the download threads: += on an attribute is not atomic
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _fetch(self, url):
+        """(bytes, already_cached): disk read on a hit, legacy cache or network on a miss."""
+        path = self.lookup(url)
+        if path:
+            self._count(hit=True)
+            with open(path, "rb") as f:
+                return f.read(), True
+
+        data = self._read_legacy(url)
+        if data is not None:
+            self._count(hit=True)
+            return data, False
+
+        self._count(hit=False)
+        r = self._session.get(url, timeout=self.timeout)
+        r.raise_for_status()
+        return r.content, False
+
+    def get_bytes(self, url):
+        """Raw bytes for url. Only bytes that decode as an image are stored, so an
+        error page served with 200 is not cached."""
+        data, cached = self._fetch(url)
+        if not cached:
+            _decode(data)
+            self.put(url, data)
+        return data
+
+    def _read_legacy(self, url):
+        if not self.legacy_dir:
+            return None
+        legacy_path = os.path.join(
+            self.legacy_dir, hashlib.md5(url.encode()).hexdigest() + ".jpg"
+        )
+        if not os.path.exists(legacy_path):
+            return None
+        with open(legacy_path, "rb") as f:
+            return f.read()
+
+    def get_path(self, url):
+        """Local file path for url, downloading it first if needed."""
+        path = self.lookup(url)
+        if path:
+            self._count(hit=True)
+            return path
+        self.get_bytes(url)
+        return self.lookup(url)
+
+    def open_image(self, url):
+        data, cached = self._fetch(url)
+        img = _decode(data)
+        if not cached:
+            self.put(url, data)
+        return img
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+        self._session.close()
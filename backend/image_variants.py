@@ -0,0 +1,148 @@
+import hashlib
+import os
+import threading
+
+from PIL import Image, ImageOps
+
+from tracing import span
+from config import IMAGE_VARIANT_FORMAT, IMAGE_VARIANT_QUALITY
+
+# ======================
+# RESIZED IMAGE VARIANTS
+# ======================
+# Layout:
+#   <cache_dir>/<source>/<variant>/<filename>.<webp|jpg>
+#
+# Variants are generated on first request (or at ingest) from the original in
+# the source directory and regenerated when the original is newer. Writes go
+# through a temp file + rename, so concurrent requests never see a partial
+# image. Renders of the same target are serialized on one of LOCK_STRIPES
+# locks, so the lock set stays fixed however many files are served.
+
+VARIANTS = {
+    "thumb": 256,     # /cases grid cards
+    "medium": 768,    # case detail / match review
+}
+
+FORMATS = {
+    "webp": ("WEBP", "image/webp", ".webp"),
+    "jpeg": ("JPEG", "image/jpeg", ".jpg"),
+}
+
+LOCK_STRIPES = 64
+
+
+class ImageVariants:
+    def __init__(self, sources, cache_dir, fmt=IMAGE_VARIANT_FORMAT, quality=IMAGE_VARIANT_QUALITY):
+        """sources: {"uploads": "/app/final_images", ...}"""
+        self.sources = sources
+        self.cache_dir = cache_dir
+        self.fmt = fmt if fmt in FORMATS else "jpeg"
+        self.quality = quality
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.hits = 0       # served from cache_dir / rendered on demand (exported on /metrics)
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _source_path(self, source, filename):
+        if source not in self.sources:
+            return None
+        # plain file names only, no traversal out of the source directory
+        if not filename or os.path.basename(filename) != filename or filename.startswith("."):
+            return None
+        path = os.path.join(self.sources[source], filename)
+        return path if os.path.isfile(path) else None
+
+    def _lock_for(self, key):
+        return self._locks[hash(key) % LOCK_STRIPES]
+
+    def negotiate(self, accept):
+        """WebP only for clients that advertise it; everyone else gets JPEG."""
+        if self.fmt == "webp" and "image/webp" not in (accept or ""):
+            return "jpeg"
+        return self.fmt
+
+    def media_type(self, fmt):
+        return FORMATS[fmt][1]
+
+    def get(self, source, filename, variant, fmt=None, image=None):
+        """
+        Path of the (possibly freshly generated) variant, or None if the original is missing.
+        image: the original already decoded (upright RGB), used instead of re-reading
+        the file when it is at least as large as the variant.
+        """
+        original = self._source_path(source, filename)
+        if original is None or variant not in VARIANTS:
+            return None
+
+        fmt = fmt or self.fmt
+        pil_format, _, ext = FORMATS[fmt]
+        out_dir = os.path.join(self.cache_dir, source, variant)
+        target = os.path.join(out_dir, filename + ext)
+
+        if self._fresh(target, original):
+            self.hits += 1
+            return target
+
+        with self._lock_for(target):
+            if self._fresh(target, original):
+                self.hits += 1
+                return target
+            self.misses += 1
+            os.makedirs(out_dir, exist_ok=True)
+            self._render(original, target, VARIANTS[variant], pil_format, image)
+        return target
+
+    def generate_all(self, source, filename, image=None):
+        """Pre-render every variant (ingest time); failures are non-fatal."""
+        with span("image_variants.generate_all"):
+            for variant in VARIANTS:
+                for fmt in {self.fmt, "jpeg"}:
+                    try:
+                        self.get(source, filename, variant, fmt, image)
+                    except Exception as e:
+                        print(f"⚠️ Variant {variant}/{fmt} failed for {filename}: {e}")
+
+    @staticmethod
+    def _fresh(target, original):
+        return os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(original)
+
+    def _render(self, original, target, size, pil_format, image=None):
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if image is not None and max(image.size) >= size:
+            im = image.copy()
+            im.thumbnail((size, size), Image.LANCZOS)
+            im.save(tmp, format=pil_format, quality=self.quality, optimize=pil_format == "JPEG")
+            os.replace(tmp, target)
+            return
+
+        with Image.open(original) as im:
+            # JPEG: let the decoder downscale by 1/2..1/8 before we touch pixels
+            im.draft("RGB", (size, size))
+            im = ImageOps.exif_transpose(im).convert("RGB")
+            im.thumbnail((size, size), Image.LANCZOS)
+            im.save(tmp, format=pil_format, quality=self.quality, optimize=pil_format == "JPEG")
+        os.replace(tmp, target)
+
+
+def etag(path):
+    """Strong validator: changes whenever the variant file is rewritten."""
+    st = os.stat(path)
+    digest = hashlib.md5(f"{path}:{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()
+    return f'"{digest}"'
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from tqdm import tqdm
+
+    parser = argparse.ArgumentParser(description="Pre-generate image variants for existing cases")
+    parser.add_argument("--source", default="uploads")
+    parser.add_argument("--source-dir", default="final_images")
+    parser.add_argument("--cache-dir", default="image_variants")
+    args = parser.parse_args()
+
+    variants = ImageVariants({args.source: args.source_dir}, args.cache_dir)
+    for name in tqdm(sorted(os.listdir(args.source_dir)), desc="🖼️ Rendering variants"):
+        variants.generate_all(args.source, name)
@@ -1,14 +1,19 @@
 import os
 import csv
+import json
+import time
 import uuid
 import numpy as np
 from PIL import Image
-from insightface.app import FaceAnalysis
 from qdrant_client import QdrantClient
 from qdrant_client.models import PointStruct
 import psycopg2
 from tqdm import tqdm
 
+from vector_store import make_vector_store
+from image_variants import ImageVariants
+from face import get_embedding, embed_detected
+
 # ======================
 # CONFIG
 # ======================
@@ -26,19 +31,20 @@ POSTGRES_CONFIG = {
     "port": 5432,
 }
 
-MODEL_NAME = "buffalo_s"   # stable + fast
-VECTOR_SIZE = 512
-
-# ======================
-# INIT INSIGHTFACE
-# ======================
-app = FaceAnalysis(name=MODEL_NAME)
-app.prepare(ctx_id=-1, det_size=(640, 640))
+VECTOR_SIZE = 512   # buffalo_s, loaded by face.py
 
 # ======================
-# INIT QDRANT
+# INIT VECTOR STORE
 # ======================
+# Qdrant by default, VECTOR_STORE=local for the in-process index
 qdrant = QdrantClient(url=QDRANT_URL)
+vector_store = make_vector_store(QDRANT_COLLECTION, qdrant)
+
+# thumbnails for the /cases grid, same location main.py serves them from
+variants = ImageVariants(
+    {"uploads": IMAGE_DIR},
+    os.path.join(os.path.dirname(os.path.abspath(IMAGE_DIR)), "image_variants"),
+)
 
 # ======================
 # INIT POSTGRES
@@ -93,31 +99,31 @@ for row in tqdm(rows, desc="🚀 Ingesting embeddings"):
     # ----------------------
     # LOAD IMAGE
     # ----------------------
-    img = Image.open(image_path).convert("RGB")
-    faces = app.get(np.array(img))
+    img = np.array(Image.open(image_path).convert("RGB"))
 
-    if not faces:
-        continue
+    if row.get("FaceKps"):
+        # landmarks persisted by download_image_new.py -> recognition only
+        embedding = embed_detected(img, kps=json.loads(row["FaceKps"]))
+    else:
+        embedding = get_embedding(img)
 
-    embedding = faces[0].embedding
-    if embedding.shape[0] != VECTOR_SIZE:
+    if embedding is None or embedding.shape[0] != VECTOR_SIZE:
         continue
 
     # ----------------------
-    # INSERT INTO QDRANT
+    # INSERT INTO VECTOR STORE
     # ----------------------
     point = PointStruct(
         id=str(uuid.uuid4()),
         vector=embedding.tolist(),
         payload={
-            "FinalPersonId": final_person_id
+            "FinalPersonId": final_person_id,
+            "ingested_at": time.time()   # lets find_duplicate_cases.py scan incrementally
         }
     )
 
-    qdrant.upsert(
-        collection_name=QDRANT_COLLECTION,
-        points=[point]
-    )
+    vector_store.upsert([point])
+    variants.generate_all("uploads", row["ImageFile"])
 
     # ----------------------
     # INSERT METADATA
@@ -0,0 +1,54 @@
+import threading
+import time
+
+# ======================
+# LAZY RESOURCES
+# ======================
+# Heavy clients (Postgres, Qdrant, ONNX models) are created on first use
+# instead of at import, so `import main` is cheap and workers boot fast.
+# The wrapper forwards attribute access, so existing call sites like
+# `cursor.execute(...)` keep working unchanged.
+
+
+class LazyResource:
+    def __init__(self, name, factory):
+        self.name = name
+        self._factory = factory
+        self._obj = None
+        self._lock = threading.Lock()
+        self.state = "not_initialized"
+        self.error = None
+        self.init_seconds = None
+
+    def get(self):
+        if self._obj is None:
+            with self._lock:
+                if self._obj is None:
+                    self.state = "initializing"
+                    start = time.perf_counter()
+                    try:
+                        self._obj = self._factory()
+                    except Exception as e:
+                        self.state = "error"
+                        self.error = str(e)
+                        raise
+                    self.init_seconds = round(time.perf_counter() - start, 3)
+                    self.state = "ready"
+                    self.error = None
+        return self._obj
+
+    @property
+    def ready(self):
+        return self._obj is not None
+
+    def status(self):
+        info = {"state": self.state}
+        if self.error:
+            info["error"] = self.error
+        if self.init_seconds is not None:
+            info["init_seconds"] = self.init_seconds
+        return info
+
+    def __getattr__(self, name):
+        # only reached for attributes not set in __init__
+        return getattr(self.get(), name)
@@ -1,26 +1,55 @@
-from fastapi import FastAPI, UploadFile, File, Query, Form, HTTPException, Depends, status
+from fastapi import FastAPI, UploadFile, File, Query, Form, HTTPException, Depends, Request, Response, BackgroundTasks, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
 from PIL import Image
 import numpy as np
 import uuid
 import os
+import time
+import asyncio
 from datetime import datetime, timedelta
 from typing import Optional
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 
-from db import qdrant, cursor, conn, QDRANT_COLLECTION
-from face import get_embedding
+from db import vector_store, cursor, conn
+from ml_client import make_ml_client
+from user_cache import UserCache
+from passwords import (
+    hash_password,
+    verify_password,
+    hash_password_sync,
+    throttle_auth,
+    throttle_account,
+    record_auth_failure,
+)
+from image_variants import ImageVariants, etag
+from uploads import save_upload, decode_image
+from metrics import instrument, register_cache
+from tracing import trace_requests, span
+from config import (
+    SEARCH_HNSW_EF,
+    SEARCH_HNSW_EF_MAX,
+    SEARCH_MIN_SCORE,
+    SEARCH_MIN_SCORE_FLOOR,
+    SEARCH_MAX_TOP,
+    SEARCH_MAX_OFFSET,
+    IMAGE_VARIANT_MAX_AGE,
+    MODEL_WARMUP,
+    PREPROCESS_MAX_SIDE,
+    MULTI_FACE_MAX_SIDE,
+)
 
 # --- Auth Configuration ---
 SECRET_KEY = "your-secret-key-keep-it-secret"  # In production, use env var
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 300
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
@@ -94,6 +123,8 @@ def init_db():
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        # Set by find_duplicate_cases.py when two cases look like the same person
+        cursor.execute("ALTER TABLE potential_matches ADD COLUMN IF NOT EXISTS matched_case_id VARCHAR(255)")
         # Auto-verify existing citizens/admins if any
         # Auto-verify existing citizens/admins if any
         cursor.execute("UPDATE users SET is_verified = TRUE WHERE role != 'police'")
@@ -101,17 +132,91 @@ def init_db():
     except Exception:
         conn.rollback()
 
-init_db()
+# Face models: in-process, or the ml_service.py tier when ML_SERVICE_URL is set
+ml = make_ml_client()
+
+# --- Startup ---
+# Nothing heavy happens at import. The DB schema / admin seed run (off the
+# event loop) before the first request is served, since they share the one
+# connection and cursor with the handlers; if Postgres is not up yet they are
+# retried every DB_BOOTSTRAP_RETRY_SECONDS. The vector store and (optionally)
+# a model warm-up load in the background. /healthz answers immediately,
+# /readyz once everything is done.
+startup_state = {"schema": {"state": "not_initialized"}}
+DB_BOOTSTRAP_RETRY_SECONDS = 5
+
+def bootstrap_db():
+    try:
+        startup_state["schema"] = {"state": "initializing"}
+        init_db()
+        seed_admin()
+        startup_state["schema"] = {"state": "ready"}
+    except Exception as e:
+        startup_state["schema"] = {"state": "error", "error": str(e)}
+        print("❌ Database bootstrap failed:", e)
+
+def load_services():
+    try:
+        vector_store.get()
+    except Exception as e:
+        print("❌ Vector store init failed:", e)
+
+    if MODEL_WARMUP:
+        try:
+            ml.warm_up()
+        except Exception as e:
+            print("❌ Face model warm-up failed:", e)
+
+async def retry_bootstrap_db():
+    while startup_state["schema"]["state"] == "error":
+        await asyncio.sleep(DB_BOOTSTRAP_RETRY_SECONDS)
+        await run_in_threadpool(bootstrap_db)
+
+@asynccontextmanager
+async def lifespan(app):
+    await run_in_threadpool(bootstrap_db)
+    tasks = [
+        asyncio.create_task(run_in_threadpool(load_services)),
+        asyncio.create_task(retry_bootstrap_db()),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
 
 # ✅ Create app ONLY ONCE
-app = FastAPI(title="LostBuddy Face Search API")
+app = FastAPI(title="LostBuddy Face Search API", lifespan=lifespan)
+# Prometheus: per-route latency, in-flight requests, GET /metrics (see metrics.py)
+instrument(app)
+# OTLP/JSON request traces + slow-request profiles when enabled (see tracing.py)
+trace_requests(app, "lostbuddy-api")
+
+@app.get("/healthz")
+def liveness():
+    return {"status": "alive"}
+
+@app.get("/readyz")
+def readiness():
+    subsystems = {
+        "database": conn.status(),
+        "schema": startup_state["schema"],
+        "vector_store": vector_store.status(),
+        "face_model": ml.status(),
+    }
+    required = ["database", "schema", "vector_store"]
+    if MODEL_WARMUP:
+        required.append("face_model")
+    ready = all(subsystems[name]["state"] == "ready" for name in required)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "subsystems": subsystems},
+    )
 
 # --- Auth Utils ---
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
+# bcrypt: async endpoints await passwords.hash_password / verify_password
+# (bounded pool); sync code paths use this
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return hash_password_sync(password)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
@@ -137,9 +242,23 @@ def seed_admin():
         conn.commit()
         print("✅ Seeded Admin User: admin@pehchaan.com / admin123")
 
-seed_admin()
+# Every users column in table order, so the row indexes exactly like SELECT *
+# (id 0, email 1, role 6, is_verified 9), minus the password hash nobody
+# downstream needs
+CURRENT_USER_COLUMNS = (
+    "id, email, NULL AS password_hash, first_name, last_name, phone, role, "
+    "profile_image, created_at, is_verified"
+)
+
+user_cache = UserCache()
+UNCACHED_ROLES = ("admin", "police")
+register_cache("auth_user", user_cache)
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -154,10 +273,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise credentials_exception
     
-    cursor.execute("SELECT * FROM users WHERE email = %s", (token_data.email,))
+    cursor.execute(f"SELECT {CURRENT_USER_COLUMNS} FROM users WHERE email = %s", (token_data.email,))
     user = cursor.fetchone()
     if user is None:
         raise credentials_exception
+    # invalidate_user only reaches this worker's cache, so admin / police rows
+    # (role and is_verified gate what they may do) are always read fresh
+    if user[6] not in UNCACHED_ROLES:
+        user_cache.put(token, user, payload.get("exp"))
     return user
 
 async def get_current_user_optional(token: str | None = Depends(oauth2_scheme_optional)):
@@ -172,8 +295,9 @@ async def get_current_user_optional(token: str | None = Depends(oauth2_scheme_op
 
 # --- Auth Endpoints ---
 
-@app.post("/auth/register", response_model=Token)
+@app.post("/auth/register", response_model=Token, dependencies=[Depends(throttle_auth)])
 async def register(
+    request: Request,
     first_name: str = Form(...),
     last_name: str = Form(...),
     email: str = Form(...),
@@ -192,9 +316,12 @@ async def register(
         if existing_user[6] == 'citizen' and role == 'police':
             # Handle Upgrade Request
             # Check password to confirm ownership
-            if verify_password(password, existing_user[2]):
+            throttle_account(email)
+            ok, _ = await verify_password(password, existing_user[2])
+            if ok:
                 cursor.execute("UPDATE users SET role='police', is_verified=FALSE WHERE id=%s", (existing_user[0],))
                 conn.commit()
+                user_cache.invalidate_user(existing_user[0])
                 # We return a specific structure that frontend can detect
                 # We return a dummy token structure but with a special flag/message OR just valid response?
                 # Frontend expects Token. But if we return Token, the user will be logged in as "police" (unverified).
@@ -218,18 +345,18 @@ async def register(
                 # Let's use a specific exception that frontend treats as "Upgrade Success".
                 raise HTTPException(status_code=409, detail="UPGRADE_REQUESTED_POLICE")
             else:
+                record_auth_failure(request, email)
                 raise HTTPException(status_code=400, detail="Account exists. Password incorrect for upgrade request.")
         
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(password)
+    hashed_password = await hash_password(password)
     
     profile_image = None
     if photo:
         filename = f"user_{uuid.uuid4().hex[:12]}.jpg"
         image_path = os.path.join(USER_IMAGES_DIR, filename)
-        with open(image_path, "wb") as f:
-            f.write(await photo.read())
+        await save_upload(photo, image_path)
         profile_image = filename
     
     try:
@@ -259,20 +386,27 @@ async def register(
         conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/auth/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+@app.post("/auth/login", response_model=Token, dependencies=[Depends(throttle_auth)])
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
     # OAuth2PasswordRequestForm expects username and password fields
     # We'll treat email as username
+    throttle_account(form_data.username)
     cursor.execute("SELECT * FROM users WHERE email = %s", (form_data.username,))
     user = cursor.fetchone()
     
     # user row: id(0), email(1), hash(2), first(3), last(4), phone(5), role(6)
-    if not user or not verify_password(form_data.password, user[2]): # password_hash is at index 2
+    ok, new_hash = (await verify_password(form_data.password, user[2])) if user else (False, None) # password_hash is at index 2
+    if not ok:
+        record_auth_failure(request, form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made -> upgrade it now
+        cursor.execute("UPDATE users SET password_hash = %s WHERE id = %s", (new_hash, user[0]))
+        conn.commit()
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -337,6 +471,7 @@ def get_users(role: Optional[str] = None, verified: Optional[bool] = None, curre
 def verify_user(user_id: int, current_user = Depends(check_admin_role)):
     cursor.execute("UPDATE users SET is_verified = TRUE WHERE id = %s", (user_id,))
     conn.commit()
+    user_cache.invalidate_user(user_id)
     return {"success": True, "message": "User verified successfully"}
 
 @app.put("/admin/users/{user_id}/role")
@@ -351,6 +486,7 @@ def update_user_role(
         (role, user_id)
     )
     conn.commit()
+    user_cache.invalidate_user(user_id)
     return {"success": True, "message": f"User promoted to {role} successfully"}
 
 @app.post("/admin/create-admin")
@@ -367,6 +503,7 @@ def create_admin_user(
         # If user exists, just promote them to admin
         cursor.execute("UPDATE users SET role = 'admin', is_verified = TRUE WHERE id = %s", (existing_user[0],))
         conn.commit()
+        user_cache.invalidate_user(existing_user[0])
         return {"success": True, "message": "Existing user promoted to Admin successfully"}
     
     hashed_password = get_password_hash(password)
@@ -458,6 +595,31 @@ print("📂 Serving user uploads from:", USER_IMAGES_DIR)
 app.mount("/uploads", StaticFiles(directory=IMAGES_DIR), name="uploads")
 app.mount("/user-uploads", StaticFiles(directory=USER_IMAGES_DIR), name="user_uploads")
 
+# Thumbnails / medium sizes, rendered on first request (or at ingest) next to final_images
+image_variants = ImageVariants(
+    {"uploads": IMAGES_DIR, "user-uploads": USER_IMAGES_DIR},
+    os.path.join(os.path.dirname(os.path.abspath(IMAGES_DIR)), "image_variants"),
+)
+register_cache("image_variants", image_variants)
+
+
+@app.get("/images/{source}/{variant}/{filename}")
+def get_image_variant(source: str, variant: str, filename: str, request: Request):
+    fmt = image_variants.negotiate(request.headers.get("accept"))
+    path = image_variants.get(source, filename, variant, fmt)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    tag = etag(path)
+    headers = {
+        "ETag": tag,
+        "Cache-Control": f"public, max-age={IMAGE_VARIANT_MAX_AGE}",
+        "Vary": "Accept",
+    }
+    if request.headers.get("if-none-match") == tag:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=image_variants.media_type(fmt), headers=headers)
+
 # -------------------------
 # Aliases
 # -------------------------
@@ -468,12 +630,10 @@ def get_persons_alias():
 # -------------------------
 # Utils
 # -------------------------
-def load_image(file: UploadFile) -> Image.Image:
+# CPU-bound (PIL decode + resize): async handlers call it via run_in_threadpool
+def load_image(file: UploadFile, max_side=PREPROCESS_MAX_SIDE) -> Image.Image:
     try:
-        img = Image.open(file.file).convert("RGB")
-        return img
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid image file")
+        return decode_image(file.file, max_side)
     finally:
         file.file.close()
 
@@ -484,8 +644,8 @@ def load_image(file: UploadFile) -> Image.Image:
 # -------------------------
 @app.post("/upload-photo")
 async def upload_photo(file: UploadFile = File(...)):
-    img = load_image(file)
-    emb = get_embedding(img)
+    img = await run_in_threadpool(load_image, file)
+    emb = await run_in_threadpool(ml.embed, img)
 
     if emb is None:
         return {"success": False, "message": "No face detected"}
@@ -508,23 +668,23 @@ async def register_face(
     police_station: str = Query(...),
     current_user = Depends(get_current_user)
 ):
-    img = load_image(file)
-    emb = get_embedding(img)
+    img = await run_in_threadpool(load_image, file)
+    emb = await run_in_threadpool(ml.embed, img)
 
     if emb is None:
         return {"success": False, "message": "No face detected"}
 
     final_person_id = str(uuid.uuid4())
 
-    # Store vector in Qdrant
-    qdrant.upsert(
-        collection_name=QDRANT_COLLECTION,
+    # Store vector (Qdrant or local index)
+    vector_store.upsert(
         points=[
             {
                 "id": final_person_id,
                 "vector": emb.tolist(),
                 "payload": {
-                    "FinalPersonId": final_person_id
+                    "FinalPersonId": final_person_id,
+                    "ingested_at": time.time()
                 }
             }
         ]
@@ -563,30 +723,11 @@ async def register_face(
 # -------------------------
 # POST /search
 # -------------------------
-@app.post("/search")
-async def search_face(
-    file: UploadFile = File(...),
-    top: int = Query(5)
-):
-    img = load_image(file)
-    emb = get_embedding(img)
-
-    if emb is None:
-        return {"success": True, "matches": [], "message": "No face detected"}
-
-    results = qdrant.search(
-        collection_name=QDRANT_COLLECTION,
-        query_vector=emb.tolist(),
-        limit=top
-    )
-
+def build_matches(results):
+    """Hydrate vector hits with case rows (and raise high-confidence alerts)."""
     matches = []
 
     for r in results:
-        # similarity threshold (important)
-        if r.score < 0.60:
-            continue
-
         pid = r.payload.get("FinalPersonId")
 
         cursor.execute(
@@ -641,9 +782,86 @@ async def search_face(
             "image_file": row[8],
         })
 
+    return matches
+
+
+@app.post("/search")
+async def search_face(
+    file: UploadFile = File(...),
+    top: int = Query(5, ge=1, le=SEARCH_MAX_TOP),
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_OFFSET),
+    min_score: float = Query(SEARCH_MIN_SCORE, ge=SEARCH_MIN_SCORE_FLOOR, le=1.0),
+    ef: Optional[int] = Query(None, ge=1, le=SEARCH_HNSW_EF_MAX),
+    exact: bool = Query(False),
+    multi: bool = Query(False)
+):
+    img = await run_in_threadpool(load_image, file, MULTI_FACE_MAX_SIDE if multi else PREPROCESS_MAX_SIDE)
+
+    if multi:
+        return await run_in_threadpool(search_all_faces, img, top, min_score, ef, exact)
+
+    emb = await run_in_threadpool(ml.embed, img)
+
+    if emb is None:
+        return {"success": True, "matches": [], "message": "No face detected"}
+
+    # ef: recall/latency knob (server default when omitted); exact: brute force
+    # similarity threshold (important) is applied inside the vector store, so
+    # `top` counts only hits that pass it
+    results = vector_store.search(
+        emb.tolist(),
+        limit=top,
+        ef=max(ef or SEARCH_HNSW_EF, top + offset),
+        exact=exact,
+        score_threshold=min_score,
+        offset=offset,
+    )
+
+    matches = build_matches(results)
+
     return {
         "success": True,
-        "matches": matches
+        "matches": matches,
+        "offset": offset,
+        # a full page means there may be more hits above min_score
+        "next_offset": offset + top if len(results) == top and offset + top <= SEARCH_MAX_OFFSET else None
+    }
+
+
+def search_all_faces(img, top, min_score, ef, exact):
+    """
+    Group photo / CCTV frame: every detected face is embedded in one batched
+    recognizer pass and searched with one batch request. No paging here.
+    """
+    faces = ml.embed_faces(img)
+    if not faces:
+        return {"success": True, "faces": [], "message": "No face detected"}
+
+    results = vector_store.search_batch(
+        [f.embedding.tolist() for f in faces],
+        limit=top,
+        ef=max(ef or SEARCH_HNSW_EF, top),
+        exact=exact,
+        score_threshold=min_score,
+    )
+
+    width, height = img.size
+    return {
+        "success": True,
+        "faces": [
+            {
+                # fractions of image width / height (the upload is downscaled before detection)
+                "bbox": [
+                    round(float(face.bbox[0]) / width, 4),
+                    round(float(face.bbox[1]) / height, 4),
+                    round(float(face.bbox[2]) / width, 4),
+                    round(float(face.bbox[3]) / height, 4),
+                ],
+                "det_score": round(float(face.det_score), 4),
+                "matches": build_matches(hits),
+            }
+            for face, hits in zip(faces, results)
+        ],
     }
 
 
@@ -691,9 +909,7 @@ async def flag_potential_match(
     # Save the submitted image
     filename = f"match_{uuid.uuid4().hex[:12]}.jpg"
     image_path = os.path.join(USER_IMAGES_DIR, filename)
-    
-    with open(image_path, "wb") as f:
-        f.write(await file.read())
+    await save_upload(file, image_path)
 
     # 1. Log to Timeline
     cursor.execute(
@@ -740,9 +956,11 @@ def get_potential_matches(current_user = Depends(check_admin_role)):
     query = """
         SELECT 
             pm.id, pm.case_id, pm.submitted_image, pm.status, pm.created_at,
-            p.name, p.image_file, p.district, p.state, p.reporter_id
+            p.name, p.image_file, p.district, p.state, p.reporter_id,
+            pm.score, pm.matched_case_id, m.name
         FROM potential_matches pm
         JOIN persons p ON pm.case_id = p.final_person_id
+        LEFT JOIN persons m ON pm.matched_case_id = m.final_person_id
         WHERE pm.status = 'pending'
         ORDER BY pm.created_at DESC
     """
@@ -759,7 +977,12 @@ def get_potential_matches(current_user = Depends(check_admin_role)):
             "case_name": r[5],
             "case_image": r[6],
             "location": f"{r[7]}, {r[8]}",
-            "reporter_id": r[9]
+            "reporter_id": r[9],
+            # duplicate-case pairs: submitted_image is the other case's photo (/uploads)
+            "type": "duplicate" if r[11] else "sighting",
+            "score": r[10],
+            "matched_case_id": r[11],
+            "matched_case_name": r[12]
         }
         for r in rows
     ]
@@ -767,12 +990,27 @@ def get_potential_matches(current_user = Depends(check_admin_role)):
 @app.post("/admin/matches/{match_id}/confirm")
 def confirm_match(match_id: int, current_user = Depends(check_admin_role)):
     # Get match details
-    cursor.execute("SELECT case_id, submitted_image FROM potential_matches WHERE id = %s", (match_id,))
+    cursor.execute("SELECT case_id, submitted_image, matched_case_id FROM potential_matches WHERE id = %s", (match_id,))
     match = cursor.fetchone()
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
         
     case_id = match[0]
+
+    if match[2]:
+        # duplicate-case pair from find_duplicate_cases.py: link the two
+        # records, nobody has been found so the reporter is not notified
+        cursor.execute("UPDATE potential_matches SET status = 'merged' WHERE id = %s", (match_id,))
+        for a, b in ((case_id, match[2]), (match[2], case_id)):
+            cursor.execute(
+                """
+                INSERT INTO case_timeline (case_id, title, description, status)
+                VALUES (%s, %s, %s, 'under-review')
+                """,
+                (a, "Duplicate Case Linked", f"Administrative review marked this case as a duplicate of {b}.",)
+            )
+        conn.commit()
+        return {"success": True, "message": "Cases marked as duplicates."}
     
     # 1. Update Match Status
     cursor.execute("UPDATE potential_matches SET status = 'confirmed' WHERE id = %s", (match_id,))
@@ -808,7 +1046,15 @@ def confirm_match(match_id: int, current_user = Depends(check_admin_role)):
 
 @app.post("/admin/matches/{match_id}/reject")
 def reject_match(match_id: int, current_user = Depends(check_admin_role)):
-    cursor.execute("UPDATE potential_matches SET status = 'rejected' WHERE id = %s", (match_id,))
+    # duplicate-case pairs are dismissed rather than rejected
+    cursor.execute(
+        """
+        UPDATE potential_matches
+        SET status = CASE WHEN matched_case_id IS NOT NULL THEN 'dismissed' ELSE 'rejected' END
+        WHERE id = %s
+        """,
+        (match_id,)
+    )
     
     # Optional: Notify user who submitted? (If we tracked who submitted, which is 'Anonymous' currently in frontend logic)
     # For now just update status.
@@ -818,6 +1064,7 @@ def reject_match(match_id: int, current_user = Depends(check_admin_role)):
 
 @app.post("/report/missing")
 async def report_missing(
+    background_tasks: BackgroundTasks,
     name: str = Form(...),
     gender: str = Form(...),
     birth_year: int = Form(...),
@@ -833,28 +1080,29 @@ async def report_missing(
         filename = f"{final_person_id}.jpg"
         image_path = os.path.join(IMAGES_DIR, filename)
 
-        with open(image_path, "wb") as f:
-            f.write(await photo.read())
+        # streamed to disk and decoded once from the upload buffer
+        stored = await save_upload(photo, image_path, decode=True)
+        img = stored.image
 
-        # Proper image handling (avoid file-lock issues)
-        with Image.open(image_path) as im:
-            img = im.convert("RGB")
-
-        embedding = get_embedding(img)
+        embedding = await run_in_threadpool(ml.embed, img)
         if embedding is None:
             raise HTTPException(status_code=400, detail="No face detected in uploaded image")
 
+        # the new case shows up in the /cases grid right away; rendered after the
+        # response (in the threadpool) from the image decoded above
+        background_tasks.add_task(image_variants.generate_all, "uploads", filename, img)
+
         # Ensure embedding is a plain Python list of floats
         vector = embedding.tolist() if hasattr(embedding, "tolist") else list(embedding)
 
-        qdrant.upsert(
-            collection_name=QDRANT_COLLECTION,
+        vector_store.upsert(
             points=[
                 {
                     "id": uuid.uuid4().int >> 64,
                     "vector": vector,
                     "payload": {
-                        "FinalPersonId": final_person_id
+                        "FinalPersonId": final_person_id,
+                        "ingested_at": time.time()
                     },
                 }
             ],
@@ -871,7 +1119,6 @@ async def report_missing(
                 district,
                 police_station,
                 tracing_status,
-                tracing_status,
                 image_file,
                 reporter_id
             )
@@ -886,7 +1133,6 @@ async def report_missing(
                 district.upper(),
                 police_station.upper(),
                 "Untraced",
-                "Untraced",
                 filename,
                 current_user[0]
             ),
@@ -903,12 +1149,8 @@ async def report_missing(
 
         # 2. Automated Match Check (to notify Police)
         # Search Qdrant for existing faces that might match this new one
-        # logic: search qdrant with the NEW vector
-        search_results = qdrant.search(
-            collection_name=QDRANT_COLLECTION,
-            query_vector=vector,
-            limit=5
-        )
+        # logic: search the vector store with the NEW vector
+        search_results = vector_store.search(vector, limit=5)
         
         match_found = False
         for r in search_results:
@@ -921,16 +1163,19 @@ async def report_missing(
         
         if match_found:
             # Notify ALL Police/Admins
-            cursor.execute("SELECT id FROM users WHERE role IN ('admin', 'police')")
-            police_users = cursor.fetchall()
-            for (p_id,) in police_users:
-                cursor.execute(
-                    """
-                    INSERT INTO notifications (user_id, title, message, type)
-                    VALUES (%s, %s, %s, %s)
-                    """,
-                    (p_id, "Potential Match Found", f"A new case ({name}) matches an existing record.", "match")
-                )
+            with span("report.notify_police") as s:
+                cursor.execute("SELECT id FROM users WHERE role IN ('admin', 'police')")
+                police_users = cursor.fetchall()
+                if s is not None:
+                    s.set("notified", len(police_users))
+                for (p_id,) in police_users:
+                    cursor.execute(
+                        """
+                        INSERT INTO notifications (user_id, title, message, type)
+                        VALUES (%s, %s, %s, %s)
+                        """,
+                        (p_id, "Potential Match Found", f"A new case ({name}) matches an existing record.", "match")
+                    )
                 
         conn.commit()
 
@@ -1132,6 +1377,7 @@ def get_cases(
                 "police_station": r[6],
                 "tracing_status": r[7],
                 "image_file": r[8],
+                "thumbnail_url": f"/images/uploads/thumb/{r[8]}" if r[8] else None,
                 # "created_at": r[9] # if we want to return it
             }
             for r in rows
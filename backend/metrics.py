@@ -0,0 +1,230 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# ======================
+# PROMETHEUS METRICS (IN-PROCESS)
+# ======================
+# Minimal Counter / Gauge / Histogram with labels and the Prometheus text
+# exposition format, served on /metrics; no client library, no collector.
+#
+#   SEARCH_SECONDS.observe(0.012, backend="qdrant", op="search")
+#   with FACE_STAGE_SECONDS.time(stage="detect"):
+#       ...
+#
+# Gauges can also be computed at scrape time (set_function), which is how
+# cache hit counts and queue depths owned by other modules are exported.
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        self._function = None
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def set_function(self, fn):
+        """fn() -> value, or {label tuple: value} for labelled metrics; evaluated per scrape."""
+        self._function = fn
+        return self
+
+    def _samples(self):
+        if self._function is not None:
+            result = self._function()
+            if isinstance(result, dict):
+                return [(self.name, key if isinstance(key, tuple) else (key,), None, v) for key, v in result.items()]
+            return [(self.name, (), None, result)]
+        with self._lock:
+            return [(self.name, key, None, value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, key, extra, value in self._samples():
+            lines.append(f"{name}{_labels(self.labelnames, key, extra)} {_fmt(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        samples = []
+        with self._lock:
+            items = [(key, [list(s[0]), s[1], s[2]]) for key, s in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                samples.append((f"{self.name}_bucket", key, {"le": _fmt(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", key, None, total))
+            samples.append((f"{self.name}_count", key, None, count))
+        return samples
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        try:
+            lines.extend(metric.render())
+        except Exception as e:
+            lines.append(f"# {metric.name} unavailable: {_escape(e)}")
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ======================
+# METRICS
+# ======================
+HTTP_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency by route",
+                         ["method", "route", "status"])
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served")
+
+FACE_STAGE_SECONDS = Histogram("face_stage_duration_seconds", "Face pipeline stage latency",
+                               ["stage"])
+EMBED_QUEUE_DEPTH = Gauge("embedding_queue_depth", "Requests waiting for or running face inference")
+
+VECTOR_SECONDS = Histogram("vector_store_duration_seconds", "Vector store call latency",
+                           ["backend", "op"])
+
+SQL_SECONDS = Histogram("db_query_duration_seconds", "PostgreSQL query latency by named query",
+                        ["query"])
+DB_IN_FLIGHT = Gauge("db_queries_in_flight", "Queries running on the shared connection")
+DB_POOL_SIZE = Gauge("db_pool_size", "Database connections available to this worker")
+
+PASSWORD_QUEUE_DEPTH = Gauge("password_hash_queue_depth", "bcrypt calls waiting for or running on the pool")
+
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and result",
+                         ["cache", "result"])
+
+_cache_sources = {}
+
+
+def register_cache(name, cache):
+    """cache: any object with `hits` / `misses` counters."""
+    _cache_sources[name] = cache
+
+
+CACHE_REQUESTS.set_function(lambda: {
+    key: value
+    for name, cache in _cache_sources.items()
+    for key, value in (((name, "hit"), cache.hits), ((name, "miss"), cache.misses))
+})
+
+
+# ======================
+# FASTAPI WIRING
+# ======================
+def instrument(app):
+    """Per-route latency / in-flight middleware and GET /metrics on a FastAPI app."""
+    from fastapi import Request, Response
+
+    @app.middleware("http")
+    async def record_http(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        HTTP_IN_FLIGHT.inc()
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # route template, not the raw path, so ids do not explode the label set
+            route = request.scope.get("route")
+            HTTP_SECONDS.observe(time.perf_counter() - start, method=request.method,
+                                 route=getattr(route, "path", "unmatched"), status=status)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(render(), media_type=CONTENT_TYPE)
+
+    return app
@@ -0,0 +1,149 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from metrics import EMBED_QUEUE_DEPTH
+from tracing import span, traceparent, SPAN_KIND_CLIENT
+from config import ML_SERVICE_URL, ML_TIMEOUT, ML_CONNECT_TIMEOUT, ML_MAX_CONNECTIONS
+
+# ======================
+# ML CLIENT
+# ======================
+# main.py talks to the face models through one of these:
+#
+#   ML_SERVICE_URL=""                      -> InProcessML (models in this process, dev default)
+#   ML_SERVICE_URL=http://ml:8001          -> RemoteML over HTTP (ml_service.py)
+#   ML_SERVICE_URL=unix:///run/ml.sock     -> RemoteML over a Unix socket
+#
+# Images cross the wire as raw RGB pixels (already decoded and downscaled to
+# detection size by preprocess.py), so the ML tier never re-decodes JPEGs
+# and results are bit-identical to the in-process path.
+#
+# Both clients block (inference or an HTTP round trip): async handlers call
+# them through run_in_threadpool, never directly on the event loop.
+
+
+@dataclass
+class DetectedFace:
+    bbox: np.ndarray
+    det_score: float
+    embedding: np.ndarray
+
+
+def encode_pixels(image):
+    """PIL image / HxWx3 uint8 array -> (body, headers)."""
+    arr = np.ascontiguousarray(np.asarray(image, dtype=np.uint8))
+    h, w = arr.shape[:2]
+    return arr.tobytes(), {"Content-Type": "application/octet-stream", "X-Image-Shape": f"{h},{w},3"}
+
+
+def decode_pixels(body, dims):
+    """Inverse of encode_pixels; ValueError unless body is exactly prod(dims) bytes of ...x3 pixels."""
+    if not dims or dims[-1] != 3 or min(dims) < 1 or len(body) != int(np.prod(dims)):
+        raise ValueError(f"{len(body)} bytes do not match shape {dims}")
+    return np.frombuffer(body, dtype=np.uint8).reshape(dims)
+
+
+class InProcessML:
+    def __init__(self):
+        # imported here so CRUD-only workers never load insightface / onnxruntime
+        import face
+        self._face = face
+
+    def embed(self, image):
+        with EMBED_QUEUE_DEPTH.track_inprogress():
+            return self._face.get_embedding(image)
+
+    def embed_faces(self, image):
+        with EMBED_QUEUE_DEPTH.track_inprogress():
+            faces = self._face.get_faces(image)
+        return [DetectedFace(np.asarray(f.bbox), float(f.det_score), f.embedding) for f in faces]
+
+    def embed_aligned(self, crops):
+        with EMBED_QUEUE_DEPTH.track_inprogress():
+            return self._face.embed_aligned(crops)
+
+    def warm_up(self):
+        self._face.warm_up()
+
+    def status(self):
+        return self._face.face_models.status()
+
+    def close(self):
+        pass
+
+
+class RemoteML:
+    def __init__(self, url=ML_SERVICE_URL, timeout=ML_TIMEOUT):
+        import httpx
+
+        if url.startswith("unix://"):
+            transport = httpx.HTTPTransport(uds=url[len("unix://"):])
+            base_url = "http://ml"
+        else:
+            transport = httpx.HTTPTransport(retries=1)
+            base_url = url
+        # one pooled client per process: keep-alive connections are reused
+        self._client = httpx.Client(
+            base_url=base_url,
+            transport=transport,
+            timeout=httpx.Timeout(timeout, connect=ML_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=ML_MAX_CONNECTIONS,
+                                max_keepalive_connections=ML_MAX_CONNECTIONS),
+        )
+        self._state = {"state": "not_initialized"}
+
+    def _post(self, path, image):
+        body, headers = encode_pixels(image)
+        with span(f"ml{path}", SPAN_KIND_CLIENT), EMBED_QUEUE_DEPTH.track_inprogress():
+            # ml_service continues this trace
+            parent = traceparent()
+            if parent:
+                headers["traceparent"] = parent
+            response = self._client.post(path, content=body, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    def embed(self, image):
+        emb = self._post("/embed", image)["embedding"]
+        return None if emb is None else np.asarray(emb, dtype=np.float32)
+
+    def embed_faces(self, image):
+        return [
+            DetectedFace(np.asarray(f["bbox"]), f["det_score"], np.asarray(f["embedding"], dtype=np.float32))
+            for f in self._post("/embed-faces", image)["faces"]
+        ]
+
+    def embed_aligned(self, crops):
+        batch = np.stack([np.asarray(c, dtype=np.uint8) for c in crops])
+        body = batch.tobytes()
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "X-Image-Shape": ",".join(str(v) for v in batch.shape),
+        }
+        with span("ml/batch-embed", SPAN_KIND_CLIENT), EMBED_QUEUE_DEPTH.track_inprogress():
+            parent = traceparent()
+            if parent:
+                headers["traceparent"] = parent
+            response = self._client.post("/batch-embed", content=body, headers=headers)
+        response.raise_for_status()
+        return [np.asarray(e, dtype=np.float32) for e in response.json()["embeddings"]]
+
+    def warm_up(self):
+        # the service warms itself up; this just records whether it is reachable
+        self.status()
+
+    def status(self):
+        try:
+            response = self._client.get("/readyz")
+            self._state = response.json().get("face_model", {"state": "unknown"})
+        except Exception as e:
+            self._state = {"state": "error", "error": str(e)}
+        return self._state
+
+    def close(self):
+        self._client.close()
+
+
+def make_ml_client(url=ML_SERVICE_URL):
+    return RemoteML(url) if url else InProcessML()
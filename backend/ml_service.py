@@ -0,0 +1,112 @@
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+
+from config import MODEL_WARMUP, SEARCH_MIN_SCORE, SEARCH_HNSW_EF
+from face import get_embedding, get_faces, embed_aligned, face_models, warm_up
+from ml_client import decode_pixels
+from metrics import instrument
+from tracing import trace_requests
+
+# ======================
+# ML INFERENCE SERVICE
+# ======================
+# Face models (+ vector search) as a separate internal service, so the
+# CPU-heavy tier scales apart from the CRUD API:
+#
+#   uvicorn ml_service:app --port 8001                 # HTTP
+#   uvicorn ml_service:app --uds /run/ml.sock          # same host, no TCP
+#
+# and point the API at it with ML_SERVICE_URL (see ml_client.py).
+# Request bodies are raw RGB pixels with an X-Image-Shape: h,w,3 header.
+# Inference runs in the threadpool, so /healthz and /readyz answer while the
+# models are busy.
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if MODEL_WARMUP:
+        warm_up()
+    yield
+
+
+app = FastAPI(title="LostBuddy ML Service", lifespan=lifespan)
+instrument(app)
+trace_requests(app, "lostbuddy-ml")
+
+
+async def read_pixels(request: Request, layout="h,w,3"):
+    shape = request.headers.get("x-image-shape")
+    if not shape:
+        raise HTTPException(status_code=400, detail="X-Image-Shape header required")
+    try:
+        dims = [int(v) for v in shape.split(",")]
+    except ValueError:
+        dims = []
+    if len(dims) != len(layout.split(",")):
+        raise HTTPException(status_code=400, detail=f"X-Image-Shape must be {layout}")
+    try:
+        return decode_pixels(await request.body(), dims)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body does not match X-Image-Shape")
+
+
+def face_json(face):
+    return {
+        "bbox": [float(v) for v in face.bbox],
+        "det_score": float(face.det_score),
+        "embedding": face.embedding.tolist(),
+    }
+
+
+@app.post("/embed")
+async def embed(request: Request):
+    emb = await run_in_threadpool(get_embedding, await read_pixels(request))
+    return {"embedding": None if emb is None else emb.tolist()}
+
+
+@app.post("/embed-faces")
+async def embed_faces(request: Request):
+    faces = await run_in_threadpool(get_faces, await read_pixels(request))
+    return {"faces": [face_json(f) for f in faces]}
+
+
+@app.post("/batch-embed")
+async def batch_embed(request: Request):
+    """Aligned 112x112 crops, body shape n,112,112,3."""
+    crops = await read_pixels(request, layout="n,h,w,3")
+    embeddings = await run_in_threadpool(embed_aligned, list(crops))
+    return {"embeddings": [e.tolist() for e in embeddings]}
+
+
+@app.post("/search")
+async def search(
+    request: Request,
+    top: int = Query(5, ge=1, le=100),
+    min_score: float = Query(SEARCH_MIN_SCORE, ge=0.0, le=1.0),
+    ef: Optional[int] = Query(None, ge=1),
+):
+    """Embed the largest face and search the collection in one hop."""
+    from db import vector_store
+
+    emb = await run_in_threadpool(get_embedding, await read_pixels(request))
+    if emb is None:
+        return {"hits": [], "message": "No face detected"}
+    hits = await run_in_threadpool(vector_store.search, emb.tolist(), limit=top,
+                                   ef=max(ef or SEARCH_HNSW_EF, top), score_threshold=min_score)
+    return {"hits": [{"id": str(h.id), "score": h.score, "payload": h.payload} for h in hits]}
+
+
+@app.get("/healthz")
+def liveness():
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+def readiness():
+    status = face_models.status()
+    ready = status["state"] == "ready" or not MODEL_WARMUP
+    return JSONResponse(status_code=200 if ready else 503, content={"ready": ready, "face_model": status})
@@ -0,0 +1,150 @@
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# ======================
+# LOCAL ZIPNET MOCK
+# ======================
+# Serves a tiny stand-in for the Zipnet missing-persons page plus the
+# DataTables server-side JSON endpoint, so auto_scraping_resume_safe.py can
+# be exercised without touching the real site:
+#
+#   python mock_zipnet_server.py --records 1200 --latency 0.05-0.6
+#   ZIPNET_URL=http://127.0.0.1:8099/Victims/MissingPersons HEADLESS=1 \
+#       python auto_scraping_resume_safe.py
+
+PAGE_HTML = """<!doctype html>
+<html>
+<body>
+<select name="missingPersonGrid_length">
+  <option value="10">10</option>
+  <option value="25">25</option>
+  <option value="50">50</option>
+  <option value="100">100</option>
+</select>
+<table id="missingPersonGrid"><tbody></tbody></table>
+<script>
+// Minimal DataTables-compatible shim: just enough of the API the scraper uses
+(function () {
+  var grid = {start: 0, length: 10, draw: 0};
+  function load() {
+    grid.draw += 1;
+    var body = new URLSearchParams({
+      draw: grid.draw, start: grid.start, length: grid.length
+    });
+    return fetch("/Victims/GetMissingPersonsData", {
+      method: "POST",
+      headers: {"Content-Type": "application/x-www-form-urlencoded",
+                "X-Requested-With": "XMLHttpRequest"},
+      body: body.toString()
+    }).then(function (r) { return r.json(); });
+  }
+  var api = {
+    page: function (n) { grid.start = n * grid.length; return api; },
+    draw: function () { load(); return api; }
+  };
+  window.$ = function () { return {DataTable: function () { return api; }}; };
+  document.querySelector("select[name='missingPersonGrid_length']")
+    .addEventListener("change", function (e) {
+      grid.length = parseInt(e.target.value, 10);
+      grid.start = 0;
+      load();
+    });
+  load();
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def make_records(n):
+    return [
+        {
+            "MissingPersonId": 100000 + i,
+            "Name": f"PERSON {i}",
+            "Sex": random.choice(["Male", "Female"]),
+            "BirthYear": random.randint(1950, 2020),
+            "State": "DELHI",
+            "District": "NEW DELHI",
+            "PoliceStation": "CONNAUGHT PLACE",
+            "TracingStatus": "Untraced",
+            "ImageUrls": f"/Images/MissingPersons/{100000 + i}.jpg",
+        }
+        for i in range(n)
+    ]
+
+
+class ZipnetHandler(BaseHTTPRequestHandler):
+    records = []
+    latency = (0.0, 0.0)
+    fail_rate = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _grid_data(self, params):
+        time.sleep(random.uniform(*self.latency))
+        if random.random() < self.fail_rate:
+            return self._send(500, "{}", "application/json")
+
+        start = int(params.get("start", ["0"])[0])
+        length = int(params.get("length", ["10"])[0])
+        self._send(200, json.dumps({
+            "draw": int(params.get("draw", ["1"])[0]),
+            "recordsTotal": len(self.records),
+            "recordsFiltered": len(self.records),
+            "data": self.records[start:start + length],
+        }), "application/json")
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.endswith("/MissingPersons"):
+            return self._send(200, PAGE_HTML, "text/html")
+        if url.path.endswith("/GetMissingPersonsData"):
+            return self._grid_data(parse_qs(url.query))
+        self._send(404, "not found", "text/plain")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if not url.path.endswith("/GetMissingPersonsData"):
+            return self._send(404, "not found", "text/plain")
+        size = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(size).decode("utf-8")
+        if raw.strip().startswith("{"):
+            params = {k: [str(v)] for k, v in json.loads(raw).items()}
+        else:
+            params = parse_qs(raw)
+        self._grid_data(params)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Zipnet DataTables mock")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--records", type=int, default=1000)
+    parser.add_argument("--latency", default="0.05-0.5",
+                        help="per-request latency range in seconds, e.g. 0.05-0.5")
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="fraction of data requests answered with HTTP 500")
+    args = parser.parse_args()
+
+    lo, _, hi = args.latency.partition("-")
+    ZipnetHandler.records = make_records(args.records)
+    ZipnetHandler.latency = (float(lo), float(hi or lo))
+    ZipnetHandler.fail_rate = args.fail_rate
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), ZipnetHandler)
+    print(f"🧪 Mock Zipnet on http://127.0.0.1:{args.port}/Victims/MissingPersons "
+          f"({args.records} records)")
+    server.serve_forever()
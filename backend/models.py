@@ -0,0 +1,124 @@
+import hashlib
+import os
+
+import onnxruntime as ort
+
+from config import (
+    FACE_MODEL_NAME,
+    ORT_INTRA_OP_THREADS,
+    ORT_INTER_OP_THREADS,
+    ORT_CACHE_DIR,
+    ORT_MEM_ARENA,
+    RECOGNIZER_VARIANT,
+)
+
+# ======================
+# ONNX RUNTIME MODEL LOADING
+# ======================
+# face.py used FaceAnalysis(...).prepare(ctx_id=-1), i.e. default sessions:
+# every uvicorn worker spawns one ORT thread per core (N workers -> N x cores
+# threads fighting), and the graph is re-optimized on every start.
+#
+# Here each session gets:
+#   - intra-op threads = cores / WEB_CONCURRENCY (or ORT_INTRA_OP_THREADS)
+#   - graph optimization up to ORT_ENABLE_EXTENDED once, serialized to
+#     ORT_CACHE_DIR (that level is hardware-independent, so the cache can be
+#     shared or baked into an image); later starts load it and only apply the
+#     cheap machine-specific layout pass (ORT_ENABLE_ALL) in memory
+#   - optional int8 (dynamic quantization) recognizer, RECOGNIZER_VARIANT=int8
+#
+# Only the two models the API uses are loaded (buffalo_s file names below).
+
+MODEL_FILES = {
+    "buffalo_s": {"detection": "det_500m.onnx", "recognition": "w600k_mbf.onnx"},
+    "buffalo_l": {"detection": "det_10g.onnx", "recognition": "w600k_r50.onnx"},
+}
+
+
+def model_dir(name=FACE_MODEL_NAME):
+    from insightface.utils.storage import ensure_available
+
+    # downloads the pack on first use, same as FaceAnalysis
+    return ensure_available("models", name, root="~/.insightface")
+
+
+def _file_key(path):
+    st = os.stat(path)
+    raw = f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}:{ort.__version__}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+def session_options(intra_threads=ORT_INTRA_OP_THREADS, inter_threads=ORT_INTER_OP_THREADS):
+    so = ort.SessionOptions()
+    so.intra_op_num_threads = intra_threads
+    so.inter_op_num_threads = inter_threads
+    so.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    so.enable_cpu_mem_arena = ORT_MEM_ARENA
+    return so
+
+
+def create_session(model_path, cache_dir=ORT_CACHE_DIR, **thread_kwargs):
+    """CPU session; the optimized graph is cached per (model file, ORT version).
+    Every worker may race to build the cache: each writes its own temp file and
+    os.replace() makes one of them win atomically."""
+    so = session_options(**thread_kwargs)
+    providers = ["CPUExecutionProvider"]
+
+    if not cache_dir:
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(model_path, sess_options=so, providers=providers)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    optimized = os.path.join(cache_dir, f"{name}.{_file_key(model_path)}.ext.onnx")
+
+    if not os.path.exists(optimized):
+        build = session_options(**thread_kwargs)
+        build.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+        build.optimized_model_filepath = f"{optimized}.{os.getpid()}.tmp"
+        ort.InferenceSession(model_path, sess_options=build, providers=providers)
+        if os.path.exists(build.optimized_model_filepath):
+            os.replace(build.optimized_model_filepath, optimized)
+
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    source = optimized if os.path.exists(optimized) else model_path
+    return ort.InferenceSession(source, sess_options=so, providers=providers)
+
+
+def quantized_recognizer(model_path, cache_dir=ORT_CACHE_DIR):
+    """int8 weights via dynamic quantization, built once and cached."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    out_dir = cache_dir or os.path.dirname(model_path)
+    os.makedirs(out_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(model_path))[0]
+    target = os.path.join(out_dir, f"{name}.{_file_key(model_path)}.int8.onnx")
+    if not os.path.exists(target):
+        tmp = f"{target}.{os.getpid()}.tmp"
+        quantize_dynamic(model_path, tmp, weight_type=QuantType.QUInt8)
+        os.replace(tmp, target)
+    return target
+
+
+def load_detector(name=FACE_MODEL_NAME, det_size=640, det_thresh=0.5, **thread_kwargs):
+    from insightface.model_zoo.retinaface import RetinaFace
+
+    path = os.path.join(model_dir(name), MODEL_FILES[name]["detection"])
+    det = RetinaFace(model_file=path, session=create_session(path, **thread_kwargs))
+    det.prepare(-1, input_size=(det_size, det_size), det_thresh=det_thresh)
+    return det
+
+
+def load_recognizer(name=FACE_MODEL_NAME, variant=RECOGNIZER_VARIANT, **thread_kwargs):
+    from insightface.model_zoo.arcface_onnx import ArcFaceONNX
+
+    path = os.path.join(model_dir(name), MODEL_FILES[name]["recognition"])
+    session_path = quantized_recognizer(path) if variant == "int8" else path
+    # model_file stays the fp32 graph: ArcFaceONNX reads its input mean/std from it
+    rec = ArcFaceONNX(model_file=path, session=create_session(session_path, **thread_kwargs))
+    rec.prepare(-1)
+    return rec
+
+
+def load_face_models(name=FACE_MODEL_NAME):
+    return load_detector(name), load_recognizer(name)
@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, Request
+from passlib.context import CryptContext
+
+from metrics import PASSWORD_QUEUE_DEPTH
+from config import (
+    BCRYPT_ROUNDS,
+    BCRYPT_WORKERS,
+    BCRYPT_MAX_PENDING,
+    BCRYPT_QUEUE_TIMEOUT,
+    AUTH_RATE_LIMIT,
+    AUTH_IP_RATE_LIMIT,
+    AUTH_RATE_WINDOW,
+    TRUSTED_PROXIES,
+)
+
+# ======================
+# PASSWORD HASHING
+# ======================
+# bcrypt costs ~100-300 ms of CPU per call. The async endpoints (login,
+# register) run it on a small dedicated pool instead of the event loop, with
+# at most BCRYPT_MAX_PENDING calls queued per worker: beyond that clients get
+# a fast 503 rather than everyone waiting. Failed login/register attempts
+# are throttled per account and per client IP (see below).
+#
+# Hashes whose cost differs from BCRYPT_ROUNDS are re-hashed transparently on
+# the next successful login (verify_and_update).
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_pool = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_slots = None
+
+
+def _semaphore():
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(BCRYPT_MAX_PENDING)
+    return _slots
+
+
+async def _offload(fn, *args):
+    slots = _semaphore()
+    with PASSWORD_QUEUE_DEPTH.track_inprogress():
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=BCRYPT_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Server busy, please retry",
+                                headers={"Retry-After": "1"})
+        try:
+            return await asyncio.get_running_loop().run_in_executor(_pool, fn, *args)
+        finally:
+            slots.release()
+
+
+# sync endpoints (already on a threadpool) and the startup admin seed
+def hash_password_sync(password):
+    return pwd_context.hash(password)
+
+
+async def hash_password(password):
+    return await _offload(pwd_context.hash, password)
+
+
+async def verify_password(password, hashed):
+    """(ok, new_hash); new_hash is set when the stored hash should be upgraded."""
+    return await _offload(pwd_context.verify_and_update, password, hashed)
+
+
+# ======================
+# FAILED-ATTEMPT THROTTLE
+# ======================
+# Only failures count, so a police station's shift change behind one NAT
+# address logs in fine. An account locks after AUTH_RATE_LIMIT failures per
+# window, a client IP after AUTH_IP_RATE_LIMIT. Behind a reverse proxy
+# listed in TRUSTED_PROXIES the client IP comes from X-Forwarded-For.
+class RateLimiter:
+    """Sliding window: at most `limit` recorded events per `window` seconds per key."""
+
+    def __init__(self, limit=AUTH_RATE_LIMIT, window=AUTH_RATE_WINDOW):
+        self.limit = limit
+        self.window = window
+        self._calls = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def _prune(self, key, now):
+        calls = self._calls.get(key)
+        while calls and calls[0] <= now - self.window:
+            calls.popleft()
+        if calls is not None and not calls:
+            del self._calls[key]
+        return calls or ()
+
+    def retry_after(self, key):
+        """0 if the key is under its limit, else seconds until it will be."""
+        now = time.monotonic()
+        with self._lock:
+            calls = self._prune(key, now)
+            if len(calls) >= self.limit:
+                return max(1, int(calls[0] + self.window - now) + 1)
+            return 0
+
+    def record(self, key):
+        now = time.monotonic()
+        with self._lock:
+            self._prune(key, now)
+            self._calls[key].append(now)
+            if len(self._calls) > 10_000:
+                # drop idle keys so the table does not grow without bound
+                for k in list(self._calls):
+                    self._prune(k, now)
+
+
+auth_ip_limiter = RateLimiter(limit=AUTH_IP_RATE_LIMIT)
+auth_account_limiter = RateLimiter()
+
+
+def client_ip(request: Request, trusted=TRUSTED_PROXIES):
+    """Peer address, or the nearest untrusted X-Forwarded-For hop behind a trusted proxy."""
+    ip = request.client.host if request.client else "unknown"
+    if ip not in trusted:
+        return ip
+    hops = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+    for hop in reversed(hops):
+        if hop not in trusted:
+            return hop
+    return hops[0] if hops else ip
+
+
+def _account_key(username):
+    return (username or "").strip().lower()
+
+
+def _reject(wait):
+    raise HTTPException(status_code=429, detail="Too many attempts, slow down",
+                        headers={"Retry-After": str(wait)})
+
+
+def throttle_auth(request: Request):
+    """Dependency for login / register: refuses client IPs with too many recent failures."""
+    wait = auth_ip_limiter.retry_after(client_ip(request))
+    if wait:
+        _reject(wait)
+
+
+def throttle_account(username):
+    """Call before checking a password for `username`."""
+    wait = auth_account_limiter.retry_after(_account_key(username))
+    if wait:
+        _reject(wait)
+
+
+def record_auth_failure(request: Request, username=None):
+    auth_ip_limiter.record(client_ip(request))
+    if username:
+        auth_account_limiter.record(_account_key(username))
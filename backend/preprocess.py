@@ -0,0 +1,47 @@
+import numpy as np
+from PIL import Image, ImageOps
+
+from config import PREPROCESS_MAX_SIDE
+
+# ======================
+# PRE-DETECTION PREPROCESSING
+# ======================
+# InsightFace letterboxes every image to det_size (640) before detection, so
+# decoding a 12-MP phone photo at full resolution is wasted work. Here:
+#
+#   1. JPEG draft mode: libjpeg scales by 1/2..1/8 during the DCT, so only
+#      ~max_side pixels are ever decoded
+#   2. EXIF orientation applied (phones store portraits rotated)
+#   3. one resize down to max_side
+#
+# The detector gets np.asarray(image): one allocation per image. (Copying
+# into a reused buffer saved nothing -- PIL still materializes the pixels
+# first -- and handed out views that the next decode overwrote.)
+#
+# Crowd / CCTV frames (/search?multi=true) are decoded at MULTI_FACE_MAX_SIDE
+# instead, where faces are small.
+
+def decode(fp, max_side=PREPROCESS_MAX_SIDE):
+    """Open an image path / file object as an upright RGB image no larger than max_side."""
+    with Image.open(fp) as im:
+        if max_side:
+            im.draft("RGB", (max_side, max_side))
+        img = ImageOps.exif_transpose(im).convert("RGB")
+
+    if max_side and max(img.size) > max_side:
+        scale = max_side / max(img.size)
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        # reducing_gap: integer box-reduce first, then a cheap bilinear pass
+        img = img.resize(size, Image.BILINEAR, reducing_gap=2.0)
+    return img
+
+
+def to_array(image):
+    """HxWx3 uint8 array of `image` (arrays are passed through); safe to keep."""
+    if isinstance(image, np.ndarray):
+        return image
+    return np.asarray(image)
+
+
+def load_for_detection(fp, max_side=PREPROCESS_MAX_SIDE):
+    return to_array(decode(fp, max_side))
@@ -0,0 +1,164 @@
+import csv
+import json
+import os
+
+# ======================
+# APPEND-ONLY RECORD LOG
+# ======================
+# <name>.jsonl     one scraped record per line, only ever appended
+# <name>.ids       one MissingPersonId per line, the resume index
+#
+# Persisting a page costs O(page) instead of rewriting the whole dataset.
+# JSON / CSV exports are materialized from the log only when asked for.
+#
+# A crash mid-write leaves a torn last line; both files are cut back to
+# their last newline on open so the next append starts on a clean line.
+# The torn record's id was never written (ids go second), so it is retried.
+
+ID_FIELD = "MissingPersonId"
+
+
+class RecordLog:
+    def __init__(self, base_path):
+        self.jsonl_path = f"{base_path}.jsonl"
+        self.ids_path = f"{base_path}.ids"
+        self.seen_ids = set()
+        self.count = 0
+
+        for path in (self.jsonl_path, self.ids_path):
+            truncate_torn_tail(path)
+
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    pid = line.strip()
+                    if pid:
+                        self.seen_ids.add(pid)
+        elif os.path.exists(self.jsonl_path):
+            # index lost -> rebuild it once from the log
+            self._rebuild_index()
+
+        self.count = len(self.seen_ids)
+
+        self._records = open(self.jsonl_path, "a", encoding="utf-8")
+        self._ids = open(self.ids_path, "a", encoding="utf-8")
+
+    def _rebuild_index(self):
+        with open(self.ids_path, "w", encoding="utf-8") as out:
+            for r in iter_jsonl(self.jsonl_path):
+                pid = str(r.get(ID_FIELD) or "")
+                if pid and pid not in self.seen_ids:
+                    self.seen_ids.add(pid)
+                    out.write(pid + "\n")
+
+    def append(self, records):
+        """Append unseen records, returns how many were new."""
+        new = []
+        for r in records:
+            pid = r.get(ID_FIELD)
+            if pid is None:
+                continue
+            pid = str(pid)
+            if pid and pid not in self.seen_ids:
+                self.seen_ids.add(pid)
+                new.append((pid, r))
+
+        if not new:
+            return 0
+
+        # records first, then ids: a crash in between only costs a duplicate
+        # line in the log (dropped again on export), never a lost record
+        self._records.write("".join(
+            json.dumps(r, ensure_ascii=False) + "\n" for _, r in new
+        ))
+        self._records.flush()
+        self._ids.write("".join(pid + "\n" for pid, _ in new))
+        self._ids.flush()
+
+        self.count += len(new)
+        return len(new)
+
+    def import_json(self, json_path):
+        """One-off migration from the old rewrite-everything JSON file."""
+        with open(json_path, "r", encoding="utf-8") as f:
+            return self.append(json.load(f))
+
+    def close(self):
+        self._records.close()
+        self._ids.close()
+
+
+def truncate_torn_tail(path, chunk=64 * 1024):
+    """Cut `path` back to just after its last newline; returns bytes dropped."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - chunk)
+            f.seek(start)
+            block = f.read(end - start)
+            nl = block.rfind(b"\n")
+            if nl >= 0:
+                keep = start + nl + 1
+                break
+            end = start
+        else:
+            keep = 0
+        if keep < size:
+            f.truncate(keep)
+        return size - keep
+
+
+# ======================
+# EXPORTS (ON DEMAND)
+# ======================
+def iter_jsonl(path, unique=False):
+    seen = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                r = json.loads(line)
+            except json.JSONDecodeError:
+                # torn last line from an interrupted run
+                continue
+            if unique:
+                pid = r.get(ID_FIELD)
+                if pid in seen:
+                    continue
+                seen.add(pid)
+            yield r
+
+
+def export_json(jsonl_path, json_path):
+    n = 0
+    with open(json_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for r in iter_jsonl(jsonl_path, unique=True):
+            f.write(",\n" if n else "\n")
+            f.write(json.dumps(r, ensure_ascii=False))
+            n += 1
+        f.write("\n]\n")
+    return n
+
+
+def export_csv(jsonl_path, csv_path):
+    # pass 1: column union, pass 2: rows -> memory stays O(columns)
+    keys = set()
+    for r in iter_jsonl(jsonl_path):
+        keys.update(r.keys())
+    if not keys:
+        return 0
+
+    n = 0
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=sorted(keys))
+        writer.writeheader()
+        for r in iter_jsonl(jsonl_path, unique=True):
+            writer.writerow(r)
+            n += 1
+    return n
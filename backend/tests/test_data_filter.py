@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from data_filter import OutputWriter, REQUIRED_COLUMNS, dedup_images, explode_urls, finalize
+
+
+def test_explode_urls_formats():
+    urls = explode_urls(pd.Series(["['a.jpg', 'b.jpg']", "c.jpg;d.jpg", "[]", None, " e.jpg "]))
+    assert urls.tolist() == ["a.jpg", "b.jpg", "c.jpg", "d.jpg", "e.jpg"]
+    assert urls.index.tolist() == [0, 0, 1, 1, 4]
+
+
+def test_dedup_images_across_chunks():
+    seen = set()
+    first = pd.DataFrame({"Name": ["x", "y"], "ImageUrls": ["a;b", "['b', 'c']"]})
+    second = pd.DataFrame({"Name": ["z", "w", "v"], "ImageUrls": ["c", "d;a", "[]"]},
+                          index=[2, 3, 4])
+
+    df, with_images = dedup_images(first, seen)
+    assert with_images == 2
+    assert df["ImageUrls"].tolist() == ["a;b", "c"]
+
+    df, with_images = dedup_images(second, seen)
+    assert with_images == 2
+    assert df["Name"].tolist() == ["w"] and df["ImageUrls"].tolist() == ["d"]
+    assert seen == {"a", "b", "c", "d"}
+
+
+def test_finalize_shape():
+    df = finalize(pd.DataFrame({
+        "Name": ["x"], "Sex": ["male"], "BirthYear": ["19x0"], "Extra": [1], "ImageUrls": ["a"],
+    }))
+    assert list(df.columns) == [c for c in REQUIRED_COLUMNS if c in ("FinalPersonId", "Name", "Sex", "BirthYear", "ImageUrls")]
+    assert df["Sex"].iloc[0] == "Male"
+    assert pd.isna(df["BirthYear"].iloc[0]) and df["BirthYear"].dtype == "float64"
+    assert df["FinalPersonId"].iloc[0].startswith("FP_")
+
+
+@pytest.mark.parametrize("suffix", ["csv", "parquet"])
+def test_output_writer_appends_chunks(tmp_path, suffix):
+    path = str(tmp_path / f"out.{suffix}")
+    writer = OutputWriter(path)
+    for urls in (["a", "b"], ["c"]):
+        writer.write(finalize(pd.DataFrame({"Name": ["n"] * len(urls), "ImageUrls": urls})))
+    writer.close()
+
+    out = pd.read_parquet(path) if suffix == "parquet" else pd.read_csv(path)
+    assert out["ImageUrls"].tolist() == ["a", "b", "c"]
+    assert out["FinalPersonId"].nunique() == 3
@@ -0,0 +1,77 @@
+import numpy as np
+
+from identity_resolver import IdentityIndex, OUTPUT_FIELDS, VECTOR_SIZE, resolve_groups
+
+DIM = VECTOR_SIZE   # resolve_groups builds default-sized indexes
+
+
+def vec(*values):
+    v = np.zeros(DIM, dtype=np.float32)
+    v[:len(values)] = values
+    return v
+
+
+def test_similar_embeddings_share_an_identity():
+    index = IdentityIndex(threshold=0.9, dim=DIM)
+    assert index.assign([vec(1), vec(0, 1), vec(0.99, 0.05)]) == [0, 1, 0]
+    assert len(index) == 2
+
+
+def test_first_identity_over_threshold_wins_not_the_best():
+    index = IdentityIndex(threshold=0.7, dim=DIM)
+    assert index.assign([vec(1, 0), vec(0, 1)]) == [0, 1]
+    # scores 0.707 against both; the oldest identity is taken
+    assert index.assign([vec(1, 1)]) == [0]
+    # scores 0.6 / 0.8: only identity 1 passes
+    assert index.assign([vec(0.6, 0.8)]) == [1]
+
+
+def test_in_batch_matches_join_new_identities():
+    index = IdentityIndex(threshold=0.9, dim=DIM)
+    assert index.assign([vec(0, 0, 1), vec(0, 0, 1), vec(1)]) == [0, 0, 1]
+
+
+def test_capacity_grows():
+    rng = np.random.default_rng(0)
+    index = IdentityIndex(threshold=0.99, dim=DIM, capacity=2)
+    assert index.assign(rng.standard_normal((50, DIM))) == list(range(50))
+
+
+def groups_and_embeddings():
+    groups = {
+        "asha|delhi": [{"ImageUrls": ["a1", "a2", "broken"], "Name": "Asha",
+                        "SourceMissingPersonIds": "11;12"}],
+        "asha|mumbai": [{"ImageUrls": ["a3"], "Name": "Asha", "SourceMissingPersonIds": "13"}],
+    }
+    embeddings = {"a1": vec(1), "a2": vec(0, 1), "a3": vec(1)}
+
+    def embed_url(url):
+        if url == "broken":
+            raise IOError(url)
+        return embeddings[url]
+
+    return groups, embed_url
+
+
+def test_resolve_groups_per_group():
+    groups, embed_url = groups_and_embeddings()
+    rows = resolve_groups(groups, embed_url, threshold=0.9)
+
+    assert all(list(r) == OUTPUT_FIELDS for r in rows)
+    assert sorted(r["ImageUrls"] for r in rows) == ["a1", "a2", "a3"]
+    assert len({r["FinalPersonId"] for r in rows}) == 3
+
+
+def test_resolve_groups_cross_group_merges_same_face():
+    groups, embed_url = groups_and_embeddings()
+    rows = resolve_groups(groups, embed_url, threshold=0.9, cross_group=True)
+
+    merged = [r for r in rows if r["ImageUrls"] == "a1;a3"]
+    assert len(rows) == 2 and len(merged) == 1
+    assert merged[0]["SourceMissingPersonIds"] == "11;12;13"
+
+
+def test_resolve_groups_ids_are_deterministic():
+    groups, embed_url = groups_and_embeddings()
+    first = resolve_groups(groups, embed_url, threshold=0.9)
+    assert first == resolve_groups(groups, embed_url, threshold=0.9)
@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("passlib")
+
+from fastapi import HTTPException
+
+import passwords
+from passwords import RateLimiter, client_ip
+
+
+def request(peer, forwarded=None):
+    headers = {"x-forwarded-for": forwarded} if forwarded else {}
+    return SimpleNamespace(client=SimpleNamespace(host=peer), headers=headers)
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters(monkeypatch):
+    monkeypatch.setattr(passwords, "auth_ip_limiter", RateLimiter(limit=5, window=60))
+    monkeypatch.setattr(passwords, "auth_account_limiter", RateLimiter(limit=3, window=60))
+
+
+def test_limiter_counts_only_recorded_events():
+    limiter = RateLimiter(limit=2, window=60)
+    for _ in range(10):
+        assert limiter.retry_after("k") == 0
+    limiter.record("k")
+    limiter.record("k")
+    assert limiter.retry_after("k") > 0
+    assert limiter.retry_after("other") == 0
+
+
+def test_limiter_window_slides(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(passwords.time, "monotonic", lambda: now[0])
+    limiter = RateLimiter(limit=1, window=60)
+    limiter.record("k")
+    assert limiter.retry_after("k") == 61
+    now[0] += 61
+    assert limiter.retry_after("k") == 0
+
+
+def test_successful_attempts_behind_one_nat_are_not_throttled():
+    for _ in range(100):
+        passwords.throttle_auth(request("203.0.113.7"))
+
+
+def test_account_locks_after_failures_case_insensitively():
+    for _ in range(3):
+        passwords.throttle_account("Officer@Example.com")
+        passwords.record_auth_failure(request("203.0.113.7"), "officer@example.com ")
+    with pytest.raises(HTTPException) as exc:
+        passwords.throttle_account("OFFICER@example.com")
+    assert exc.value.status_code == 429
+    assert "Retry-After" in exc.value.headers
+    passwords.throttle_account("someone-else@example.com")
+
+
+def test_ip_locks_after_failures():
+    for i in range(5):
+        passwords.record_auth_failure(request("198.51.100.1"), f"user{i}@example.com")
+    with pytest.raises(HTTPException):
+        passwords.throttle_auth(request("198.51.100.1"))
+    passwords.throttle_auth(request("198.51.100.2"))
+
+
+def test_client_ip_ignores_forwarded_for_from_untrusted_peer():
+    assert client_ip(request("203.0.113.7", "1.2.3.4"), trusted=set()) == "203.0.113.7"
+
+
+def test_client_ip_takes_nearest_untrusted_hop_behind_trusted_proxies():
+    trusted = {"10.0.0.1", "10.0.0.2"}
+    # leftmost hop is client-controlled and must not be believed
+    req = request("10.0.0.1", "6.6.6.6, 198.51.100.9, 10.0.0.2")
+    assert client_ip(req, trusted=trusted) == "198.51.100.9"
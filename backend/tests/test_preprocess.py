@@ -0,0 +1,29 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from preprocess import decode, load_for_detection, to_array
+
+
+def png(color, size=(64, 48)):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, format="PNG")
+    buf.seek(0)
+    return buf
+
+
+def test_arrays_do_not_alias_across_calls():
+    images = [load_for_detection(png((c, 0, 0))) for c in (10, 100, 200)]
+    assert [int(img[0, 0, 0]) for img in images] == [10, 100, 200]
+
+
+def test_to_array_passes_arrays_through():
+    arr = np.zeros((4, 4, 3), dtype=np.uint8)
+    assert to_array(arr) is arr
+
+
+def test_decode_caps_longest_side():
+    img = decode(png((0, 0, 0), size=(2000, 1000)), max_side=640)
+    assert img.size == (640, 320)
+    assert to_array(img).shape == (320, 640, 3)
@@ -0,0 +1,76 @@
+import json
+
+from scrape_store import RecordLog, export_csv, export_json, iter_jsonl, truncate_torn_tail
+
+
+def records(*ids):
+    return [{"MissingPersonId": i, "Name": f"person {i}"} for i in ids]
+
+
+def test_append_skips_seen_ids_across_reopen(tmp_path):
+    base = str(tmp_path / "data")
+    log = RecordLog(base)
+    assert log.append(records(1, 2, 2)) == 2
+    log.close()
+
+    log = RecordLog(base)
+    assert log.count == 2
+    assert log.append(records(2, 3)) == 1
+    log.close()
+    assert [r["MissingPersonId"] for r in iter_jsonl(base + ".jsonl")] == [1, 2, 3]
+
+
+def test_torn_record_is_repaired_and_retried(tmp_path):
+    base = str(tmp_path / "data")
+    log = RecordLog(base)
+    log.append(records(1))
+    log.close()
+    # crash while writing record 2: partial line, id never reached .ids
+    with open(base + ".jsonl", "a", encoding="utf-8") as f:
+        f.write('{"MissingPersonId": 2, "Na')
+
+    log = RecordLog(base)
+    assert "2" not in log.seen_ids
+    assert log.append(records(2, 3)) == 2
+    log.close()
+    assert [r["MissingPersonId"] for r in iter_jsonl(base + ".jsonl")] == [1, 2, 3]
+
+
+def test_torn_id_line_does_not_merge_with_next_id(tmp_path):
+    base = str(tmp_path / "data")
+    log = RecordLog(base)
+    log.append(records(1))
+    log.close()
+    with open(base + ".ids", "a", encoding="utf-8") as f:
+        f.write("12")
+
+    log = RecordLog(base)
+    log.append(records(678))
+    log.close()
+    assert RecordLog(base).seen_ids == {"1", "678"}
+
+
+def test_index_rebuilt_from_log(tmp_path):
+    base = str(tmp_path / "data")
+    log = RecordLog(base)
+    log.append(records(5, 6))
+    log.close()
+    (tmp_path / "data.ids").unlink()
+
+    assert RecordLog(base).seen_ids == {"5", "6"}
+
+
+def test_truncate_torn_tail_without_any_newline(tmp_path):
+    path = tmp_path / "f.jsonl"
+    path.write_bytes(b'{"a"')
+    assert truncate_torn_tail(str(path)) == 4
+    assert path.read_bytes() == b""
+
+
+def test_exports_drop_duplicate_lines(tmp_path):
+    jsonl = tmp_path / "data.jsonl"
+    jsonl.write_text("".join(json.dumps(r) + "\n" for r in records(1, 2, 1)), encoding="utf-8")
+
+    assert export_json(str(jsonl), str(tmp_path / "out.json")) == 2
+    assert len(json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))) == 2
+    assert export_csv(str(jsonl), str(tmp_path / "out.csv")) == 2
@@ -0,0 +1,56 @@
+import time
+
+from user_cache import UserCache
+
+ALICE = (1, "alice@example.com", None, "Alice", "A", "1", "citizen", None, None, True)
+BOB = (2, "bob@example.com", None, "Bob", "B", "2", "citizen", None, None, True)
+
+
+def test_hit_after_put_and_miss_counting():
+    cache = UserCache(ttl=30, max_entries=10)
+    assert cache.get("t1") is None
+    cache.put("t1", ALICE)
+    assert cache.get("t1") == ALICE
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entry_never_outlives_token_exp():
+    cache = UserCache(ttl=30, max_entries=10)
+    cache.put("t1", ALICE, token_exp=time.time() - 1)
+    assert cache.get("t1") is None
+    assert len(cache) == 0
+
+
+def test_ttl_expiry(monkeypatch):
+    cache = UserCache(ttl=5, max_entries=10)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.put("t1", ALICE)
+    monkeypatch.setattr(time, "time", lambda: now + 6)
+    assert cache.get("t1") is None
+
+
+def test_zero_ttl_disables_caching():
+    cache = UserCache(ttl=0, max_entries=10)
+    cache.put("t1", ALICE)
+    assert cache.get("t1") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = UserCache(ttl=30, max_entries=2)
+    cache.put("t1", ALICE)
+    cache.put("t2", BOB)
+    cache.get("t1")
+    cache.put("t3", BOB)
+    assert cache.get("t2") is None
+    assert cache.get("t1") == ALICE
+
+
+def test_invalidate_user_drops_all_their_tokens():
+    cache = UserCache(ttl=30, max_entries=10)
+    cache.put("t1", ALICE)
+    cache.put("t2", ALICE)
+    cache.put("t3", BOB)
+    cache.invalidate_user(1)
+    assert cache.get("t1") is None and cache.get("t2") is None
+    assert cache.get("t3") == BOB
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+import vector_store
+from vector_store import LocalVectorStore
+
+DIM = 16
+
+
+@pytest.fixture
+def ivf_everywhere(monkeypatch):
+    # exercise the IVF tier on a few hundred points instead of 50k
+    monkeypatch.setattr(vector_store, "IVF_MIN_POINTS", 1)
+
+
+def unit(rng, n):
+    x = rng.standard_normal((n, DIM)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def fill(store, vectors, start=0):
+    store.upsert([{"id": start + i, "vector": v.tolist(), "payload": {"n": start + i}}
+                  for i, v in enumerate(vectors)])
+
+
+def far_from_list(store, row):
+    """A unit vector whose nearest IVF list differs from `row`'s current one."""
+    current = store.assign[row]
+    for c in range(len(store.centroids)):
+        if c != current:
+            return store.centroids[c]
+    raise AssertionError("need at least two lists")
+
+
+def test_search_finds_exact_vector(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = unit(rng, 50)
+    store = LocalVectorStore(str(tmp_path), dim=DIM)
+    fill(store, vectors)
+
+    hits = store.search(vectors[7], limit=3)
+    assert hits[0].id == 7
+    assert hits[0].score == pytest.approx(1.0, abs=1e-5)
+    assert hits[0].payload == {"n": 7}
+
+
+def test_score_threshold_and_offset(tmp_path):
+    rng = np.random.default_rng(1)
+    store = LocalVectorStore(str(tmp_path), dim=DIM)
+    fill(store, unit(rng, 40))
+    query = unit(rng, 1)[0]
+
+    everything = store.search(query, limit=40, exact=True)
+    assert [h.id for h in store.search(query, limit=5, offset=5, exact=True)] == [h.id for h in everything[5:10]]
+    assert all(h.score >= 0.2 for h in store.search(query, limit=40, score_threshold=0.2))
+
+
+def test_second_instance_sees_appended_rows(tmp_path):
+    rng = np.random.default_rng(2)
+    reader = LocalVectorStore(str(tmp_path), dim=DIM)
+    writer = LocalVectorStore(str(tmp_path), dim=DIM)
+    vectors = unit(rng, 2000)       # grows the memmap past the reader's capacity
+    fill(writer, vectors)
+
+    assert reader.count() == 2000
+    assert reader.search(vectors[1999], limit=1)[0].id == 1999
+
+
+def test_overwrite_from_other_instance_moves_ivf_list(tmp_path, ivf_everywhere):
+    rng = np.random.default_rng(3)
+    reader = LocalVectorStore(str(tmp_path), dim=DIM)
+    fill(reader, unit(rng, 400))
+    reader.build_ivf(nlist=8)
+    writer = LocalVectorStore(str(tmp_path), dim=DIM)
+
+    moved = far_from_list(writer, 9)
+    writer.upsert([{"id": 9, "vector": moved.tolist(), "payload": {"moved": True}}])
+
+    exact = reader.search(moved, limit=1, exact=True)[0]
+    approx = reader.search(moved, limit=1, ef=8)[0]
+    assert exact.id == approx.id == 9
+    assert approx.payload == {"moved": True}
+
+
+def test_overwrite_after_build_survives_restart(tmp_path, ivf_everywhere):
+    rng = np.random.default_rng(4)
+    store = LocalVectorStore(str(tmp_path), dim=DIM)
+    fill(store, unit(rng, 400))
+    store.build_ivf(nlist=8)
+    moved = far_from_list(store, 9)
+    store.upsert([{"id": 9, "vector": moved.tolist(), "payload": {}}])
+    store.close()
+
+    reopened = LocalVectorStore(str(tmp_path), dim=DIM)
+    assert reopened.search(moved, limit=1, ef=8)[0].id == 9
+
+
+def test_torn_log_tail_is_ignored(tmp_path):
+    rng = np.random.default_rng(5)
+    store = LocalVectorStore(str(tmp_path), dim=DIM)
+    fill(store, unit(rng, 10))
+    store.close()
+    with open(tmp_path / "points.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"id": 10, "payl')
+
+    assert LocalVectorStore(str(tmp_path), dim=DIM).count() == 10
+
+
+def test_scalar_quantized_search_matches_exact(tmp_path):
+    rng = np.random.default_rng(6)
+    vectors = unit(rng, 300)
+    store = LocalVectorStore(str(tmp_path), dim=DIM)
+    fill(store, vectors)
+    store.train_quantizer()
+    store.oversampling = 4.0
+
+    for row in (0, 123, 299):
+        assert store.search(vectors[row], limit=1)[0].id == row
@@ -0,0 +1,300 @@
+import contextvars
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter as _StackCounter
+from contextlib import contextmanager
+
+from config import TRACE_FILE, TRACE_SAMPLE_RATE, SLOW_REQUEST_MS, PROFILE_DIR, PROFILE_INTERVAL_MS
+
+# ======================
+# REQUEST TRACING
+# ======================
+# Each HTTP request gets a trace; code on its path opens child spans:
+#
+#   with span("face.detect", det_size=320):
+#       ...
+#
+# Finished traces are appended to TRACE_FILE as OTLP/JSON, one
+# ExportTraceServiceRequest per line (what the OpenTelemetry collector's
+# file exporter writes, so Jaeger / Tempo / otel-desktop-viewer can load it).
+# Requests slower than SLOW_REQUEST_MS are always written, whatever the
+# sample rate, together with a sampled stack profile (see SLOW REQUEST
+# PROFILER below). span() outside a request is a no-op.
+
+ENABLED = bool(TRACE_FILE) or SLOW_REQUEST_MS > 0
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+_current = contextvars.ContextVar("trace_span", default=None)
+_write_lock = threading.Lock()
+
+
+class Trace:
+    __slots__ = ("trace_id", "sampled", "spans", "threads", "started", "samples")
+
+    def __init__(self, trace_id=None, sampled=True):
+        self.trace_id = trace_id or "%032x" % random.getrandbits(128)
+        self.sampled = sampled
+        self.spans = []
+        self.threads = set()        # threads that ran code for this request (profiler)
+        self.started = time.monotonic()
+        self.samples = None         # collapsed stack -> count, once the request is slow
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns",
+                 "attributes", "error")
+
+    def __init__(self, trace, name, parent_id=None, kind=SPAN_KIND_INTERNAL, attributes=None):
+        self.trace = trace
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def to_otlp(self):
+        out = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [_attribute(k, v) for k, v in self.attributes.items() if v is not None],
+        }
+        if self.parent_id:
+            out["parentSpanId"] = self.parent_id
+        if self.error:
+            out["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return out
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def current_span():
+    return _current.get()
+
+
+@contextmanager
+def span(name, kind=SPAN_KIND_INTERNAL, **attributes):
+    """Child span of the current one; yields None (and records nothing) outside a trace."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+
+    trace = parent.trace
+    trace.threads.add(threading.get_ident())
+    s = Span(trace, name, parent.span_id, kind, attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.end_ns = time.time_ns()
+        _current.reset(token)
+        trace.spans.append(s)
+
+
+def traceparent():
+    """W3C traceparent for the current span (outgoing calls to ml_service), or None."""
+    s = _current.get()
+    if s is None:
+        return None
+    return f"00-{s.trace.trace_id}-{s.span_id}-{'01' if s.trace.sampled else '00'}"
+
+
+def _parse_traceparent(header):
+    try:
+        _, trace_id, parent_id, flags = header.split("-")
+        if len(trace_id) == 32 and len(parent_id) == 16:
+            return trace_id, parent_id, flags == "01"
+    except (AttributeError, ValueError):
+        pass
+    return None, None, None
+
+
+def start_trace(name, parent_header=None, **attributes):
+    """Root (server) span of a new trace, continuing parent_header if given. Returns (span, token)."""
+    trace_id, parent_id, sampled = _parse_traceparent(parent_header)
+    if sampled is None:
+        sampled = random.random() < TRACE_SAMPLE_RATE
+    trace = Trace(trace_id, sampled)
+    trace.threads.add(threading.get_ident())
+    root = Span(trace, name, parent_id, SPAN_KIND_SERVER, attributes)
+    _profiler.watch(trace)
+    return root, _current.set(root)
+
+
+def end_trace(root, token, service):
+    root.end_ns = time.time_ns()
+    _current.reset(token)
+    trace = root.trace
+    _profiler.unwatch(trace)
+
+    slow = SLOW_REQUEST_MS > 0 and (root.end_ns - root.start_ns) / 1e6 >= SLOW_REQUEST_MS
+    if slow and trace.samples:
+        root.set("profile.file", _write_profile(trace, root))
+    trace.spans.append(root)
+    if TRACE_FILE and (trace.sampled or slow):
+        export(trace, service)
+
+
+def export(trace, service):
+    record = {"resourceSpans": [{
+        "resource": {"attributes": [_attribute("service.name", service)]},
+        "scopeSpans": [{
+            "scope": {"name": "lostbuddy.tracing"},
+            "spans": [s.to_otlp() for s in trace.spans],
+        }],
+    }]}
+    line = json.dumps(record, separators=(",", ":"))
+    try:
+        with _write_lock:
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except OSError as e:
+        print("⚠️ Trace export failed:", e)
+
+
+# ======================
+# SLOW REQUEST PROFILER
+# ======================
+# One daemon thread wakes every PROFILE_INTERVAL_MS; for each in-flight
+# request that has already run past SLOW_REQUEST_MS it samples the stacks of
+# the threads that request touched (sys._current_frames) into collapsed
+# "frame;frame;frame count" lines, the input format of flamegraph.pl and
+# speedscope. Only the part of a request after the threshold is sampled;
+# requests that stay under it cost a set insert and nothing else.
+
+def _collapse(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class _Profiler:
+    def __init__(self, threshold_ms, interval_ms):
+        self.threshold = threshold_ms / 1000.0
+        self.interval = interval_ms / 1000.0
+        self._active = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def watch(self, trace):
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            self._active.add(trace)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="slow-request-profiler", daemon=True)
+                self._thread.start()
+
+    def unwatch(self, trace):
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            self._active.discard(trace)
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            now = time.monotonic()
+            # sampled under the lock: once unwatch() returns, trace.samples is
+            # never touched again and end_trace can read it safely
+            with self._lock:
+                slow = [t for t in self._active if now - t.started >= self.threshold]
+                if not slow:
+                    continue
+                frames = sys._current_frames()
+                for trace in slow:
+                    if trace.samples is None:
+                        trace.samples = _StackCounter()
+                    for ident in list(trace.threads):
+                        frame = frames.get(ident)
+                        if frame is not None and ident != me:
+                            trace.samples[_collapse(frame)] += 1
+                del frames
+
+
+_profiler = _Profiler(SLOW_REQUEST_MS, PROFILE_INTERVAL_MS)
+
+
+def _write_profile(trace, root):
+    path = os.path.join(PROFILE_DIR, f"{trace.trace_id}.folded")
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# {root.name} {(root.end_ns - root.start_ns) / 1e6:.0f} ms, "
+                    f"sampled every {PROFILE_INTERVAL_MS} ms after {SLOW_REQUEST_MS:.0f} ms\n")
+            for stack, count in trace.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        print(f"🐢 Slow request {root.name}: profile in {path}")
+        return path
+    except Exception as e:
+        # diagnostics only: never turn the request into a 500
+        print("⚠️ Profile write failed:", e)
+        return None
+
+
+# ======================
+# FASTAPI WIRING
+# ======================
+def trace_requests(app, service):
+    """Root span per request (named after the route template) on a FastAPI app."""
+    if not ENABLED:
+        return app
+    from fastapi import Request
+
+    @app.middleware("http")
+    async def trace_http(request: Request, call_next):
+        root, token = start_trace(
+            f"{request.method} {request.url.path}",
+            request.headers.get("traceparent"),
+            **{"http.method": request.method, "http.target": request.url.path},
+        )
+        try:
+            response = await call_next(request)
+            root.set("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                root.error = f"HTTP {response.status_code}"
+            return response
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            route = request.scope.get("route")
+            if route is not None:
+                root.name = f"{request.method} {route.path}"
+                root.set("http.route", route.path)
+            end_trace(root, token, service)
+
+    return app
@@ -0,0 +1,87 @@
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image
+
+from config import UPLOAD_MAX_BYTES, UPLOAD_CHUNK_BYTES, PREPROCESS_MAX_SIDE
+from metrics import FACE_STAGE_SECONDS
+from tracing import span
+from preprocess import decode
+
+# ======================
+# STREAMING UPLOADS
+# ======================
+# Photo endpoints stream the multipart body to disk in fixed-size chunks
+# instead of `await photo.read()`, so peak memory per request is one chunk
+# plus one decoded (draft-downscaled) image, whatever the phone sends.
+#
+#   stored = await save_upload(photo, path, decode=True)
+#   stored.image   # upright RGB PIL image at detection resolution
+#   stored.sha256  # content hash, computed while streaming
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    size: int
+    sha256: str
+    image: Optional[Image.Image] = None
+
+
+def decode_image(fp, max_side=PREPROCESS_MAX_SIDE):
+    """Reduced-resolution decode (preprocess.decode), 400 on anything that is not an image."""
+    try:
+        with span("image.decode"), FACE_STAGE_SECONDS.time(stage="decode"):
+            return decode(fp, max_side)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid image file")
+
+
+async def save_upload(upload: UploadFile, dest_path, max_bytes=UPLOAD_MAX_BYTES,
+                      decode=False, max_side=PREPROCESS_MAX_SIDE):
+    """
+    Stream `upload` to dest_path (via a .part file, renamed when complete).
+    Raises 413 past max_bytes and 400 if decode=True and it is not an image;
+    nothing is left on disk in either case.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    tmp_path = dest_path + ".part"
+
+    try:
+        with span("upload.write") as s, open(tmp_path, "wb") as f:
+            while True:
+                chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File too large (max {max_bytes // (1024 * 1024)} MB)",
+                    )
+                digest.update(chunk)
+                f.write(chunk)
+            if s is not None:
+                s.set("upload.bytes", size)
+
+        image = None
+        if decode:
+            # decode from the request's spooled buffer, not a second read from
+            # disk, and off the event loop
+            await upload.seek(0)
+            image = await run_in_threadpool(decode_image, upload.file, max_side)
+
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        await upload.close()
+
+    return StoredUpload(dest_path, size, digest.hexdigest(), image)
@@ -0,0 +1,63 @@
+import threading
+import time
+from collections import OrderedDict
+
+from config import AUTH_CACHE_TTL, AUTH_CACHE_MAX_ENTRIES
+
+# ======================
+# RESOLVED-USER CACHE
+# ======================
+# get_current_user runs on every authenticated request; dashboards fire many
+# per page. The user row resolved from a token is kept for a few seconds
+# (never past the token's own exp). Anything that changes role / verification
+# must call invalidate_user() so a demotion takes effect immediately -- in
+# this process only, so main.py never caches admin / police rows: with
+# several workers the others would keep the old role until the TTL ran out.
+
+
+class UserCache:
+    def __init__(self, ttl=AUTH_CACHE_TTL, max_entries=AUTH_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # token -> (expires_at, user row)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, token, user, token_exp=None):
+        if self.ttl <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, float(token_exp))
+        with self._lock:
+            self._entries[token] = (expires_at, user)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            stale = [t for t, (_, user) in self._entries.items() if user[0] == user_id]
+            for token in stale:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
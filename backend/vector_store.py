@@ -0,0 +1,584 @@
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:     # Windows: no cross-process locking, run a single process
+    fcntl = None
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from metrics import VECTOR_SECONDS
+from tracing import span, SPAN_KIND_CLIENT
+from config import (
+    VISUAL_EMBED_DIR,
+    VECTOR_STORE_BACKEND,
+    VECTOR_QUANTIZATION,
+    QUANTIZATION_OVERSAMPLING,
+)
+
+# ======================
+# VECTOR STORE INTERFACE
+# ======================
+# main.py and the ingestion scripts talk to a VectorStore instead of the raw
+# Qdrant client:
+#
+#   store.upsert(points)                       # dicts or qdrant PointStructs
+#   store.search(vector, limit, ef, exact, score_threshold, offset) -> [SearchHit]
+#   store.search_batch(vectors, limit, ef, exact, score_threshold)  -> [[SearchHit]]
+#
+# score_threshold is applied inside the engine, so callers get up to `limit`
+# hits that all pass it; offset skips that many of the best hits (paging).
+#
+# ef widens the candidate list (Qdrant hnsw_ef, local IVF lists probed) to
+# buy recall with latency; exact=True skips the index entirely.
+#   store.count()
+#
+# VECTOR_QUANTIZATION=scalar|product keeps compressed int8 / PQ codes in RAM
+# and rescores the oversampled shortlist against the original float32
+# vectors (Qdrant natively; the local index supports scalar only).
+#
+# VECTOR_STORE_BACKEND=qdrant  -> QdrantVectorStore (the Docker service)
+# VECTOR_STORE_BACKEND=local   -> LocalVectorStore (in-process, no network),
+#                                persisted under VISUAL_EMBED_DIR
+
+VECTOR_SIZE = 512
+
+# local index tiers
+IVF_MIN_POINTS = 50_000     # below this brute force is already fast
+IVF_NPROBE = 32             # inverted lists scanned per query
+IVF_EF_PER_PROBE = 4        # ef -> nprobe mapping (ef=128 -> 32 lists)
+IVF_TRAIN_SAMPLE = 50_000
+IVF_ITERATIONS = 10
+
+# local scalar quantization
+SQ_QUANTILE = 0.99          # per-dimension range kept, outliers are clipped
+SQ_BLOCK_ROWS = 4096        # int8 rows widened to float32 at a time (stays in L2)
+
+
+@dataclass
+class SearchHit:
+    id: object
+    score: float
+    payload: dict = field(default_factory=dict)
+
+
+def _point_fields(point):
+    """(id, vector, payload) from a plain dict or a qdrant PointStruct."""
+    if isinstance(point, dict):
+        return point["id"], point["vector"], point.get("payload") or {}
+    return point.id, point.vector, point.payload or {}
+
+
+# ======================
+# QDRANT
+# ======================
+class QdrantVectorStore:
+    def __init__(self, client, collection):
+        self.client = client
+        self.collection = collection
+
+    def upsert(self, points):
+        self.client.upsert(collection_name=self.collection, points=points)
+
+    def _search_params(self, ef=None, exact=False):
+        if VECTOR_QUANTIZATION == "none" and ef is None and not exact:
+            return None
+        from qdrant_client.models import SearchParams, QuantizationSearchParams
+
+        quantization = None
+        if VECTOR_QUANTIZATION != "none":
+            quantization = QuantizationSearchParams(
+                ignore=exact,
+                rescore=True,
+                oversampling=QUANTIZATION_OVERSAMPLING,
+            )
+        return SearchParams(hnsw_ef=ef, exact=exact, quantization=quantization)
+
+    def search(self, vector, limit=5, ef=None, exact=False, score_threshold=None, offset=0):
+        results = self.client.search(
+            collection_name=self.collection,
+            query_vector=list(vector),
+            limit=limit,
+            offset=offset,
+            score_threshold=score_threshold,
+            search_params=self._search_params(ef, exact),
+        )
+        return [SearchHit(r.id, r.score, r.payload or {}) for r in results]
+
+    def search_batch(self, vectors, limit=5, ef=None, exact=False, score_threshold=None):
+        from qdrant_client.models import SearchRequest
+
+        results = self.client.search_batch(
+            collection_name=self.collection,
+            requests=[
+                SearchRequest(vector=list(v), limit=limit, with_payload=True,
+                              score_threshold=score_threshold,
+                              params=self._search_params(ef, exact))
+                for v in vectors
+            ],
+        )
+        return [
+            [SearchHit(r.id, r.score, r.payload or {}) for r in hits]
+            for hits in results
+        ]
+
+    def count(self):
+        return self.client.count(collection_name=self.collection).count
+
+
+# ======================
+# LOCAL (IN-PROCESS)
+# ======================
+class LocalVectorStore:
+    """
+    Normalized float32 embeddings in a memory-mapped file plus an append-only
+    metadata log. Cosine similarity == dot product, so a query is one BLAS
+    matrix-vector product over the live rows. Past IVF_MIN_POINTS an IVF
+    tier (spherical k-means lists) narrows the scan to the nearest lists.
+
+    <root>/vectors.f32   float32 [capacity, dim], rows [0, count) are live
+    <root>/points.jsonl  one {"id", "payload"} per row, in row order
+    <root>/ivf.npz       centroids + per-row list assignment (optional)
+    <root>/codes.i8      int8 [capacity, dim] scalar-quantized rows (optional)
+    <root>/sq.npz        per-dimension offset / scale of the quantizer
+
+    With the quantizer trained, queries scan the int8 codes (4x less memory
+    traffic) and only the oversampled shortlist touches the float32 file, so
+    the originals can stay on disk / in page cache.
+
+    Several processes (uvicorn workers, an ingestion script) may share one
+    root: upserts hold an exclusive flock on <root>/.lock and searches first
+    replay whatever other processes appended to points.jsonl since the last
+    call. build_ivf / train_quantizer rewrite the index files and are picked
+    up by other processes on restart only.
+    """
+
+    def __init__(self, root, dim=VECTOR_SIZE):
+        self.root = root
+        self.dim = dim
+        self.vectors_path = os.path.join(root, "vectors.f32")
+        self.points_path = os.path.join(root, "points.jsonl")
+        self.ivf_path = os.path.join(root, "ivf.npz")
+        self.codes_path = os.path.join(root, "codes.i8")
+        self.sq_path = os.path.join(root, "sq.npz")
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._lock_file = open(os.path.join(root, ".lock"), "a")
+        self.ids = []
+        self.payloads = []
+        self.row_of = {}
+        self._log_offset = 0
+
+        self.sq_offset = None
+        self.sq_scale = None
+        self._codes = None
+        self._sq_buf = None
+        self.oversampling = QUANTIZATION_OVERSAMPLING
+        if VECTOR_QUANTIZATION != "none" and os.path.exists(self.sq_path):
+            sq = np.load(self.sq_path)
+            self.sq_offset = sq["offset"]
+            self.sq_scale = sq["scale"]
+
+        with self._file_lock():
+            _, overwritten = self._read_log()
+            self._open_vectors(max(1024, len(self.ids)))
+        self._points_log = open(self.points_path, "a", encoding="utf-8")
+
+        self.centroids = None
+        self.assign = None
+        if os.path.exists(self.ivf_path):
+            ivf = np.load(self.ivf_path)
+            self.centroids = ivf["centroids"]
+            self.assign = np.full(len(self._vectors), -1, dtype=np.int32)
+            self.assign[:len(ivf["assign"])] = ivf["assign"]
+            # rows added after the last build
+            for start in range(len(ivf["assign"]), len(self.ids), IVF_TRAIN_SAMPLE):
+                stop = min(start + IVF_TRAIN_SAMPLE, len(self.ids))
+                self.assign[start:stop] = self._nearest_list(self._vectors[start:stop])
+            # ids overwritten in place may have moved lists since the build
+            if overwritten:
+                rows = np.fromiter(sorted(overwritten), dtype=np.int64)
+                self.assign[rows] = self._nearest_list(np.asarray(self._vectors[rows]))
+
+    # ----------------------
+    # STORAGE
+    # ----------------------
+    @contextmanager
+    def _file_lock(self, shared=False):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _read_log(self):
+        """
+        Applies points.jsonl records past _log_offset. Returns the first new row
+        and the set of existing rows that were overwritten (their IVF list may
+        have changed).
+        """
+        first_new = len(self.ids)
+        overwritten = set()
+        if not os.path.exists(self.points_path):
+            return first_new, overwritten
+        with open(self.points_path, "rb") as f:
+            f.seek(self._log_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break       # torn tail of a crashed writer
+                self._log_offset += len(line)
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                if "row" in rec:
+                    # in-place overwrite of an existing id
+                    self.payloads[rec["row"]] = rec["payload"]
+                    overwritten.add(rec["row"])
+                    continue
+                self.row_of[str(rec["id"])] = len(self.ids)
+                self.ids.append(rec["id"])
+                self.payloads.append(rec["payload"])
+        return first_new, overwritten
+
+    def _sync(self):
+        """Picks up rows other processes appended since the last call."""
+        try:
+            if os.path.getsize(self.points_path) == self._log_offset:
+                return
+        except OSError:
+            return
+        first_new, overwritten = self._read_log()
+        if len(self.ids) > len(self._vectors):
+            # the other process grew the files; remap at their new size
+            self._open_vectors(len(self.ids))
+            if self.assign is not None:
+                assign = np.full(len(self._vectors), -1, dtype=np.int32)
+                assign[:len(self.assign)] = self.assign
+                self.assign = assign
+        if self.centroids is not None:
+            if len(self.ids) > first_new:
+                self.assign[first_new:len(self.ids)] = self._nearest_list(self._vectors[first_new:len(self.ids)])
+            if overwritten:
+                rows = np.fromiter(sorted(overwritten), dtype=np.int64)
+                self.assign[rows] = self._nearest_list(np.asarray(self._vectors[rows]))
+
+    def _open_vectors(self, capacity):
+        size = capacity * self.dim * 4
+        if not os.path.exists(self.vectors_path) or os.path.getsize(self.vectors_path) < size:
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(size)
+        rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+
+        if self.sq_scale is not None:
+            if not os.path.exists(self.codes_path) or os.path.getsize(self.codes_path) < rows * self.dim:
+                with open(self.codes_path, "ab") as f:
+                    f.truncate(rows * self.dim)
+            self._codes = np.memmap(self.codes_path, dtype=np.int8, mode="r+", shape=(rows, self.dim))
+
+    def _ensure_capacity(self, rows):
+        if rows <= len(self._vectors):
+            return
+        self._vectors.flush()
+        if self._codes is not None:
+            self._codes.flush()
+        self._open_vectors(max(rows, 2 * len(self._vectors)))
+        if self.assign is not None:
+            assign = np.full(len(self._vectors), -1, dtype=np.int32)
+            assign[:len(self.assign)] = self.assign
+            self.assign = assign
+
+    @staticmethod
+    def _normalize(vectors):
+        x = np.asarray(vectors, dtype=np.float32)
+        if x.ndim == 1:
+            x = x[None, :]
+        return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+    def count(self):
+        with self._lock, self._file_lock(shared=True):
+            self._sync()
+            return len(self.ids)
+
+    def upsert(self, points):
+        with self._lock, self._file_lock():
+            self._sync()
+            for point in points:
+                point_id, vector, payload = _point_fields(point)
+                vec = self._normalize(vector)[0]
+                key = str(point_id)
+
+                if key in self.row_of:
+                    row = self.row_of[key]
+                    self.payloads[row] = payload
+                    self._points_log.write(json.dumps({"row": row, "payload": payload}) + "\n")
+                else:
+                    row = len(self.ids)
+                    self._ensure_capacity(row + 1)
+                    self.row_of[key] = row
+                    self.ids.append(point_id)
+                    self.payloads.append(payload)
+                    self._points_log.write(json.dumps({"id": point_id, "payload": payload}) + "\n")
+
+                self._vectors[row] = vec
+                if self._codes is not None:
+                    self._codes[row] = self._encode(vec[None, :])[0]
+                if self.centroids is not None:
+                    self.assign[row] = self._nearest_list(vec[None, :])[0]
+
+            self._vectors.flush()
+            if self._codes is not None:
+                self._codes.flush()
+            self._points_log.flush()
+            self._log_offset = os.fstat(self._points_log.fileno()).st_size
+
+    # ----------------------
+    # IVF TIER
+    # ----------------------
+    def _nearest_list(self, vectors):
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def build_ivf(self, nlist=None, seed=0):
+        """Train spherical k-means lists over the current rows and persist them."""
+        with self._lock, self._file_lock():
+            self._sync()
+            n = len(self.ids)
+            if n == 0:
+                return
+            nlist = nlist or max(1, int(4 * np.sqrt(n)))
+            rng = np.random.default_rng(seed)
+            sample_rows = rng.choice(n, size=min(n, IVF_TRAIN_SAMPLE), replace=False)
+            sample = np.asarray(self._vectors[np.sort(sample_rows)])
+
+            centroids = sample[rng.choice(len(sample), size=min(nlist, len(sample)), replace=False)]
+            for _ in range(IVF_ITERATIONS):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(len(centroids)):
+                    members = sample[labels == c]
+                    if len(members):
+                        centroids[c] = members.mean(axis=0)
+                centroids = self._normalize(centroids)
+
+            self.centroids = centroids
+            self.assign = np.full(len(self._vectors), -1, dtype=np.int32)
+            for start in range(0, n, IVF_TRAIN_SAMPLE):
+                stop = min(start + IVF_TRAIN_SAMPLE, n)
+                self.assign[start:stop] = self._nearest_list(self._vectors[start:stop])
+
+            np.savez(self.ivf_path, centroids=self.centroids, assign=self.assign[:n])
+
+    # ----------------------
+    # SCALAR QUANTIZATION
+    # ----------------------
+    def _encode(self, vectors):
+        codes = np.rint((vectors - self.sq_offset) / self.sq_scale)
+        return np.clip(codes, -127, 127).astype(np.int8)
+
+    def train_quantizer(self, quantile=SQ_QUANTILE, seed=0):
+        """Fit per-dimension int8 ranges on the current rows and encode them all."""
+        with self._lock, self._file_lock():
+            self._sync()
+            n = len(self.ids)
+            if n == 0:
+                return
+            rng = np.random.default_rng(seed)
+            sample_rows = np.sort(rng.choice(n, size=min(n, IVF_TRAIN_SAMPLE), replace=False))
+            sample = np.asarray(self._vectors[sample_rows])
+
+            tail = (1 - quantile) / 2
+            lo = np.quantile(sample, tail, axis=0)
+            hi = np.quantile(sample, 1 - tail, axis=0)
+            self.sq_offset = ((hi + lo) / 2).astype(np.float32)
+            self.sq_scale = np.maximum((hi - lo) / 254, 1e-8).astype(np.float32)
+            np.savez(self.sq_path, offset=self.sq_offset, scale=self.sq_scale)
+
+            self._open_vectors(len(self._vectors))
+            for start in range(0, n, SQ_BLOCK_ROWS):
+                stop = min(start + SQ_BLOCK_ROWS, n)
+                self._codes[start:stop] = self._encode(self._vectors[start:stop])
+            self._codes.flush()
+
+    def _approx_scores(self, query, rows, n):
+        # x ~= offset + scale * code  =>  q.x ~= (q * scale).code + q.offset
+        q_scaled = query * self.sq_scale
+        bias = float(query @ self.sq_offset)
+        if rows is not None:
+            return self._codes[rows].astype(np.float32) @ q_scaled + bias
+
+        # widen each block into one reused cache-sized buffer: a fresh
+        # astype() per block made the int8 scan ~3x slower than float32
+        if self._sq_buf is None:
+            self._sq_buf = np.empty((SQ_BLOCK_ROWS, self.dim), dtype=np.float32)
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, SQ_BLOCK_ROWS):
+            stop = min(start + SQ_BLOCK_ROWS, n)
+            block = self._sq_buf[:stop - start]
+            np.copyto(block, self._codes[start:stop], casting="unsafe")
+            np.matmul(block, q_scaled, out=scores[start:stop])
+        return scores + bias
+
+    # ----------------------
+    # SEARCH
+    # ----------------------
+    def _candidates(self, query, n, ef=None):
+        if self.centroids is None or n < IVF_MIN_POINTS:
+            return None
+        nprobe = IVF_NPROBE if ef is None else max(1, ef // IVF_EF_PER_PROBE)
+        probes = np.argsort(-(self.centroids @ query))[:nprobe]
+        return np.flatnonzero(np.isin(self.assign[:n], probes))
+
+    def _top(self, scores, limit, score_threshold=None, offset=0):
+        """Positions of the best scores, best first, after threshold and offset."""
+        limit = min(limit + offset, len(scores))
+        if limit <= 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        if score_threshold is not None:
+            top = top[scores[top] >= score_threshold]
+        return top[offset:]
+
+    def _hit(self, row, score):
+        return SearchHit(self.ids[row], float(score), self.payloads[row])
+
+    def search(self, vector, limit=5, ef=None, exact=False, score_threshold=None, offset=0):
+        query = self._normalize(vector)[0]
+        with self._lock:
+            with self._file_lock(shared=True):
+                self._sync()
+            n = len(self.ids)
+            rows = None if exact else self._candidates(query, n, ef)
+
+            if self._codes is not None and not exact:
+                # shortlist on int8 codes, rescore below against the originals
+                approx = self._approx_scores(query, rows, n)
+                shortlist = self._top(approx, int(np.ceil((limit + offset) * max(1.0, self.oversampling))))
+                rows = shortlist if rows is None else rows[shortlist]
+
+            if rows is None:
+                scores = self._vectors[:n] @ query
+                top = self._top(scores, limit, score_threshold, offset)
+                return [self._hit(r, scores[r]) for r in top]
+
+            scores = self._vectors[rows] @ query
+            top = self._top(scores, limit, score_threshold, offset)
+            return [self._hit(rows[i], scores[i]) for i in top]
+
+    def search_batch(self, vectors, limit=5, ef=None, exact=False, score_threshold=None):
+        queries = self._normalize(vectors)
+        with self._lock:
+            with self._file_lock(shared=True):
+                self._sync()
+            n = len(self.ids)
+            indexed = self._codes is not None or (self.centroids is not None and n >= IVF_MIN_POINTS)
+            if indexed and not exact:
+                return [self.search(q, limit, ef, score_threshold=score_threshold) for q in queries]
+            # brute force: one matrix-matrix product for the whole batch
+            scores = queries @ np.asarray(self._vectors[:n]).T
+            out = []
+            for row_scores in scores:
+                top = self._top(row_scores, limit, score_threshold)
+                out.append([self._hit(r, row_scores[r]) for r in top])
+            return out
+
+    def close(self):
+        with self._lock:
+            self._vectors.flush()
+            if self._codes is not None:
+                self._codes.flush()
+            self._points_log.close()
+            self._lock_file.close()
+
+
+# ======================
+# FACTORY
+# ======================
+class InstrumentedVectorStore:
+    """Times upsert / search / search_batch (vector_store_duration_seconds + a trace span)."""
+
+    def __init__(self, store, backend):
+        self.store = store
+        self.backend = backend
+
+    @contextmanager
+    def _timed(self, op, **attributes):
+        with span(f"vector_store.{op}", SPAN_KIND_CLIENT, **{"db.system": self.backend}, **attributes), \
+                VECTOR_SECONDS.time(backend=self.backend, op=op):
+            yield
+
+    def upsert(self, points):
+        with self._timed("upsert", points=len(points)):
+            return self.store.upsert(points)
+
+    def search(self, vector, limit=5, **kwargs):
+        with self._timed("search", limit=limit):
+            return self.store.search(vector, limit, **kwargs)
+
+    def search_batch(self, vectors, limit=5, **kwargs):
+        with self._timed("search_batch", queries=len(vectors), limit=limit):
+            return self.store.search_batch(vectors, limit, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+
+def make_vector_store(collection, qdrant_client=None, backend=VECTOR_STORE_BACKEND):
+    if backend == "local":
+        store = LocalVectorStore(os.path.join(VISUAL_EMBED_DIR, "local_index", collection))
+    elif qdrant_client is None:
+        raise ValueError("qdrant backend needs a QdrantClient")
+    else:
+        store = QdrantVectorStore(qdrant_client, collection)
+    return InstrumentedVectorStore(store, backend)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain the local vector index")
+    parser.add_argument("command", choices=["import-qdrant", "build-ivf", "quantize", "count"])
+    parser.add_argument("--collection", default="missing_person_faces")
+    parser.add_argument("--qdrant-url", default=os.getenv("QDRANT_URL", "http://qdrant:6333"))
+    parser.add_argument("--nlist", type=int, default=None)
+    args = parser.parse_args()
+
+    local = make_vector_store(args.collection, backend="local")
+
+    if args.command == "import-qdrant":
+        # copy an existing Qdrant collection into the local index
+        from qdrant_client import QdrantClient
+
+        client = QdrantClient(url=args.qdrant_url)
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=args.collection, limit=1024, offset=offset,
+                with_payload=True, with_vectors=True,
+            )
+            local.upsert([{"id": p.id, "vector": p.vector, "payload": p.payload} for p in points])
+            if offset is None:
+                break
+        print(f"✅ Imported {local.count()} points into {local.root}")
+
+    elif args.command == "build-ivf":
+        local.build_ivf(nlist=args.nlist)
+        print(f"✅ IVF built over {local.count()} points ({len(local.centroids)} lists)")
+
+    elif args.command == "quantize":
+        local.train_quantizer()
+        print(f"✅ int8 codes for {local.count()} points "
+              f"({local.count() * local.dim / 1024**2:.1f} MB vs "
+              f"{local.count() * local.dim * 4 / 1024**2:.1f} MB float32)")
+
+    else:
+        print(local.count())
+
+    local.close()